@@ -5,8 +5,21 @@ from flask_login import current_user, login_required
 
 # extensions.py에서 확장 기능 객체들을 가져옵니다.
 from extensions import db, migrate, login_manager
-# models.py에서 User 모델을 가져옵니다. (로그인 매니저에서 사용하기 위함)
-from models import User
+# 주문 변경 시 매출 집계 테이블을 갱신하는 세션 이벤트를 등록합니다.
+from sales_rollup import rebuild_sales_rollup, find_rollup_mismatches
+from sqlite_tuning import init_sqlite_tuning
+from config import get_config
+from product_cache import init_product_cache
+# 로그인 매니저(user_loader)는 User를 직접 조회하지 않고 사용자 정보 캐시를 사용합니다.
+from user_cache import init_user_cache, load_user_identity
+from passwords import init_password_hashing
+from instrumentation import init_instrumentation
+from slow_query_log import init_slow_query_log
+from sales_analytics import init_analytics_cache
+# 상품/거래처 테이블 생성 시 FTS5 검색 인덱스와 트리거를 함께 만들도록 등록합니다.
+from search import rebuild_search_indexes
+from stock_ledger import take_stock_snapshot
+from product_import import iter_rows, import_products, detect_format, DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE
 
 # --- 데이터베이스 초기화 명령어 정의 ---
 @click.command('init-db')
@@ -19,24 +32,89 @@ def init_db_command():
     db.create_all()
     click.echo('Initialized the database.')
 
+@click.command('rebuild-sales-rollup')
+@with_appcontext
+def rebuild_sales_rollup_command():
+    """주문 내역 전체로부터 일별 매출 집계 테이블을 다시 만듭니다."""
+    count = rebuild_sales_rollup()
+    click.echo(f'Rebuilt {count} daily sales rollup rows.')
+
+@click.command('check-sales-rollup')
+@with_appcontext
+def check_sales_rollup_command():
+    """일별 매출 집계 테이블이 원본 주문 내역과 일치하는지 검사합니다."""
+    mismatches = find_rollup_mismatches()
+    for m in mismatches:
+        click.echo(f"Mismatch {m['key']}: rollup={m['rollup']} raw={m['raw']}")
+    if mismatches:
+        raise click.ClickException(f'{len(mismatches)} rollup rows do not match the orders table.')
+    click.echo('Daily sales rollup is consistent.')
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """상품/거래처 FTS 검색 인덱스를 원본 테이블로부터 다시 만듭니다. (VACUUM 이후 실행)"""
+    rebuild_search_indexes()
+    click.echo('Rebuilt product and customer search indexes.')
+
+@click.command('import-products')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default=None,
+              help='파일 형식 (생략하면 확장자로 판단)')
+@click.option('--chunk-size', type=click.IntRange(1, MAX_CHUNK_SIZE, clamp=True), default=DEFAULT_CHUNK_SIZE,
+              show_default=True)
+@with_appcontext
+def import_products_command(path, fmt, chunk_size):
+    """CSV/JSONL 파일의 상품을 chunk 단위 트랜잭션으로 일괄 등록/수정합니다."""
+    with open(path, 'rb') as f:
+        summary = import_products(iter_rows(f, fmt or detect_format(path)), chunk_size=chunk_size)
+    for error in summary['errors']:
+        click.echo(f"line {error['line']}: {error['error']}")
+    click.echo(f"Processed {summary['processed']} rows: {summary['upserted']} upserted, "
+               f"{summary['error_count']} errors.")
+
+@click.command('snapshot-stock')
+@with_appcontext
+def snapshot_stock_command():
+    """현재 모든 상품의 재고를 스냅샷으로 기록합니다. (cron 등으로 매일 실행)"""
+    count = take_stock_snapshot()
+    click.echo(f'Recorded stock snapshot for {count} products.')
+
 # --- 애플리케이션 팩토리 함수 ---
-def create_app():
-    """Flask 앱 인스턴스를 생성하고 설정합니다."""
+def create_app(config_name=None, test_config=None):
+    """Flask 앱 인스턴스를 생성하고 설정합니다.
+
+    config_name은 config.py의 'development' / 'testing' / 'production' 중 하나이며,
+    생략하면 POS_CONFIG 환경 변수를 따릅니다. test_config를 넘기면 그 값으로 설정을 덮어씁니다.
+    """
     app = Flask(__name__)
 
     # 설정 로드
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///pos.db'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SECRET_KEY'] = 'a_very_secret_key_that_must_be_changed'
+    app.config.from_object(get_config(config_name))
+    if test_config is not None:
+        app.config.update(test_config)
 
     # 확장 기능들을 app 인스턴스와 연결합니다.
     db.init_app(app)
+    with app.app_context():
+        init_sqlite_tuning(app, db.engine)
+        init_instrumentation(app, db.engine)
+        init_slow_query_log(app, db.engine)
+    init_product_cache(app)
+    init_user_cache(app)
+    init_password_hashing(app)
+    init_analytics_cache(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     login_manager.login_view = 'login_page'
 
     # 위에서 정의한 CLI 명령어를 앱에 등록합니다.
     app.cli.add_command(init_db_command)
+    app.cli.add_command(rebuild_sales_rollup_command)
+    app.cli.add_command(check_sales_rollup_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(import_products_command)
+    app.cli.add_command(snapshot_stock_command)
 
     # 순환 참조를 피하기 위해, 이 함수 안에서 블루프린트를 가져옵니다.
     from routes.auth_api import auth_bp
@@ -45,6 +123,8 @@ def create_app():
     from routes.customer_api import customer_bp
     from routes.supplier_api import supplier_bp
     from routes.sales_api import sales_bp
+    from routes.metrics_api import metrics_bp
+    from routes.analytics_api import analytics_bp
 
     # 블루프린트들을 앱에 등록합니다.
     app.register_blueprint(auth_bp)
@@ -53,6 +133,8 @@ def create_app():
     app.register_blueprint(customer_bp)
     app.register_blueprint(supplier_bp)
     app.register_blueprint(sales_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(analytics_bp)
 
     # 기본 페이지 라우트
      # 기존의 index 라우트를 대시보드로 변경합니다.
@@ -101,7 +183,8 @@ def create_app():
 # --- Flask-Login 콜백 함수 ---
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # 요청마다 User를 조회하지 않도록 캐시된 사용자 정보를 사용합니다. (user_cache.py 참고)
+    return load_user_identity(int(user_id))
 
 @login_manager.unauthorized_handler
 def unauthorized():
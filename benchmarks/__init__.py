@@ -0,0 +1 @@
+# 성능 측정용 벤치마크 스크립트 모음입니다. 저장소 루트에서 python -m benchmarks.<name> 으로 실행합니다.
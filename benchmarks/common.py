@@ -0,0 +1,112 @@
+import os
+import random
+import threading
+import time
+
+from sqlalchemy import event
+
+from app import create_app
+from extensions import db
+from models import Product, Customer, User
+
+# 벤치마크 스크립트들이 공유하는 도우미 함수 모음입니다.
+# 모든 벤치마크는 로컬 SQLite 파일을 새로 만들어 사용하므로 같은 인자로 실행하면 같은 데이터로 측정됩니다.
+
+BENCH_USERNAME = 'bench'
+BENCH_PASSWORD = 'bench-password'
+
+
+def make_app(db_path, **config):
+    """db_path의 SQLite 파일을 새로 만들어 사용하는 앱을 생성합니다. 기존 파일은 삭제됩니다."""
+    db_path = os.path.abspath(db_path)
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    app = create_app(test_config={'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}', **config})
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed(app, products, customers, stock=1_000_000, seed_value=0):
+    """벤치마크 사용자, 상품 products개, 거래처 customers개를 생성하고 (상품 ID 목록, 거래처 ID 목록)을 반환합니다."""
+    rng = random.Random(seed_value)
+    with app.app_context():
+        user = User(username=BENCH_USERNAME)
+        user.set_password(BENCH_PASSWORD)
+        db.session.add(user)
+        db.session.flush()
+        db.session.execute(Product.__table__.insert(), [
+            {'id': f'P{i:06d}', 'name': f'상품{i}', 'unit': 'EA', 'price': rng.randint(1, 100) * 100,
+             'stock_quantity': stock}
+            for i in range(products)
+        ])
+        db.session.execute(Customer.__table__.insert(), [
+            {'name': f'거래처{i}', 'receivable_balance': 0, 'user_id': user.id}
+            for i in range(customers)
+        ])
+        db.session.commit()
+        product_ids = [row[0] for row in db.session.query(Product.id).order_by(Product.id)]
+        customer_ids = [row[0] for row in db.session.query(Customer.id).order_by(Customer.id)]
+    return product_ids, customer_ids
+
+
+def logged_in_client(app):
+    """벤치마크 사용자로 로그인한 테스트 클라이언트를 반환합니다. 스레드마다 하나씩 만들어 사용합니다."""
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'username': BENCH_USERNAME, 'password': BENCH_PASSWORD})
+    if response.status_code != 200:
+        raise RuntimeError(f'Benchmark login failed: {response.get_json()}')
+    return client
+
+
+class StatementCounter:
+    """스레드별로 실행된 SQL 문장 수를 셉니다. with 블록 하나가 요청 하나에 해당합니다."""
+
+    def __init__(self, engine):
+        self._local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if getattr(self._local, 'count', None) is not None:
+            self._local.count += 1
+
+    def __enter__(self):
+        self._local.count = 0
+        return self
+
+    def __exit__(self, *exc):
+        self.last = self._local.count
+        self._local.count = None
+        return False
+
+
+def percentile(values, pct):
+    """정렬된 값 목록의 백분위 값을 반환합니다. (nearest-rank)"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values))) - 1))
+    return values[index]
+
+
+def format_latency_report(name, latencies, elapsed, statements=None, errors=0):
+    """작업 이름별 처리량/지연시간 요약 한 줄을 만듭니다. latencies는 초 단위입니다."""
+    count = len(latencies)
+    line = (f'{name:<10} n={count:<6} {count / elapsed if elapsed else 0:8.1f} req/s  '
+            f'p50={percentile(latencies, 50) * 1000:7.2f}ms  '
+            f'p95={percentile(latencies, 95) * 1000:7.2f}ms  '
+            f'p99={percentile(latencies, 99) * 1000:7.2f}ms')
+    if statements:
+        line += f'  sql/req={sum(statements) / len(statements):5.1f} (max {max(statements)})'
+    return line + f'  errors={errors}'
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        return False
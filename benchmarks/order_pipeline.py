@@ -0,0 +1,96 @@
+"""주문 파이프라인(POST /api/orders, DELETE /api/order/<id>) 동시성 부하 벤치마크.
+
+여러 계산대가 동시에 주문/취소하는 상황을 스레드 풀로 재현하고,
+처리량, p50/p95/p99 지연시간, 요청당 SQL 실행 수, 잠금 경합 오류 수를 출력합니다.
+
+사용법 (저장소 루트에서):
+    python -m benchmarks.order_pipeline --orders 2000 --workers 8
+"""
+import argparse
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from extensions import db
+from benchmarks.common import (make_app, seed, logged_in_client, StatementCounter,
+                               format_latency_report, Timer)
+
+
+def _is_lock_error(response):
+    body = response.get_json(silent=True) or {}
+    return 'locked' in str(body.get('error', '')).lower()
+
+
+def run(args, config=None):
+    """벤치마크를 실행합니다. config로 앱 설정(엔진 옵션 등)을 덮어쓸 수 있습니다."""
+    app = make_app(args.db, **(config or {}))
+    product_ids, customer_ids = seed(app, args.products, args.customers, seed_value=args.seed)
+    with app.app_context():
+        counter = StatementCounter(db.engine)
+
+    results = {'create': [], 'cancel': []}
+    statements = {'create': [], 'cancel': []}
+    errors = {'create': 0, 'cancel': 0, 'lock': 0}
+    lock = threading.Lock()
+
+    def worker(worker_index, order_count):
+        rng = random.Random(args.seed * 1000 + worker_index)
+        client = logged_in_client(app)
+        created = []
+        for _ in range(order_count):
+            items = [
+                {'id': product_id, 'quantity': rng.randint(1, 3), 'price': 1000}
+                for product_id in rng.sample(product_ids, rng.randint(1, args.max_lines))
+            ]
+            payload = {'items': items, 'total_amount': sum(i['quantity'] * i['price'] for i in items)}
+            if customer_ids and rng.random() < args.credit_ratio:
+                payload.update(payment_method='credit', customer_id=rng.choice(customer_ids))
+            _request(client.post, '/api/orders', 'create', created, json=payload)
+
+            if created and rng.random() < args.cancel_ratio:
+                order_id = created.pop(rng.randrange(len(created)))
+                _request(client.delete, f'/api/order/{order_id}', 'cancel', None)
+
+    def _request(method, url, kind, created, **kwargs):
+        with Timer() as timer, counter:
+            response = method(url, **kwargs)
+        with lock:
+            results[kind].append(timer.elapsed)
+            statements[kind].append(counter.last)
+            if response.status_code >= 400:
+                errors[kind] += 1
+                if _is_lock_error(response):
+                    errors['lock'] += 1
+        if created is not None and response.status_code == 201:
+            created.append(response.get_json()['order_id'])
+
+    per_worker = [args.orders // args.workers + (1 if i < args.orders % args.workers else 0)
+                  for i in range(args.workers)]
+    with Timer() as total, ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for future in [pool.submit(worker, i, n) for i, n in enumerate(per_worker)]:
+            future.result()
+
+    print(f'orders={args.orders} workers={args.workers} products={args.products} '
+          f'customers={args.customers} seed={args.seed} elapsed={total.elapsed:.2f}s')
+    for kind in ('create', 'cancel'):
+        print(format_latency_report(kind, results[kind], total.elapsed, statements[kind], errors[kind]))
+    print(f'lock contention errors: {errors["lock"]}')
+    return results, statements, errors, total.elapsed
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default='bench_orders.db', help='벤치마크용 SQLite 파일 경로 (매 실행마다 새로 생성)')
+    parser.add_argument('--products', type=int, default=500)
+    parser.add_argument('--customers', type=int, default=50)
+    parser.add_argument('--orders', type=int, default=1000, help='생성할 전체 주문 수')
+    parser.add_argument('--workers', type=int, default=8, help='동시에 주문하는 계산대(스레드) 수')
+    parser.add_argument('--max-lines', type=int, default=5, help='주문당 최대 상품 줄 수')
+    parser.add_argument('--cancel-ratio', type=float, default=0.1)
+    parser.add_argument('--credit-ratio', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser
+
+
+if __name__ == '__main__':
+    run(build_parser().parse_args())
@@ -0,0 +1,85 @@
+"""상품 검색 지연시간 벤치마크: LIKE '%term%' 전체 스캔 vs FTS5 trigram 인덱스 (search.py).
+
+상품 N개(기본 100,000개)를 한글 이름으로 생성한 뒤, 검색어별로 두 방식의 조회 지연시간을 비교합니다.
+/api/products처럼 일치하는 상품 전체를 조회합니다. (LIKE는 상품 ID를 검색하지 않으므로 ID 검색어의 결과 수가 다릅니다.)
+
+사용법 (저장소 루트에서):
+    python -m benchmarks.search --rows 100000 --repeat 20
+"""
+import argparse
+import random
+
+from extensions import db
+from models import Product
+from search import search_products
+from benchmarks.common import make_app, percentile, Timer
+
+SYLLABLES = ['닭', '가슴', '살', '근위', '목살', '삼겹', '오리', '훈제', '양념', '날개', '다리', '안심', '등심', '통', '순살']
+UNITS = ['KG', '팩', '마리', '봉']
+DEFAULT_TERMS = ['가슴살', '훈제오리', '양념닭', '99999', 'P01234', '닭', '목살']
+
+
+def seed_products(app, rows, seed_value):
+    rng = random.Random(seed_value)
+    with app.app_context():
+        batch = []
+        for i in range(rows):
+            name = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) + f' {i}'
+            batch.append({'id': f'P{i:06d}', 'name': name, 'unit': rng.choice(UNITS),
+                          'price': rng.randint(1, 200) * 100, 'stock_quantity': 0})
+            if len(batch) == 10000:
+                db.session.execute(Product.__table__.insert(), batch)
+                batch = []
+        if batch:
+            db.session.execute(Product.__table__.insert(), batch)
+        db.session.commit()
+
+
+def measure(app, terms, repeat, build_query):
+    results = {}
+    with app.app_context():
+        for term in terms:
+            latencies = []
+            for _ in range(repeat):
+                with Timer() as timer:
+                    rows = build_query(term).all()
+                latencies.append(timer.elapsed)
+            results[term] = (latencies, len(rows))
+            db.session.expunge_all()
+    return results
+
+
+def like_query(term):
+    return Product.query.filter(Product.name.like(f'%{term}%')).order_by(Product.name)
+
+
+def fts_query(term):
+    return search_products(Product.query, term)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default='bench_search.db')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--terms', nargs='+', default=DEFAULT_TERMS)
+    args = parser.parse_args()
+
+    app = make_app(args.db)
+    with Timer() as seeding:
+        seed_products(app, args.rows, args.seed)
+    print(f'seeded {args.rows} products in {seeding.elapsed:.1f}s (FTS index maintained by triggers)')
+
+    like = measure(app, args.terms, args.repeat, like_query)
+    fts = measure(app, args.terms, args.repeat, fts_query)
+    print(f'{"term":<10} {"LIKE p50":>10} {"FTS p50":>10} {"LIKE p95":>10} {"FTS p95":>10}  rows(LIKE/FTS)')
+    for term in args.terms:
+        like_lat, like_rows = like[term]
+        fts_lat, fts_rows = fts[term]
+        print(f'{term:<10} {percentile(like_lat, 50) * 1000:8.2f}ms {percentile(fts_lat, 50) * 1000:8.2f}ms '
+              f'{percentile(like_lat, 95) * 1000:8.2f}ms {percentile(fts_lat, 95) * 1000:8.2f}ms  {like_rows}/{fts_rows}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""SQLite PRAGMA 프로필('default' vs 'production')별 주문 쓰기 처리량 비교 벤치마크.
+
+같은 시드로 order_pipeline 벤치마크를 프로필마다 한 번씩 실행하고 처리량과 잠금 오류 수를 비교합니다.
+
+사용법 (저장소 루트에서):
+    python -m benchmarks.sqlite_profile --orders 2000 --workers 8
+"""
+from benchmarks import order_pipeline
+
+
+def main():
+    parser = order_pipeline.build_parser()
+    parser.description = __doc__.splitlines()[0]
+    parser.add_argument('--profiles', nargs='+', default=['default', 'production'])
+    args = parser.parse_args()
+
+    summary = []
+    for profile in args.profiles:
+        print(f'--- SQLITE_PROFILE={profile}')
+        results, _, errors, elapsed = order_pipeline.run(args, config={'SQLITE_PROFILE': profile})
+        writes = len(results['create']) + len(results['cancel'])
+        summary.append((profile, writes / elapsed, errors['lock']))
+
+    print('--- summary')
+    baseline = summary[0][1]
+    for profile, throughput, lock_errors in summary:
+        print(f'{profile:<12} {throughput:8.1f} writes/s  x{throughput / baseline:4.2f}  lock errors={lock_errors}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""재고 실사 벤치마크: 상품별 PUT /api/product/<id>/stock 반복 vs POST /api/products/stock 일괄 조정.
+
+상품 N개(기본 2,000개)에 대해 같은 조정 목록을 두 방식으로 반영하고 소요 시간과 SQL 문장 수를 비교합니다.
+
+사용법 (저장소 루트에서):
+    python -m benchmarks.stocktake --products 2000 --batch-size 500
+"""
+import argparse
+import random
+
+from extensions import db
+from benchmarks.common import make_app, seed, logged_in_client, StatementCounter, Timer
+
+
+def build_items(product_ids, seed_value):
+    rng = random.Random(seed_value)
+    return [{'product_id': pid, 'adjustment': rng.randint(-50, 50)} for pid in product_ids]
+
+
+def run_single(client, items, counter):
+    statements = 0
+    with Timer() as timer:
+        for item in items:
+            with counter:
+                response = client.put(f"/api/product/{item['product_id']}/stock",
+                                      json={'adjustment': item['adjustment']})
+            statements += counter.last
+            if response.status_code != 200:
+                raise RuntimeError(f'Single adjustment failed: {response.get_json()}')
+    return timer.elapsed, statements
+
+
+def run_batch(client, items, batch_size, counter):
+    statements = 0
+    with Timer() as timer:
+        for start in range(0, len(items), batch_size):
+            with counter:
+                response = client.post('/api/products/stock', json={'items': items[start:start + batch_size]})
+            statements += counter.last
+            if response.status_code != 200:
+                raise RuntimeError(f'Batch adjustment failed: {response.get_json()}')
+    return timer.elapsed, statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default='bench_stocktake.db')
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    summary = []
+    for name in ('single', 'batch'):
+        app = make_app(args.db)
+        product_ids, _ = seed(app, args.products, 1, stock=1000, seed_value=args.seed)
+        items = build_items(product_ids, args.seed)
+        with app.app_context():
+            counter = StatementCounter(db.engine)
+        client = logged_in_client(app)
+        if name == 'single':
+            elapsed, statements = run_single(client, items, counter)
+        else:
+            elapsed, statements = run_batch(client, items, args.batch_size, counter)
+        summary.append((name, elapsed, statements))
+
+    baseline = summary[0][1]
+    for name, elapsed, statements in summary:
+        print(f'{name:<8} {len(items)} items in {elapsed * 1000:9.1f}ms  '
+              f'{len(items) / elapsed:9.1f} items/s  sql={statements:<6} x{baseline / elapsed:6.1f}')
+
+
+if __name__ == '__main__':
+    main()
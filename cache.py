@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import OrderedDict
+
+# 프로세스 내부 메모리 캐시입니다. 여러 워커 프로세스가 있으면 각자 캐시를 가지므로,
+# 다른 프로세스의 변경은 최대 TTL만큼 늦게 반영될 수 있습니다.
+
+_MISSING = object()
+
+
+class TTLCache:
+    """TTL(초)과 최대 항목 수(LRU 제거)를 가진 스레드 안전 캐시입니다. 적중/실패 횟수를 기록합니다."""
+
+    def __init__(self, ttl=30, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, ttl=None, max_entries=None):
+        with self._lock:
+            if ttl is not None:
+                self.ttl = ttl
+            if max_entries is not None:
+                self.max_entries = max_entries
+            self._data.clear()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """캐시에 값이 있으면 반환하고, 없으면 loader()를 호출해 저장한 뒤 반환합니다."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def discard(self, key):
+        """key 항목이 있으면 제거합니다."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'size': len(self._data),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+            }
@@ -0,0 +1,77 @@
+from flask import jsonify
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm.exc import StaleDataError
+
+from extensions import db
+
+# 낙관적 동시성 제어 도우미입니다.
+# Product/Customer/Order는 version_id 컬럼을 가지며, ORM UPDATE/DELETE는 읽은 시점의 버전을 조건으로 실행됩니다.
+# 그 사이 다른 요청이 같은 행을 바꿨다면 커밋할 때 StaleDataError가 발생하므로, 테이블을 잠그지 않고도
+# 변경분이 조용히 덮어써지는 일을 막을 수 있습니다.
+#  - 사용자가 수정하는 API(PUT): 요청 본문의 'version'과 비교하고, 충돌하면 409와 현재 상태를 반환합니다.
+#  - 내부 처리(주문 생성/취소, 수금 등): run_with_retry로 처음부터 다시 읽어서 재시도합니다.
+# 잠금 대기 시간 초과(SQLite "database is locked")와 직렬화 실패/교착 상태(PostgreSQL 40001/40P01)도
+# 같은 방식으로 재시도하며, 마지막 시도까지 실패하면 DatabaseBusy로 바꿔 503으로 응답할 수 있게 합니다.
+DEFAULT_RETRY_ATTEMPTS = 3
+_SQLITE_LOCKED_MESSAGES = ('database is locked', 'database table is locked')
+_POSTGRESQL_RETRY_SQLSTATES = ('40001', '40P01')
+
+
+class DatabaseBusy(RuntimeError):
+    """재시도해도 잠금 대기 시간 초과나 직렬화 실패가 계속되었습니다."""
+
+
+class VersionConflict(Exception):
+    """클라이언트가 보낸 version이 현재 행의 version과 다를 때 발생합니다."""
+
+
+def check_version(obj, data):
+    """요청 본문에 'version'이 있으면 obj의 현재 버전과 비교하고, 다르면 VersionConflict를 발생시킵니다."""
+    if data and data.get('version') is not None and data['version'] != obj.version_id:
+        raise VersionConflict()
+
+
+def conflict_response(obj):
+    """트랜잭션을 롤백하고, obj의 최신 상태와 함께 409 응답을 만듭니다."""
+    db.session.rollback()
+    return jsonify({
+        'error': 'This record was modified by another request. Reload and try again.',
+        'current': obj.to_dict()
+    }), 409
+
+
+def busy_response(error):
+    """DatabaseBusy를 잠시 후 다시 시도하라는 503 응답으로 만듭니다."""
+    return jsonify({'error': str(error)}), 503, {'Retry-After': '1'}
+
+
+def is_retryable_db_error(error):
+    """다시 실행하면 성공할 수 있는 잠금/직렬화 오류인지 확인합니다."""
+    if not isinstance(error, DBAPIError):
+        return False
+    orig = error.orig
+    sqlstate = getattr(orig, 'sqlstate', None) or getattr(orig, 'pgcode', None)
+    if sqlstate in _POSTGRESQL_RETRY_SQLSTATES:
+        return True
+    return any(message in str(orig) for message in _SQLITE_LOCKED_MESSAGES)
+
+
+def run_with_retry(operation, attempts=DEFAULT_RETRY_ATTEMPTS):
+    """operation()을 실행하고, 버전 충돌이나 잠금/직렬화 오류가 나면 롤백한 뒤 최대 attempts번까지 다시 실행합니다.
+
+    operation은 필요한 행을 직접 다시 조회하고 커밋까지 수행해야 합니다. 마지막 시도도 버전 충돌이면
+    StaleDataError를 그대로 올리고, 잠금/직렬화 오류이면 DatabaseBusy를 발생시킵니다.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return operation()
+        except StaleDataError:
+            db.session.rollback()
+            if attempt == attempts:
+                raise
+        except DBAPIError as e:
+            if not is_retryable_db_error(e):
+                raise
+            db.session.rollback()
+            if attempt == attempts:
+                raise DatabaseBusy('The database is busy. Try again shortly.') from e
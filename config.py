@@ -0,0 +1,143 @@
+import os
+
+# 환경별 설정 클래스입니다. create_app(config_name)이 인스턴스를 만들어 app.config에 로드합니다.
+# 값은 인스턴스를 만드는 시점의 환경 변수에서 읽으므로, 배포 환경에서는 코드 수정 없이
+# DATABASE_URL, SECRET_KEY, DB_POOL_* 등의 환경 변수로 조정합니다.
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class Config:
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    TESTING = False
+    DEBUG = False
+    # 상품 목록/단가 캐시 (product_cache.py 참고)
+    PRODUCT_CACHE_TTL = 30
+    PRODUCT_CACHE_MAX_ENTRIES = 256
+    # 로그인 사용자 정보 캐시 (user_cache.py 참고)
+    USER_CACHE_TTL = 60
+    USER_CACHE_MAX_ENTRIES = 1024
+    # 요청 시간/SQL 측정과 Server-Timing 헤더 (instrumentation.py 참고)
+    INSTRUMENTATION_ENABLED = True
+    # 매출 분석 결과 캐시 (sales_analytics.py 참고)
+    ANALYTICS_CACHE_TTL = 300
+    ANALYTICS_CACHE_MAX_ENTRIES = 256
+    # 느린 쿼리 로그 (slow_query_log.py 참고). 경로를 생략하면 instance/slow_queries.jsonl
+    SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUP_COUNT = 5
+
+    @property
+    def SECRET_KEY(self):
+        return os.environ.get('SECRET_KEY', 'a_very_secret_key_that_must_be_changed')
+
+    @property
+    def PASSWORD_HASH_METHOD(self):
+        # werkzeug 형식의 해시 방식과 비용입니다. 바꾸면 기존 사용자는 다음 로그인 때 다시 해시됩니다. (passwords.py 참고)
+        return os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+
+    @property
+    def METRICS_RESET_ENABLED(self):
+        # DELETE /api/_metrics로 누적 측정 값을 지울 수 있는지 여부입니다. 운영 중 지표가 지워지지 않도록 기본값은 꺼 둡니다.
+        return _env_bool('METRICS_RESET_ENABLED', False)
+
+    @property
+    def SLOW_QUERY_LOG_ENABLED(self):
+        return _env_bool('SLOW_QUERY_LOG_ENABLED', True)
+
+    @property
+    def SLOW_QUERY_THRESHOLD_MS(self):
+        return _env_int('SLOW_QUERY_THRESHOLD_MS', 200)
+
+    @property
+    def SLOW_QUERY_LOG_PATH(self):
+        return os.environ.get('SLOW_QUERY_LOG_PATH')
+
+    @property
+    def LOGIN_MAX_CONCURRENT_HASHES(self):
+        # 프로세스당 동시에 실행하는 비밀번호 해시 계산 수
+        return _env_int('LOGIN_MAX_CONCURRENT_HASHES', 2)
+
+    @property
+    def LOGIN_HASH_WAIT_TIMEOUT(self):
+        # 해시 계산 차례를 기다리는 최대 시간(초). 초과하면 로그인에 503을 응답합니다.
+        return _env_int('LOGIN_HASH_WAIT_TIMEOUT', 5)
+
+    @property
+    def SQLALCHEMY_DATABASE_URI(self):
+        return os.environ.get('DATABASE_URL', 'sqlite:///pos.db')
+
+    @property
+    def SQLITE_PROFILE(self):
+        # SQLite를 사용할 때만 적용됩니다. (sqlite_tuning.py 참고)
+        return os.environ.get('SQLITE_PROFILE', 'production')
+
+    @property
+    def SQLALCHEMY_ENGINE_OPTIONS(self):
+        # 연결 풀 설정: 요청마다 새로 연결하지 않고 풀의 연결을 재사용합니다.
+        return {
+            'pool_size': _env_int('DB_POOL_SIZE', 5),
+            'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+            'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+            'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+        }
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLITE_PROFILE = 'default'
+    # 테스트에서는 해시 비용을 낮춰 속도를 높입니다.
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    SLOW_QUERY_LOG_ENABLED = False
+
+    @property
+    def SQLALCHEMY_DATABASE_URI(self):
+        return os.environ.get('TEST_DATABASE_URL', 'sqlite:///:memory:')
+
+    @property
+    def SQLALCHEMY_ENGINE_OPTIONS(self):
+        # 메모리 SQLite는 단일 연결(StaticPool)을 사용하므로 풀 크기 옵션을 넘기지 않습니다.
+        return {}
+
+
+class ProductionConfig(Config):
+    @property
+    def SECRET_KEY(self):
+        secret_key = os.environ.get('SECRET_KEY')
+        if not secret_key:
+            raise RuntimeError('SECRET_KEY environment variable must be set in production.')
+        return secret_key
+
+    @property
+    def SQLALCHEMY_ENGINE_OPTIONS(self):
+        return {
+            **super().SQLALCHEMY_ENGINE_OPTIONS,
+            'pool_size': _env_int('DB_POOL_SIZE', 10),
+            'max_overflow': _env_int('DB_MAX_OVERFLOW', 20),
+        }
+
+
+config_by_name = {
+    'development': DevelopmentConfig,
+    'testing': TestingConfig,
+    'production': ProductionConfig,
+}
+
+def get_config(config_name=None):
+    """설정 이름(없으면 POS_CONFIG 환경 변수, 기본 'development')에 해당하는 설정 객체를 반환합니다."""
+    config_name = config_name or os.environ.get('POS_CONFIG', 'development')
+    if config_name not in config_by_name:
+        raise ValueError(f"Unknown config '{config_name}'. Choose one of: {', '.join(config_by_name)}")
+    return config_by_name[config_name]()
@@ -0,0 +1,36 @@
+import datetime
+
+from sqlalchemy import and_, true
+
+# 날짜 조건을 func.date()/extract()로 컬럼을 감싸서 비교하면 인덱스를 사용할 수 없습니다.
+# 이 모듈의 함수들은 날짜/월을 반열린 구간 [start, end)의 datetime으로 바꿔서
+# 원본 컬럼에 그대로 비교할 수 있게 해 줍니다.
+
+def day_range(day):
+    """하루를 [해당일 00:00, 다음날 00:00) 구간으로 반환합니다."""
+    start = datetime.datetime.combine(day, datetime.time.min)
+    return start, start + datetime.timedelta(days=1)
+
+def month_range(year, month):
+    """한 달을 [해당월 1일 00:00, 다음달 1일 00:00) 구간으로 반환합니다."""
+    start = datetime.datetime(year, month, 1)
+    if month == 12:
+        end = datetime.datetime(year + 1, 1, 1)
+    else:
+        end = datetime.datetime(year, month + 1, 1)
+    return start, end
+
+def days_range(start_day=None, end_day=None):
+    """start_day부터 end_day까지(양 끝 포함)의 기간을 [start, end) 구간으로 반환합니다. 생략한 쪽은 None입니다."""
+    start = day_range(start_day)[0] if start_day else None
+    end = day_range(end_day)[1] if end_day else None
+    return start, end
+
+def in_range(column, start=None, end=None):
+    """column이 [start, end) 구간에 속하는 조건식을 만듭니다. None인 경계는 조건에서 제외합니다."""
+    conditions = []
+    if start is not None:
+        conditions.append(column >= start)
+    if end is not None:
+        conditions.append(column < end)
+    return and_(true(), *conditions)
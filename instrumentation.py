@@ -0,0 +1,164 @@
+import contextvars
+import threading
+import time
+
+from flask import request
+from sqlalchemy import event
+
+# 요청별 처리 시간과 SQL 실행 횟수/시간을 측정합니다.
+#  - Flask before_request/after_request로 요청 시간을, 엔진의 before/after_cursor_execute 이벤트로 SQL을 잽니다.
+#  - 응답마다 Server-Timing 헤더(app, db)를 붙이므로 브라우저 개발자 도구에서 바로 확인할 수 있습니다.
+#  - 엔드포인트별 누적 값과 히스토그램은 /api/_metrics로 조회합니다. (프로세스별 집계)
+#  - 스트리밍 응답(주문 목록 format=ndjson 등)은 after_request 이후 본문을 만들면서 실행하는 SQL이
+#    집계에 포함되지 않습니다. 그런 엔드포인트의 값은 스트리밍 시작 전까지의 비용만 나타냅니다.
+# 요청당 비용은 perf_counter 호출과 딕셔너리 갱신 몇 번뿐이므로 운영 환경에서도 켜 둘 수 있습니다.
+
+# 히스토그램 구간 상한 (누적 방식, 마지막 '+Inf'는 전체 건수)
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50)
+
+# 현재 요청의 [SQL 실행 횟수, SQL 누적 시간(초)]. 요청 밖(CLI 등)에서는 None이므로 집계하지 않습니다.
+_current_sql = contextvars.ContextVar('request_sql_metrics', default=None)
+
+
+class _Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+
+    def observe(self, value):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def to_list(self):
+        # JSON 객체는 키 순서가 보장되지 않으므로 [{'le': 상한, 'count': 누적 건수}] 목록으로 반환합니다.
+        buckets, total = [], 0
+        for bound, count in zip((*self.bounds, '+Inf'), self.counts):
+            total += count
+            buckets.append({'le': bound, 'count': total})
+        return buckets
+
+
+class _EndpointStats:
+    def __init__(self):
+        self.count = 0
+        self.duration_total = 0.0
+        self.duration_max = 0.0
+        self.duration_histogram = _Histogram(DURATION_BUCKETS_MS)
+        self.statements_total = 0
+        self.statements_max = 0
+        self.sql_time_total = 0.0
+        self.statement_histogram = _Histogram(STATEMENT_BUCKETS)
+        self.status_counts = {}
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'status': dict(self.status_counts),
+            'duration_ms': {
+                'total': round(self.duration_total, 3),
+                'avg': round(self.duration_total / self.count, 3),
+                'max': round(self.duration_max, 3),
+                'buckets': self.duration_histogram.to_list(),
+            },
+            'sql': {
+                'statements_total': self.statements_total,
+                'statements_avg': round(self.statements_total / self.count, 3),
+                'statements_max': self.statements_max,
+                'time_ms_total': round(self.sql_time_total, 3),
+                'statement_buckets': self.statement_histogram.to_list(),
+            },
+        }
+
+
+class RequestMetrics:
+    """엔드포인트('METHOD endpoint')별 요청 시간과 SQL 통계를 누적하는 스레드 안전 집계기입니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, key, status_code, duration_ms, statements, sql_time_ms):
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = _EndpointStats()
+            stats.count += 1
+            stats.status_counts[status_code] = stats.status_counts.get(status_code, 0) + 1
+            stats.duration_total += duration_ms
+            stats.duration_max = max(stats.duration_max, duration_ms)
+            stats.duration_histogram.observe(duration_ms)
+            stats.statements_total += statements
+            stats.statements_max = max(stats.statements_max, statements)
+            stats.sql_time_total += sql_time_ms
+            stats.statement_histogram.observe(statements)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: stats.to_dict() for key, stats in sorted(self._endpoints.items())}
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_sql.get() is not None:
+        conn.info.setdefault('instrumentation_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    sql = _current_sql.get()
+    if sql is None:
+        return
+    starts = conn.info.get('instrumentation_start')
+    if starts:
+        sql[0] += 1
+        sql[1] += time.perf_counter() - starts.pop()
+
+
+def _handle_error(exception_context):
+    # 실패한 문장은 after_cursor_execute가 호출되지 않으므로, 쌓아 둔 시작 시각을 여기서 꺼냅니다.
+    conn = exception_context.connection
+    starts = conn.info.get('instrumentation_start') if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+def _start_request():
+    request.environ['instrumentation.start'] = time.perf_counter()
+    _current_sql.set([0, 0.0])
+
+
+def _finish_request(response):
+    start = request.environ.get('instrumentation.start')
+    sql = _current_sql.get()
+    if start is None or sql is None:
+        return response
+    _current_sql.set(None)
+    duration_ms = (time.perf_counter() - start) * 1000
+    statements, sql_time_ms = sql[0], sql[1] * 1000
+    response.headers.add(
+        'Server-Timing', f'app;dur={duration_ms:.2f}, db;dur={sql_time_ms:.2f};desc="{statements} queries"'
+    )
+    key = f'{request.method} {request.endpoint or "<unmatched>"}'
+    request_metrics.record(key, response.status_code, duration_ms, statements, sql_time_ms)
+    return response
+
+
+def init_instrumentation(app, engine):
+    """INSTRUMENTATION_ENABLED이면 app의 요청 측정 훅과 engine의 SQL 측정 이벤트를 등록합니다."""
+    if not app.config.get('INSTRUMENTATION_ENABLED', True):
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
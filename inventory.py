@@ -0,0 +1,82 @@
+from sqlalchemy import case, update
+
+from extensions import db
+from models import Product
+from product_cache import invalidate_product_cache_on_commit
+from table_versions import bump_table_version
+from stock_ledger import record_stock_movements, record_stock_movements_by_reference, record_stock_level_changes
+
+# 재고(Product.stock_quantity) 변경은 파이썬에서 읽고-수정-쓰기 하지 않고
+# 이 모듈의 조건부 UPDATE로 한 번에 반영합니다. 동시에 여러 계산대에서 주문해도
+# 재고가 음수가 되거나 변경분이 유실되지 않습니다. 변경 내역은 같은 트랜잭션에서 재고 원장에 기록됩니다.
+
+def _update_stock(changes):
+    """조건부 UPDATE를 실행하고 실제로 갱신된 상품 ID 집합을 반환합니다."""
+    delta = case(changes, value=Product.id)
+    updated = set(db.session.scalars(
+        update(Product)
+        .where(Product.id.in_(list(changes)), Product.stock_quantity + delta >= 0)
+        .values(stock_quantity=Product.stock_quantity + delta, version_id=Product.version_id + 1)
+        .returning(Product.id)
+        .execution_options(synchronize_session=False)
+    ))
+    # Core UPDATE는 ORM flush를 거치지 않으므로 행 버전(version_id) 증가, 상품 캐시 무효화와
+    # 테이블 버전 갱신을 직접 합니다.
+    invalidate_product_cache_on_commit()
+    bump_table_version('product')
+    return updated
+
+def apply_stock_changes(changes, reason='adjustment', reference_id=None):
+    """{product_id: 증감량}을 하나의 UPDATE 문으로 반영합니다.
+
+    재고가 0 미만이 되거나 존재하지 않는 상품은 갱신하지 않으며, 모든 상품이 갱신되었으면 True를 반환합니다.
+    False가 반환되면 주문처럼 전부 반영되어야 하는 호출자는 트랜잭션을 롤백해야 합니다.
+    reason/reference_id는 재고 원장에 기록됩니다. (예: 'order', 주문 ID)
+    원장에는 실제로 갱신된 상품만 기록하므로, 롤백하지 않고 커밋해도 원장과 재고가 일치합니다.
+    """
+    changes = {product_id: delta for product_id, delta in changes.items() if delta}
+    if not changes:
+        return True
+    updated = _update_stock(changes)
+    record_stock_movements({product_id: changes[product_id] for product_id in updated}, reason, reference_id)
+    return len(updated) == len(changes)
+
+def apply_grouped_stock_changes(changes_by_reference, reason):
+    """{reference_id: {product_id: 증감량}} 여러 건을 상품별로 합산하여 UPDATE 한 번으로 반영합니다.
+
+    매입 여러 건을 한 번에 입고할 때 사용하며, 재고 원장에는 참조(매입)별로 기록합니다.
+    반환값과 원장 기록 방식은 apply_stock_changes와 같습니다.
+    """
+    totals = {}
+    for changes in changes_by_reference.values():
+        for product_id, delta in changes.items():
+            totals[product_id] = totals.get(product_id, 0) + delta
+    totals = {product_id: delta for product_id, delta in totals.items() if delta}
+    updated = _update_stock(totals) if totals else set()
+    record_stock_movements_by_reference({
+        reference_id: {product_id: delta for product_id, delta in changes.items() if product_id in updated}
+        for reference_id, changes in changes_by_reference.items()
+    }, reason)
+    return len(updated) == len(totals)
+
+def set_stock_levels(levels, reason='stocktake', reference_id=None):
+    """{product_id: 새 재고 수량}을 하나의 UPDATE 문으로 반영하고 갱신된 행 수를 반환합니다. (재고 실사용)"""
+    if not levels:
+        return 0
+    record_stock_level_changes(levels, reason, reference_id)
+    result = db.session.execute(
+        update(Product)
+        .where(Product.id.in_(list(levels)))
+        .values(stock_quantity=case(levels, value=Product.id), version_id=Product.version_id + 1)
+        .execution_options(synchronize_session=False)
+    )
+    invalidate_product_cache_on_commit()
+    bump_table_version('product')
+    return result.rowcount
+
+def load_products(product_ids):
+    """상품들을 IN (...) 쿼리 한 번으로 조회하여 {id: Product} 딕셔너리로 반환합니다."""
+    product_ids = set(product_ids)
+    if not product_ids:
+        return {}
+    return {p.id: p for p in Product.query.filter(Product.id.in_(product_ids))}
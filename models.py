@@ -4,6 +4,7 @@ from werkzeug.security import generate_password_hash, check_password_hash
 
 # extensions.py에서 db 객체만 가져옵니다.
 from extensions import db
+from passwords import password_hash_method, needs_rehash
 
 # 모든 모델 클래스 정의는 이 파일에만 존재하게 됩니다.
 class User(UserMixin, db.Model):
@@ -16,28 +17,56 @@ class User(UserMixin, db.Model):
     suppliers = db.relationship('Supplier', backref='user', lazy=True)
     customers = db.relationship('Customer', backref='user', lazy=True)
 
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+    def set_password(self, password, method=None):
+        # 해시 방식/비용은 환경별 설정(PASSWORD_HASH_METHOD)을 따릅니다. (passwords.py 참고)
+        self.password_hash = generate_password_hash(password, method=method or password_hash_method())
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    def password_needs_rehash(self):
+        return needs_rehash(self.password_hash)
+
 class Product(db.Model):
+    # 짧은 검색어의 접두어 검색용 인덱스입니다. (search.py 참고)
+    __table_args__ = (
+        db.Index('ix_product_name', 'name'),
+    )
     id = db.Column(db.String(10), primary_key=True)
     name = db.Column(db.String(80), nullable=False)
     unit = db.Column(db.String(10), nullable=False)
     price = db.Column(db.Integer, nullable=False)
     stock_quantity = db.Column(db.Integer, nullable=False, default=0)
+    # 낙관적 동시성 제어용 버전 번호입니다. ORM UPDATE는 'WHERE version_id = 읽은 값' 조건으로 실행되며,
+    # 그 사이 다른 요청이 행을 바꿨다면 StaleDataError가 발생합니다. (concurrency.py 참고)
+    # 재고를 바꾸는 Core UPDATE도 이 값을 1 증가시켜야 합니다.
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
+    __mapper_args__ = {'version_id_col': version_id}
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'unit': self.unit,
+            'price': self.price,
+            'stock_quantity': self.stock_quantity,
+            'version': self.version_id
+        }
 
 class Customer(db.Model):
+    __table_args__ = (
+        db.Index('ix_customer_user_id_name', 'user_id', 'name'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(80), nullable=False)
     phone_number = db.Column(db.String(20), nullable=True)
     address = db.Column(db.String(200), nullable=True)
     receivable_balance = db.Column(db.Integer, nullable=False, default=0)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
     orders = db.relationship('Order', backref='customer', lazy=True)
     payment_transactions = db.relationship('PaymentTransaction', backref='customer', lazy=True)
+    __mapper_args__ = {'version_id_col': version_id}
 
     def to_dict(self):
         return {
@@ -45,10 +74,18 @@ class Customer(db.Model):
             'name': self.name,
             'phone_number': self.phone_number,
             'address': self.address,
-            'receivable_balance': self.receivable_balance
+            'receivable_balance': self.receivable_balance,
+            'version': self.version_id
         }
 
 class Order(db.Model):
+    # 사용자별 기간 조회/매출 집계가 원본 order_date 범위 조건으로 인덱스를 탈 수 있도록 합니다.
+    __table_args__ = (
+        db.Index('ix_order_user_id_order_date', 'user_id', 'order_date'),
+        db.Index('ix_order_user_id_status_order_date', 'user_id', 'status', 'order_date'),
+        # 거래처 삭제 가능 여부(EXISTS) 확인 등 거래처별 주문 조회용 외래 키 인덱스입니다.
+        db.Index('ix_order_customer_id', 'customer_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     order_date = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
     total_amount = db.Column(db.Integer, nullable=False)
@@ -56,9 +93,30 @@ class Order(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=True)
     status = db.Column(db.String(20), nullable=False, default='completed')
+    version_id = db.Column(db.Integer, nullable=False, server_default='1')
     items = db.relationship('OrderItem', backref='order', lazy=True, cascade="all, delete-orphan")
+    __mapper_args__ = {'version_id_col': version_id}
+
+    def to_dict(self):
+        # customer, items, items.product 관계를 사용하므로 목록 조회 시에는 eager loading과 함께 호출해야 합니다.
+        return {
+            'id': self.id,
+            'order_date': self.order_date.isoformat(),
+            'total_amount': self.total_amount,
+            'customer_id': self.customer_id,
+            'customer_name': self.customer.name if self.customer else None,
+            'status': self.status,
+            'payment_method': self.payment_method,
+            'version': self.version_id,
+            'items': [item.to_dict() for item in self.items]
+        }
 
 class OrderItem(db.Model):
+    # 주문별 항목 조회와 상품별 매출 집계용 인덱스입니다. 집계에 필요한 컬럼을 모두 포함하므로
+    # 상품별 판매 순위 쿼리는 order_item 테이블을 읽지 않고 인덱스만으로 계산됩니다.
+    __table_args__ = (
+        db.Index('ix_order_item_order_id_product_id_quantity_price', 'order_id', 'product_id', 'quantity', 'price_per_unit'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
     product_id = db.Column(db.String(10), db.ForeignKey('product.id'), nullable=False)
@@ -66,7 +124,65 @@ class OrderItem(db.Model):
     price_per_unit = db.Column(db.Integer, nullable=False)
     product = db.relationship('Product')
 
+    def to_dict(self):
+        return {
+            'product_id': self.product_id,
+            'product_name': self.product.name,
+            'quantity': self.quantity,
+            'price_per_unit': self.price_per_unit
+        }
+
+class DailySalesRollup(db.Model):
+    # 완료된 주문의 매출을 (사용자, 날짜, 결제수단)별로 미리 합산해 둔 집계 테이블입니다.
+    # sales_rollup 모듈이 주문 생성/취소와 같은 트랜잭션 안에서 갱신합니다.
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    payment_method = db.Column(db.String(20), primary_key=True)
+    total_sales = db.Column(db.Integer, nullable=False, default=0)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+
+class StockMovement(db.Model):
+    # 재고 변경 원장입니다. 재고가 바뀔 때마다 한 행씩 추가만 하며 수정/삭제하지 않습니다. (stock_ledger 모듈 참고)
+    # 상품이 삭제되어도 이력은 남겨야 하므로 product_id에 외래 키를 걸지 않습니다.
+    __table_args__ = (
+        db.Index('ix_stock_movement_product_id_created_at', 'product_id', 'created_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.String(10), nullable=False)
+    quantity_change = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(20), nullable=False)
+    reference_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'product_id': self.product_id,
+            'quantity_change': self.quantity_change,
+            'reason': self.reason,
+            'reference_id': self.reference_id,
+            'created_at': self.created_at.isoformat()
+        }
+
+class StockSnapshot(db.Model):
+    # 주기적으로 기록하는 상품별 재고 스냅샷입니다. 특정 시점의 재고는 직전 스냅샷 + 이후 원장 합계로 계산합니다.
+    product_id = db.Column(db.String(10), primary_key=True)
+    taken_at = db.Column(db.DateTime, primary_key=True)
+    stock_quantity = db.Column(db.Integer, nullable=False)
+    # 스냅샷을 기록한 문장에서 읽은 원장의 마지막 id입니다. 이후 원장은 이 id보다 큰 행만 더합니다.
+    last_movement_id = db.Column(db.Integer)
+
+class TableVersion(db.Model):
+    # 테이블별 변경 버전 번호입니다. 목록 API의 ETag 계산에 사용하며 table_versions 모듈이 갱신합니다.
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
 class PaymentTransaction(db.Model):
+    # 거래처별 수금 내역을 최신순으로 페이지 단위 조회할 때 사용하는 인덱스입니다.
+    # customer_id가 첫 컬럼이므로 거래처 삭제 가능 여부(EXISTS) 확인에도 사용됩니다.
+    __table_args__ = (
+        db.Index('ix_payment_transaction_customer_id_transaction_date', 'customer_id', 'transaction_date'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     transaction_date = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
     customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
@@ -75,6 +191,21 @@ class PaymentTransaction(db.Model):
     notes = db.Column(db.String(200), nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+class ReceivableEntry(db.Model):
+    # 미수금 원장입니다. 외상 판매(+), 수금(-), 외상 주문 취소(-)를 한 테이블에 기록하며 수정/삭제하지 않습니다.
+    # 거래처별 합계는 Customer.receivable_balance와 같습니다. (receivables 모듈 참고)
+    __table_args__ = (
+        db.Index('ix_receivable_entry_customer_id_entry_date', 'customer_id', 'entry_date'),
+        db.Index('ix_receivable_entry_user_id_entry_date', 'user_id', 'entry_date'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    entry_date = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    amount = db.Column(db.Integer, nullable=False)
+    entry_type = db.Column(db.String(20), nullable=False)
+    reference_id = db.Column(db.Integer, nullable=True)
+
 class Supplier(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(80), unique=True, nullable=False)
@@ -84,6 +215,12 @@ class Supplier(db.Model):
     purchase_orders = db.relationship('PurchaseOrder', backref='supplier', lazy=True)
 
 class PurchaseOrder(db.Model):
+    # 공급처 삭제 가능 여부(EXISTS) 확인 등 공급처별 매입 조회용 외래 키 인덱스와,
+    # 사용자별 매입 내역을 기간 조건/최신순 페이지로 조회하기 위한 인덱스입니다.
+    __table_args__ = (
+        db.Index('ix_purchase_order_supplier_id', 'supplier_id'),
+        db.Index('ix_purchase_order_user_id_purchase_date', 'user_id', 'purchase_date'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     purchase_date = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
     supplier_id = db.Column(db.Integer, db.ForeignKey('supplier.id'), nullable=True)
@@ -91,6 +228,18 @@ class PurchaseOrder(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     items = db.relationship('PurchaseOrderItem', backref='purchase_order', lazy=True, cascade="all, delete-orphan")
 
+    def to_dict(self, include_items=False):
+        # supplier 관계(include_items면 items, items.product도)를 사용하므로 목록 조회 시에는 eager loading과 함께 호출해야 합니다.
+        data = {
+            'id': self.id,
+            'purchase_date': self.purchase_date.isoformat(),
+            'supplier_name': self.supplier.name if self.supplier else 'N/A',
+            'total_cost': self.total_cost
+        }
+        if include_items:
+            data['items'] = [item.to_dict() for item in self.items]
+        return data
+
 class PurchaseOrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     purchase_order_id = db.Column(db.Integer, db.ForeignKey('purchase_order.id'), nullable=False)
@@ -98,3 +247,11 @@ class PurchaseOrderItem(db.Model):
     quantity = db.Column(db.Integer, nullable=False)
     cost_per_unit = db.Column(db.Integer, nullable=False)
     product = db.relationship('Product')
+
+    def to_dict(self):
+        return {
+            'product_id': self.product_id,
+            'product_name': self.product.name,
+            'quantity': self.quantity,
+            'cost_per_unit': self.cost_per_unit
+        }
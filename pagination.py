@@ -0,0 +1,68 @@
+import base64
+import datetime
+
+from sqlalchemy import and_, or_
+
+# (날짜, id) 내림차순 목록의 커서 기반(keyset) 페이지네이션 도우미입니다.
+# OFFSET과 달리 앞 페이지를 건너뛰며 읽지 않으므로, (소유자, 날짜) 인덱스가 있으면 페이지 위치와 관계없이 빠릅니다.
+# 목록 API는 paginate()를 사용하며, limit/after 파라미터가 없으면 기존처럼 전체 목록을 반환합니다.
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(timestamp, row_id):
+    """(날짜, id) 정렬 키를 URL에 안전한 불투명 커서 문자열로 변환합니다."""
+    raw = f'{timestamp.isoformat()}|{row_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """encode_cursor()로 만든 커서를 (날짜, id) 튜플로 되돌립니다. 잘못된 값이면 ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_str, row_id = raw.rsplit('|', 1)
+        return datetime.datetime.fromisoformat(date_str), int(row_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError('Invalid cursor.') from e
+
+
+def parse_limit(limit_str, max_size=MAX_PAGE_SIZE):
+    """limit 파라미터를 검사합니다. 생략하면 max_size이며, 잘못된 값이면 ValueError."""
+    try:
+        limit = int(limit_str) if limit_str is not None else max_size
+    except ValueError:
+        raise ValueError('Limit must be an integer')
+    if not 1 <= limit <= max_size:
+        raise ValueError(f'Limit must be between 1 and {max_size}')
+    return limit
+
+
+def before_cursor(date_column, id_column, cursor):
+    """(date_column, id_column) 내림차순 정렬에서 커서 다음 행들만 남기는 조건식을 만듭니다."""
+    after_date, after_id = decode_cursor(cursor)
+    return or_(date_column < after_date, and_(date_column == after_date, id_column < after_id))
+
+
+def paginate(query, date_column, id_column, args, serialize, items_key, cursor_row=None, max_size=MAX_PAGE_SIZE):
+    """(date_column, id_column) 내림차순으로 정렬된 query에 요청 파라미터(limit, after)의 페이지네이션을 적용합니다.
+
+    파라미터가 없으면 serialize한 전체 목록을, 있으면 {items_key: [...], 'next_cursor': 커서 또는 None}을 반환합니다.
+    cursor_row는 결과 행에서 정렬 키를 가진 ORM 객체를 꺼내는 함수입니다. (추가 컬럼을 조회하는 경우)
+    limit/after가 잘못되었으면 ValueError를 발생시킵니다.
+    """
+    limit_str = args.get('limit')
+    after = args.get('after')
+    if limit_str is None and after is None:
+        return [serialize(row) for row in query.all()]
+
+    limit = parse_limit(limit_str, max_size)
+    if after:
+        query = query.filter(before_cursor(date_column, id_column, after))
+
+    # 한 건 더 조회해서 다음 페이지 존재 여부를 판단합니다.
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = cursor_row(rows[-1]) if cursor_row else rows[-1]
+        next_cursor = encode_cursor(getattr(last, date_column.key), getattr(last, id_column.key))
+    return {items_key: [serialize(row) for row in rows], 'next_cursor': next_cursor}
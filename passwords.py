@@ -0,0 +1,56 @@
+import contextlib
+import functools
+import threading
+
+from flask import current_app
+from werkzeug.security import generate_password_hash
+
+# 비밀번호 해시 방식/비용과 로그인 시 해시 계산의 동시 실행 수 제한입니다.
+#  - PASSWORD_HASH_METHOD는 werkzeug 형식('scrypt:32768:8:1', 'pbkdf2:sha256:600000' 등)이며 환경별로 설정합니다.
+#    저장된 해시의 방식/비용이 설정과 다르면 로그인에 성공할 때 새 설정으로 다시 해시합니다.
+#  - 해시 계산은 의도적으로 CPU를 많이 쓰므로, 교대 시작 시 로그인이 몰려도 판매 요청이 밀리지 않도록
+#    프로세스당 동시에 계산하는 수를 LOGIN_MAX_CONCURRENT_HASHES로 제한합니다.
+#    LOGIN_HASH_WAIT_TIMEOUT(초) 안에 차례가 오지 않으면 PasswordHashBusy를 발생시킵니다.
+DEFAULT_HASH_METHOD = 'scrypt'
+
+_hash_slots = threading.BoundedSemaphore(2)
+_wait_timeout = 5
+
+
+class PasswordHashBusy(RuntimeError):
+    """동시 해시 계산 수가 한도에 도달하여 대기 시간 안에 차례가 오지 않았습니다."""
+
+
+def init_password_hashing(app):
+    global _hash_slots, _wait_timeout
+    _hash_slots = threading.BoundedSemaphore(app.config.get('LOGIN_MAX_CONCURRENT_HASHES', 2))
+    _wait_timeout = app.config.get('LOGIN_HASH_WAIT_TIMEOUT', 5)
+
+
+def password_hash_method():
+    """현재 앱 설정의 비밀번호 해시 방식을 반환합니다."""
+    return current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+
+
+@functools.lru_cache(maxsize=8)
+def _stored_method(method):
+    # 'scrypt'처럼 비용을 생략한 설정은 werkzeug가 기본 비용을 붙여 저장하므로('scrypt:32768:8:1'),
+    # 빈 문자열을 한 번 해시하여 실제로 저장되는 방식 문자열을 구합니다.
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+
+def needs_rehash(password_hash, method=None):
+    """저장된 해시의 방식/비용이 설정(method, 생략하면 현재 앱 설정)과 다르면 True를 반환합니다."""
+    return password_hash.split('$', 1)[0] != _stored_method(method or password_hash_method())
+
+
+@contextlib.contextmanager
+def hash_slot():
+    """해시 계산 한 건의 실행 슬롯을 얻습니다. 대기 시간 안에 얻지 못하면 PasswordHashBusy."""
+    slots = _hash_slots
+    if not slots.acquire(timeout=_wait_timeout):
+        raise PasswordHashBusy('Too many concurrent logins. Please try again shortly.')
+    try:
+        yield
+    finally:
+        slots.release()
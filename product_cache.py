@@ -0,0 +1,55 @@
+from sqlalchemy import event
+
+from cache import TTLCache
+from extensions import db
+from models import Product
+from table_versions import current_table_version
+
+# 상품 목록(/api/products)과 단가(/api/price) 응답에 쓰이는 직렬화된 상품 정보를 캐시합니다.
+# 상품이 추가/수정/삭제되거나 재고가 바뀌면 해당 트랜잭션이 커밋될 때 캐시 전체를 비웁니다.
+# (커밋 전에 비우면 다른 요청이 커밋 이전 값을 다시 캐시할 수 있습니다.)
+# 목록은 ETag와 같은 DB 테이블 버전을 키에 포함하므로, 다른 워커 프로세스의 상품 변경 후에도
+# 새 ETag에 이전 목록이 실리지 않습니다. 단가 조회는 다른 프로세스의 변경이 최대 TTL만큼 늦게 반영됩니다.
+product_cache = TTLCache()
+
+_INVALIDATE_KEY = 'invalidate_product_cache'
+
+
+def init_product_cache(app):
+    product_cache.configure(
+        ttl=app.config.get('PRODUCT_CACHE_TTL', 30),
+        max_entries=app.config.get('PRODUCT_CACHE_MAX_ENTRIES', 256)
+    )
+
+
+def invalidate_product_cache_on_commit(session=None):
+    """현재 트랜잭션이 커밋되면 상품 캐시를 비우도록 표시합니다. (Core UPDATE 등 ORM 밖의 변경용)"""
+    (session or db.session).info[_INVALIDATE_KEY] = True
+
+
+def cached_product_list(search_term, loader):
+    return product_cache.get_or_load(('list', current_table_version('product'), search_term), loader)
+
+
+def cached_product(product_id, loader):
+    return product_cache.get_or_load(('product', product_id), loader)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _mark_product_changes(session, flush_context):
+    # API 핸들러(POST/PUT/DELETE)를 포함해 ORM으로 Product를 변경하면 자동으로 무효화 대상이 됩니다.
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Product):
+            session.info[_INVALIDATE_KEY] = True
+            return
+
+
+@event.listens_for(db.session, 'after_commit')
+def _clear_after_commit(session):
+    if session.info.pop(_INVALIDATE_KEY, False):
+        product_cache.clear()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop(_INVALIDATE_KEY, None)
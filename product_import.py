@@ -0,0 +1,140 @@
+import csv
+import io
+import json
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from extensions import db
+from models import Product
+from upsert import dialect_insert
+from product_cache import invalidate_product_cache_on_commit
+from table_versions import bump_table_version
+from stock_ledger import record_stock_movements, record_stock_level_changes
+
+# 상품 대량 등록/수정(upsert)입니다. 파일을 한 줄씩 읽어 chunk_size 단위로 모은 뒤
+# chunk마다 executemany 한 번과 커밋 한 번으로 반영합니다. 잘못된 행은 건너뛰고 오류 목록에 기록합니다.
+DEFAULT_CHUNK_SIZE = 1000
+# chunk 하나는 메모리에 모은 뒤 한 트랜잭션으로 쓰므로, 요청으로 받은 chunk_size는 이 값으로 제한합니다.
+MAX_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+REQUIRED_FIELDS = ('id', 'name', 'unit', 'price')
+
+
+def iter_rows(stream, fmt):
+    """바이너리 스트림에서 (줄 번호, 행 딕셔너리)를 하나씩 읽습니다. fmt는 'csv' 또는 'jsonl'입니다."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_num, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line_num, None
+                continue
+            yield line_num, row
+    else:
+        raise ValueError(f"Unsupported import format '{fmt}'. Use 'csv' or 'jsonl'.")
+
+
+def validate_row(row):
+    """행을 검사하여 Product 컬럼 딕셔너리로 변환합니다. 잘못된 행이면 ValueError를 발생시킵니다."""
+    if not isinstance(row, dict):
+        raise ValueError('Invalid row format')
+    missing = [f for f in REQUIRED_FIELDS if row.get(f) in (None, '')]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+    product_id = str(row['id']).strip()
+    if len(product_id) > 10:
+        raise ValueError('Product ID must be at most 10 characters')
+    try:
+        values = {'id': product_id, 'name': str(row['name']).strip(), 'unit': str(row['unit']).strip(),
+                  'price': int(row['price'])}
+        if row.get('stock_quantity') not in (None, ''):
+            values['stock_quantity'] = int(row['stock_quantity'])
+    except (TypeError, ValueError):
+        raise ValueError('price and stock_quantity must be integers')
+    return values
+
+
+def _upsert_statement(dialect_name, with_stock):
+    stmt = dialect_insert(dialect_name, Product.__table__)
+    columns = ['name', 'unit', 'price'] + (['stock_quantity'] if with_stock else [])
+    return stmt.on_conflict_do_update(
+        index_elements=['id'],
+        set_={**{c: stmt.excluded[c] for c in columns}, 'version_id': Product.__table__.c.version_id + 1}
+    )
+
+
+def _write_chunk(rows):
+    # 재고가 주어진 행과 주어지지 않은 행(기존 재고 유지, 신규는 0)을 나누어 각각 executemany 합니다.
+    dialect_name = db.session.get_bind().dialect.name
+    with_stock = [r for _, r in rows if 'stock_quantity' in r]
+    without_stock = [dict(r, stock_quantity=0) for _, r in rows if 'stock_quantity' not in r]
+    if with_stock:
+        # 재고 원장: 기존 상품은 현재 재고와의 차이를, 새 상품은 입력 재고 전체를 기록합니다.
+        levels = {r['id']: r['stock_quantity'] for r in with_stock}
+        existing = set(db.session.scalars(select(Product.id).where(Product.id.in_(list(levels)))))
+        record_stock_level_changes({pid: q for pid, q in levels.items() if pid in existing}, 'import')
+        record_stock_movements({pid: q for pid, q in levels.items() if pid not in existing}, 'import')
+        db.session.execute(_upsert_statement(dialect_name, True), with_stock)
+    if without_stock:
+        db.session.execute(_upsert_statement(dialect_name, False), without_stock)
+    invalidate_product_cache_on_commit()
+    bump_table_version('product')
+    db.session.commit()
+
+
+def import_products(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """(줄 번호, 행) 이터러블을 chunk 단위로 upsert하고 결과 요약을 반환합니다. chunk_size는 MAX_CHUNK_SIZE를 넘지 않습니다."""
+    chunk_size = min(chunk_size, MAX_CHUNK_SIZE)
+    summary = {'processed': 0, 'upserted': 0, 'error_count': 0, 'errors': []}
+
+    def record_error(line, message):
+        summary['error_count'] += 1
+        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+            summary['errors'].append({'line': line, 'error': message})
+
+    def flush(chunk):
+        try:
+            _write_chunk(chunk)
+            summary['upserted'] += len(chunk)
+        except SQLAlchemyError:
+            # chunk 중 DB 제약조건을 위반한 행이 있으면 한 행씩 다시 시도하여 해당 행만 오류로 기록합니다.
+            db.session.rollback()
+            for line, values in chunk:
+                try:
+                    _write_chunk([(line, values)])
+                    summary['upserted'] += 1
+                except SQLAlchemyError as e:
+                    db.session.rollback()
+                    record_error(line, f'Database error: {e.orig if hasattr(e, "orig") else e}')
+
+    chunk = []
+    for line, row in rows:
+        summary['processed'] += 1
+        try:
+            chunk.append((line, validate_row(row)))
+        except ValueError as e:
+            record_error(line, str(e))
+            continue
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+    return summary
+
+
+def detect_format(filename=None, content_type=None):
+    """파일 이름 또는 Content-Type으로 가져오기 형식을 추정합니다."""
+    name = (filename or '').lower()
+    content_type = (content_type or '').lower()
+    if name.endswith(('.jsonl', '.ndjson')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'jsonl'
+    return 'csv'
@@ -0,0 +1,145 @@
+import csv
+import datetime
+import io
+
+from sqlalchemy import insert, select
+
+from extensions import db
+from models import Product, Supplier, PurchaseOrder, PurchaseOrderItem
+from inventory import apply_grouped_stock_changes
+
+# 매입(입고) 기록입니다. 매입 한 건(POST /api/purchases)과 거래명세서/EDI 파일의 여러 건
+# (POST /api/purchases/batch)을 같은 경로로 처리합니다.
+#  - 상품/공급처는 각각 IN (...) 쿼리 한 번으로 확인합니다.
+#  - 매입과 매입 항목은 executemany로 일괄 삽입합니다.
+#  - 재고는 상품별로 합산한 UPDATE 한 번으로 증가시키고, 재고 원장에는 매입별로 기록합니다.
+# 검증 오류가 하나라도 있으면 아무것도 쓰지 않습니다. 커밋/롤백은 호출자가 합니다.
+CSV_COLUMNS = ('purchase_ref', 'supplier_id', 'purchase_date', 'product_id', 'quantity', 'cost_per_unit')
+
+
+class PurchaseValidationError(ValueError):
+    """매입 데이터 검증 실패. errors는 [{'index', 'error'}] 목록이며 index는 매입 순번(0부터)입니다."""
+
+    def __init__(self, errors):
+        super().__init__(errors[0]['error'])
+        self.errors = errors
+
+
+def _normalize(purchase, product_ids, supplier_ids):
+    """매입 하나를 검사하여 (PurchaseOrder 컬럼, 항목 목록)으로 변환합니다. 잘못되었으면 ValueError."""
+    if not isinstance(purchase, dict) or not isinstance(purchase.get('items'), list):
+        raise ValueError('Purchase items are required')
+    supplier_id = purchase.get('supplier_id')
+    if supplier_id is not None and supplier_id not in supplier_ids:
+        raise ValueError(f'Supplier with ID {supplier_id} not found.')
+    purchase_date = purchase.get('purchase_date')
+    if purchase_date:
+        try:
+            purchase_date = datetime.datetime.fromisoformat(purchase_date)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid purchase_date. Please use ISO format (YYYY-MM-DD).')
+
+    items = []
+    for item in purchase['items']:
+        if not isinstance(item, dict):
+            raise ValueError('Invalid item format')
+        missing = [f for f in ('product_id', 'quantity', 'cost_per_unit') if item.get(f) in (None, '')]
+        if missing:
+            raise ValueError(f"Missing required fields: {', '.join(missing)}")
+        if item['product_id'] not in product_ids:
+            raise ValueError(f"Product with ID {item['product_id']} not found.")
+        try:
+            quantity, cost_per_unit = int(item['quantity']), int(item['cost_per_unit'])
+        except (TypeError, ValueError):
+            raise ValueError('quantity and cost_per_unit must be integers')
+        if quantity <= 0 or cost_per_unit < 0:
+            raise ValueError('quantity must be positive and cost_per_unit must not be negative')
+        items.append({'product_id': item['product_id'], 'quantity': quantity, 'cost_per_unit': cost_per_unit})
+
+    order = {
+        'supplier_id': supplier_id,
+        'total_cost': sum(i['quantity'] * i['cost_per_unit'] for i in items),
+        'purchase_date': purchase_date or None,
+    }
+    return order, items
+
+
+def record_purchases(purchases, user_id):
+    """매입 목록을 검증한 뒤 한 트랜잭션 안에서 일괄 기록하고, 생성된 매입 ID 목록을 입력 순서대로 반환합니다.
+
+    검증에 실패하면 PurchaseValidationError를 발생시키며 아무것도 쓰지 않습니다.
+    """
+    requested_products, requested_suppliers = set(), set()
+    for purchase in purchases:
+        if isinstance(purchase, dict):
+            requested_suppliers.add(purchase.get('supplier_id'))
+            for item in purchase.get('items') or []:
+                if isinstance(item, dict):
+                    requested_products.add(item.get('product_id'))
+    product_ids = set(db.session.scalars(select(Product.id).where(Product.id.in_(requested_products - {None}))))
+    supplier_ids = set(db.session.scalars(select(Supplier.id).where(
+        Supplier.id.in_(requested_suppliers - {None}), Supplier.user_id == user_id)))
+
+    normalized, errors = [], []
+    for index, purchase in enumerate(purchases):
+        try:
+            normalized.append(_normalize(purchase, product_ids, supplier_ids))
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+    if errors:
+        raise PurchaseValidationError(errors)
+    if not normalized:
+        return []
+
+    now = datetime.datetime.utcnow()
+    purchase_ids = db.session.scalars(
+        insert(PurchaseOrder).returning(PurchaseOrder.id, sort_by_parameter_order=True),
+        [dict(order, purchase_date=order['purchase_date'] or now, user_id=user_id) for order, _ in normalized]
+    ).all()
+
+    item_rows, restock = [], {}
+    for purchase_id, (_, items) in zip(purchase_ids, normalized):
+        changes = restock.setdefault(purchase_id, {})
+        for item in items:
+            item_rows.append(dict(item, purchase_order_id=purchase_id))
+            changes[item['product_id']] = changes.get(item['product_id'], 0) + item['quantity']
+    if item_rows:
+        db.session.execute(insert(PurchaseOrderItem), item_rows)
+    # 입고 수량은 양수이므로 조건부 UPDATE가 실패하는 경우는 없지만, 반환값은 그대로 확인합니다.
+    if not apply_grouped_stock_changes(restock, reason='purchase'):
+        raise PurchaseValidationError([{'index': None, 'error': 'Stock cannot go below zero'}])
+    return purchase_ids
+
+
+def purchases_from_csv(stream):
+    """거래명세서 CSV(CSV_COLUMNS 헤더)를 purchase_ref별로 묶어 매입 목록으로 변환합니다.
+
+    UTF-8이 아니거나(엑셀 기본 CP949 저장 등) CSV 형식이 깨진 파일은 ValueError를 발생시킵니다.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    try:
+        return _group_csv_rows(reader)
+    except UnicodeDecodeError:
+        raise ValueError('CSV file must be UTF-8 encoded. Save it as "CSV UTF-8" and try again.') from None
+    except csv.Error as e:
+        raise ValueError(f'Invalid CSV after line {reader.line_num}: {e}') from None
+
+
+def _group_csv_rows(reader):
+    purchases = {}
+    for row in reader:
+        ref = (row.get('purchase_ref') or '').strip()
+        purchase = purchases.get(ref)
+        if purchase is None:
+            supplier_id = (row.get('supplier_id') or '').strip()
+            purchase = purchases[ref] = {
+                'supplier_id': int(supplier_id) if supplier_id.isdigit() else (supplier_id or None),
+                'purchase_date': (row.get('purchase_date') or '').strip() or None,
+                'items': [],
+            }
+        purchase['items'].append({
+            'product_id': (row.get('product_id') or '').strip(),
+            'quantity': row.get('quantity'),
+            'cost_per_unit': row.get('cost_per_unit'),
+        })
+    return list(purchases.values())
@@ -0,0 +1,94 @@
+import datetime
+
+from sqlalchemy import case, func, insert, select, update
+
+from extensions import db
+from models import Customer, ReceivableEntry
+from table_versions import bump_table_version
+
+# 거래처 미수금(Customer.receivable_balance) 변경은 파이썬에서 읽고-수정-쓰기 하지 않고
+# 이 모듈의 'receivable_balance = receivable_balance + :amount' UPDATE로 반영합니다.
+# 동시에 여러 계산대에서 외상 판매/수금을 해도 변경분이 유실되지 않으며,
+# 모든 변경은 같은 트랜잭션에서 미수금 원장(ReceivableEntry)에 기록됩니다.
+
+# 미수금 연령 구간: (이름, 경과 일수 하한, 상한). 상한이 None이면 제한 없음
+AGING_BUCKETS = (('current', 0, 30), ('days_31_60', 30, 60), ('days_61_90', 60, 90), ('over_90', 90, None))
+
+
+def apply_receivable_change(customer_id, user_id, amount, entry_type, reference_id=None):
+    """거래처 미수금을 amount만큼 원자적으로 증감하고 원장에 기록합니다.
+
+    거래처가 없거나 user_id의 거래처가 아니면 None을, 아니면 변경 후 잔액을 반환합니다.
+    """
+    balance = db.session.execute(
+        update(Customer)
+        .where(Customer.id == customer_id, Customer.user_id == user_id)
+        .values(receivable_balance=Customer.receivable_balance + amount, version_id=Customer.version_id + 1)
+        .returning(Customer.receivable_balance)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if balance is None:
+        return None
+    db.session.execute(insert(ReceivableEntry), [{
+        'customer_id': customer_id, 'user_id': user_id, 'amount': amount,
+        'entry_type': entry_type, 'reference_id': reference_id, 'entry_date': datetime.datetime.utcnow(),
+    }])
+    # Core UPDATE는 ORM flush를 거치지 않으므로 거래처 목록 ETag용 테이블 버전을 직접 올립니다.
+    bump_table_version('customer')
+    return balance
+
+
+def running_balance_subquery(customer_id):
+    """거래처 미수금 원장의 각 항목이 반영된 직후의 잔액을 윈도 함수(누적 합계)로 계산하는 서브쿼리입니다."""
+    e = ReceivableEntry
+    return (
+        select(e.entry_type, e.reference_id,
+               func.sum(e.amount).over(order_by=(e.entry_date, e.id)).label('running_balance'))
+        .where(e.customer_id == customer_id)
+        .subquery()
+    )
+
+
+def aging_report_query(user_id, as_of):
+    """as_of 시점의 거래처별 미수금을 경과 기간(30/60/90일) 구간으로 나눈 집계 쿼리를 만듭니다.
+
+    수금은 가장 오래된 외상부터 갚는 것으로 보고(선입선출), 남은 잔액을 가장 최근 외상부터 채워서 배분합니다.
+    원장 한 번 조회에 윈도 함수와 GROUP BY를 사용하므로 거래처/주문 수와 관계없이 쿼리 한 번입니다.
+    """
+    e = ReceivableEntry
+    entries = (
+        select(
+            e.customer_id, e.entry_date, e.amount,
+            func.sum(e.amount).over(partition_by=e.customer_id).label('balance'),
+            # 자신을 포함하여 자신보다 최근인 외상(+) 금액의 누적 합계
+            func.sum(case((e.amount > 0, e.amount), else_=0)).over(
+                partition_by=e.customer_id, order_by=(e.entry_date.desc(), e.id.desc())
+            ).label('newer_charges'),
+        )
+        .where(e.user_id == user_id, e.entry_date <= as_of)
+        .subquery()
+    )
+    # 이 외상보다 최근 외상들이 잔액을 먼저 채우고 남은 금액이 이 외상의 미수금입니다. (0 ~ 외상 금액)
+    remaining = entries.c.balance - (entries.c.newer_charges - entries.c.amount)
+    outstanding = case((remaining <= 0, 0), (remaining >= entries.c.amount, entries.c.amount), else_=remaining)
+
+    columns = []
+    for name, min_days, max_days in AGING_BUCKETS:
+        in_bucket = entries.c.entry_date <= as_of - datetime.timedelta(days=min_days)
+        if max_days is not None:
+            in_bucket = in_bucket & (entries.c.entry_date > as_of - datetime.timedelta(days=max_days))
+        columns.append(func.sum(case((in_bucket, outstanding), else_=0)).label(name))
+
+    return (
+        select(Customer.id.label('customer_id'), Customer.name, func.sum(outstanding).label('balance'), *columns)
+        .join(entries, entries.c.customer_id == Customer.id)
+        .where(entries.c.amount > 0)
+        .group_by(Customer.id, Customer.name)
+        .having(func.sum(outstanding) > 0)
+        .order_by(Customer.name)
+    )
+
+
+def aging_report(user_id, as_of):
+    """aging_report_query의 결과를 딕셔너리 목록으로 반환합니다."""
+    return [dict(row._mapping) for row in db.session.execute(aging_report_query(user_id, as_of))]
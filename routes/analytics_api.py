@@ -0,0 +1,76 @@
+import datetime
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+
+from sales_analytics import (
+    top_products, sales_by_customer, sales_by_payment_method,
+    TOP_PRODUCT_METRICS, DEFAULT_TOP_LIMIT, MAX_TOP_LIMIT,
+)
+from pagination import parse_limit
+from table_versions import conditional_json
+
+analytics_bp = Blueprint('analytics_bp', __name__, url_prefix='/api/analytics')
+
+def _date_range_args():
+    """start_date/end_date(YYYY-MM-DD, 양 끝 포함, 생략 가능)를 읽습니다. 잘못된 값이면 ValueError."""
+    start_date_str = request.args.get('start_date')
+    end_date_str = request.args.get('end_date')
+    try:
+        start_date = datetime.datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
+        end_date = datetime.datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
+    except ValueError:
+        raise ValueError('Invalid date format. Please use YYYY-MM-DD.')
+    if start_date and end_date and start_date > end_date:
+        raise ValueError('start_date must not be after end_date.')
+    return start_date, end_date
+
+def _range_response(start_date, end_date, key, rows):
+    return {
+        'start_date': start_date.isoformat() if start_date else None,
+        'end_date': end_date.isoformat() if end_date else None,
+        key: rows,
+    }
+
+# 모든 응답은 주문 테이블 버전 기반 ETag를 사용하므로, 새 주문이 없으면 304로 응답합니다.
+
+@analytics_bp.route('/top-products', methods=['GET'])
+@login_required
+def get_top_products():
+    """판매 수량(by=quantity, 기본) 또는 매출액(by=revenue) 상위 상품을 반환합니다."""
+    by = request.args.get('by', 'quantity')
+    if by not in TOP_PRODUCT_METRICS:
+        return jsonify({'error': f"by must be one of: {', '.join(TOP_PRODUCT_METRICS)}"}), 400
+    try:
+        start_date, end_date = _date_range_args()
+        limit = parse_limit(request.args.get('limit') or str(DEFAULT_TOP_LIMIT), MAX_TOP_LIMIT)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    def load():
+        rows = top_products(current_user.id, start_date, end_date, by, limit)
+        return dict(_range_response(start_date, end_date, 'products', rows), by=by)
+    return conditional_json('order', load, scope=current_user.id)
+
+@analytics_bp.route('/sales-by-payment-method', methods=['GET'])
+@login_required
+def get_sales_by_payment_method():
+    """결제수단별 주문 수와 매출액을 반환합니다."""
+    try:
+        start_date, end_date = _date_range_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return conditional_json('order', lambda: _range_response(
+        start_date, end_date, 'payment_methods', sales_by_payment_method(current_user.id, start_date, end_date)
+    ), scope=current_user.id)
+
+@analytics_bp.route('/sales-by-customer', methods=['GET'])
+@login_required
+def get_sales_by_customer():
+    """거래처별 주문 수와 매출액을 매출액 순으로 반환합니다. 거래처 없는 판매는 customer_id가 null인 항목입니다."""
+    try:
+        start_date, end_date = _date_range_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return conditional_json('order', lambda: _range_response(
+        start_date, end_date, 'customers', sales_by_customer(current_user.id, start_date, end_date)
+    ), scope=current_user.id)
@@ -4,9 +4,14 @@ from flask_login import login_user, logout_user, login_required, current_user
 # 이 부분이 이제 안전하게 작동합니다.
 from extensions import db
 from models import User
+from user_cache import remember_user
+from passwords import hash_slot, PasswordHashBusy
 
 auth_bp = Blueprint('auth_bp', __name__, url_prefix='/api/auth')
 
+def _busy_response(error):
+    return jsonify({'error': str(error)}), 503, {'Retry-After': '1'}
+
 @auth_bp.route('/status')
 @login_required
 def auth_status():
@@ -22,10 +27,13 @@ def register():
     
     try:
         new_user = User(username=data['username'])
-        new_user.set_password(data['password'])
+        with hash_slot():
+            new_user.set_password(data['password'])
         db.session.add(new_user)
         db.session.commit()
         return jsonify({'message': 'User registered successfully'}), 201
+    except PasswordHashBusy as e:
+        return _busy_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Failed to register user: {str(e)}'}), 500
@@ -37,11 +45,29 @@ def login():
         return jsonify({'error': 'Username and password are required'}), 400
     
     user = User.query.filter_by(username=data['username']).first()
-    if user and user.check_password(data['password']):
-        login_user(user)
-        return jsonify({'message': 'Logged in successfully'})
-    
-    return jsonify({'error': 'Invalid username or password'}), 401
+    if user is None:
+        return jsonify({'error': 'Invalid username or password'}), 401
+
+    # 해시 계산은 동시 실행 수가 제한됩니다. 해시 설정이 바뀌었으면 로그인 성공 시 새 설정으로 다시 해시합니다.
+    try:
+        with hash_slot():
+            valid = user.check_password(data['password'])
+            rehashed = valid and user.password_needs_rehash()
+            if rehashed:
+                user.set_password(data['password'])
+    except PasswordHashBusy as e:
+        return _busy_response(e)
+    if not valid:
+        return jsonify({'error': 'Invalid username or password'}), 401
+
+    if rehashed:
+        try:
+            db.session.commit()
+        except Exception:
+            # 다시 해시하지 못해도 로그인은 진행합니다. 다음 로그인 때 다시 시도됩니다.
+            db.session.rollback()
+    login_user(remember_user(user))
+    return jsonify({'message': 'Logged in successfully'})
 
 @auth_bp.route('/logout', methods=['POST'])
 @login_required
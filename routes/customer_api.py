@@ -1,8 +1,17 @@
+import datetime
+
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
+from sqlalchemy import and_, exists
+from sqlalchemy.orm.exc import StaleDataError
 
 from extensions import db
-from models import  Customer, PaymentTransaction
+from models import  Customer, PaymentTransaction, Order
+from table_versions import conditional_json
+from search import search_customers
+from concurrency import check_version, conflict_response, VersionConflict
+from receivables import apply_receivable_change, aging_report, running_balance_subquery
+from pagination import paginate
 
 
 customer_bp = Blueprint('customer_bp', __name__, url_prefix='/api')
@@ -12,11 +21,16 @@ customer_bp = Blueprint('customer_bp', __name__, url_prefix='/api')
 def customers_handler():
     if request.method == 'GET':
         search_term = request.args.get('search', '')
-        query = Customer.query.filter_by(user_id=current_user.id)
-        if search_term:
-            query = query.filter(Customer.name.like(f'%{search_term}%'))
-        customers = query.order_by(Customer.name).all()
-        return jsonify([c.to_dict() for c in customers])
+
+        def load():
+            query = Customer.query.filter_by(user_id=current_user.id)
+            if search_term:
+                query = search_customers(query, search_term)
+            else:
+                query = query.order_by(Customer.name)
+            return [c.to_dict() for c in query.all()]
+
+        return conditional_json('customer', load, scope=current_user.id)
 
     if request.method == 'POST':
         data = request.get_json()
@@ -44,14 +58,23 @@ def customer_detail_handler(customer_id):
         data = request.get_json()
         if not data or not data.get('name'):
             return jsonify({'error': 'Customer name is required'}), 400
-        customer.name = data.get('name', customer.name)
-        customer.phone_number = data.get('phone_number', customer.phone_number)
-        customer.address = data.get('address', customer.address)
-        db.session.commit()
-        return jsonify({'message': 'Customer updated successfully'})
+        try:
+            check_version(customer, data)
+            customer.name = data.get('name', customer.name)
+            customer.phone_number = data.get('phone_number', customer.phone_number)
+            customer.address = data.get('address', customer.address)
+            db.session.commit()
+        except (VersionConflict, StaleDataError):
+            return conflict_response(customer)
+        return jsonify({'message': 'Customer updated successfully', 'version': customer.version_id})
 
     if request.method == 'DELETE':
-        if customer.orders or customer.payment_transactions:
+        # 주문/수금 내역 전체를 불러오지 않고 EXISTS 한 번으로 확인합니다. (customer_id 인덱스 사용)
+        has_history = db.session.query(
+            exists().where(Order.customer_id == customer.id)
+            | exists().where(PaymentTransaction.customer_id == customer.id)
+        ).scalar()
+        if has_history:
             return jsonify({'error': 'Cannot delete customer with existing orders or payments.'}), 400
         db.session.delete(customer)
         db.session.commit()
@@ -63,14 +86,37 @@ def payment_handler(customer_id):
     customer = Customer.query.filter_by(id=customer_id, user_id=current_user.id).first_or_404()
 
     if request.method == 'GET':
-        transactions = PaymentTransaction.query.filter_by(customer_id=customer.id).order_by(PaymentTransaction.transaction_date.desc()).all()
-        return jsonify([{
-            'id': t.id,
-            'transaction_date': t.transaction_date.isoformat(),
-            'amount': t.amount,
-            'payment_method': t.payment_method,
-            'notes': t.notes
-        } for t in transactions])
+        # (transaction_date, id) 내림차순으로 정렬해야 커서 기반 페이지네이션이 안정적으로 동작합니다.
+        query = PaymentTransaction.query.filter_by(customer_id=customer.id).order_by(
+            PaymentTransaction.transaction_date.desc(), PaymentTransaction.id.desc())
+
+        # running_balance=1: 각 수금 직후의 미수금 잔액을 미수금 원장의 누적 합계(윈도 함수)로 함께 조회합니다.
+        with_balance = request.args.get('running_balance') in ('1', 'true')
+        if with_balance:
+            ledger = running_balance_subquery(customer.id)
+            query = query.outerjoin(ledger, and_(ledger.c.entry_type == 'payment',
+                                                 ledger.c.reference_id == PaymentTransaction.id)
+                                    ).add_columns(ledger.c.running_balance)
+
+        def serialize(row):
+            t, balance = row if with_balance else (row, None)
+            payment = {
+                'id': t.id,
+                'transaction_date': t.transaction_date.isoformat(),
+                'amount': t.amount,
+                'payment_method': t.payment_method,
+                'notes': t.notes
+            }
+            if with_balance:
+                payment['running_balance'] = balance
+            return payment
+
+        try:
+            return jsonify(paginate(query, PaymentTransaction.transaction_date, PaymentTransaction.id,
+                                    request.args, serialize, 'payments',
+                                    cursor_row=(lambda row: row[0]) if with_balance else None))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
     if request.method == 'POST':
         data = request.get_json()
@@ -88,17 +134,31 @@ def payment_handler(customer_id):
             notes=data.get('notes'),
             user_id=current_user.id
         )
-        customer.receivable_balance -= amount
         db.session.add(new_transaction)
+        db.session.flush()
+        # 미수금 차감은 원자적 UPDATE로 반영하고, 수금 ID와 함께 미수금 원장에 기록합니다.
+        new_balance = apply_receivable_change(customer.id, current_user.id, -amount,
+                                              'payment', reference_id=new_transaction.id)
         db.session.commit()
         return jsonify({
             'message': 'Payment recorded successfully',
             'customer_name': customer.name,
-            'new_balance': customer.receivable_balance
+            'new_balance': new_balance
         }), 201
 
 @customer_bp.route('/customers/receivables', methods=['GET'])
 @login_required
 def get_customer_receivables():
     customers = Customer.query.filter(Customer.user_id == current_user.id, Customer.receivable_balance > 0).order_by(Customer.name).all()
-    return jsonify([c.to_dict() for c in customers])
\ No newline at end of file
+    return jsonify([c.to_dict() for c in customers])
+
+@customer_bp.route('/customers/receivables/aging', methods=['GET'])
+@login_required
+def get_receivables_aging():
+    """as_of 날짜(YYYY-MM-DD, 기본 오늘) 마감 기준 거래처별 미수금 연령(30/60/90일) 보고서를 반환합니다."""
+    as_of_str = request.args.get('as_of')
+    try:
+        as_of = datetime.datetime.strptime(as_of_str, '%Y-%m-%d').date() if as_of_str else datetime.datetime.utcnow().date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Please use YYYY-MM-DD.'}), 400
+    return jsonify(aging_report(current_user.id, datetime.datetime.combine(as_of, datetime.time.max)))
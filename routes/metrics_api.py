@@ -0,0 +1,25 @@
+from flask import Blueprint, current_app, jsonify
+from flask_login import login_required
+
+from instrumentation import request_metrics, DURATION_BUCKETS_MS, STATEMENT_BUCKETS
+
+metrics_bp = Blueprint('metrics_bp', __name__, url_prefix='/api')
+
+@metrics_bp.route('/_metrics', methods=['GET'])
+@login_required
+def get_metrics():
+    """엔드포인트별 요청 수, 처리 시간, SQL 실행 횟수/시간과 히스토그램을 반환합니다. (이 프로세스의 누적 값)"""
+    return jsonify({
+        'duration_buckets_ms': list(DURATION_BUCKETS_MS),
+        'statement_buckets': list(STATEMENT_BUCKETS),
+        'endpoints': request_metrics.snapshot(),
+    })
+
+@metrics_bp.route('/_metrics', methods=['DELETE'])
+@login_required
+def reset_metrics():
+    """누적된 측정 값을 초기화합니다. METRICS_RESET_ENABLED 설정을 켠 경우에만 허용합니다."""
+    if not current_app.config.get('METRICS_RESET_ENABLED'):
+        return jsonify({'error': 'Resetting metrics is disabled'}), 403
+    request_metrics.clear()
+    return jsonify({'message': 'Metrics reset'})
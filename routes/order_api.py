@@ -1,17 +1,38 @@
 import datetime
-from flask import Blueprint, jsonify, request
+import json
+from flask import Blueprint, jsonify, request, Response, stream_with_context
 from flask_login import login_required, current_user
-from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload, selectinload
 
 # app.py에서 정의된 db 객체와 모델들을 임포트합니다.
 from extensions import db
-from models  import Order, OrderItem, Product, Customer
+from models  import Order, OrderItem
+from date_ranges import days_range, in_range
+from inventory import apply_stock_changes, load_products
+from receivables import apply_receivable_change
+from concurrency import run_with_retry, busy_response, DatabaseBusy
+from pagination import paginate
 
 
 
 # 'order_api'라는 이름의 Blueprint를 생성하고, 모든 라우트에 '/api' 접두사를 붙입니다.
 order_bp = Blueprint('order_api', __name__, url_prefix='/api')
 
+# 주문 목록 스트리밍 설정 (페이지 크기는 pagination.MAX_PAGE_SIZE)
+ORDER_STREAM_BATCH_SIZE = 200
+
+
+def order_query_with_details():
+    """Order.to_dict()에 필요한 관계(customer, items, items.product)를 미리 로드하는 쿼리를 반환합니다.
+
+    주문 수와 관계없이 고정된 개수의 SELECT로 목록을 직렬화할 수 있어 N+1 쿼리를 방지합니다.
+    """
+    return Order.query.options(
+        joinedload(Order.customer),
+        selectinload(Order.items).joinedload(OrderItem.product)
+    )
+
 
 @order_bp.route('/orders', methods=['GET', 'POST'])
 @login_required
@@ -36,31 +57,43 @@ def orders_handler():
             )
             db.session.add(new_order)
 
-            if payment_method == 'credit':
-                customer = Customer.query.filter_by(id=customer_id, user_id=current_user.id).first()
-                if not customer:
-                    raise ValueError("Invalid customer for credit transaction.")
-                customer.receivable_balance += new_order.total_amount
-
+            # 주문 상품 전체를 한 번의 IN (...) 쿼리로 조회합니다.
+            products = load_products(item_data['id'] for item_data in data['items'])
+            quantities = {}
+            order_items = []
             for item_data in data['items']:
-                product = Product.query.get(item_data['id'])
+                product = products.get(item_data['id'])
                 if not product:
                     raise ValueError(f"Product with ID {item_data['id']} not found.")
-                if product.stock_quantity < item_data['quantity']:
+                quantities[product.id] = quantities.get(product.id, 0) + item_data['quantity']
+                if product.stock_quantity < quantities[product.id]:
                     raise ValueError(f"Not enough stock for product {product.name}")
-                
-                order_item = OrderItem(
-                    order=new_order,
-                    product_id=item_data['id'],
-                    quantity=item_data['quantity'],
-                    price_per_unit=item_data['price']
-                )
-                product.stock_quantity -= item_data['quantity']
-                db.session.add(order_item)
-            
+
+                order_items.append({
+                    'product_id': item_data['id'],
+                    'quantity': item_data['quantity'],
+                    'price_per_unit': item_data['price']
+                })
+
+            # 위의 재고 확인은 조회 시점 기준이므로, 실제 차감은 조건부 UPDATE로 원자적으로 수행합니다.
+            # 그 사이 다른 계산대에서 재고를 소진했다면 갱신된 행 수가 모자라므로 주문 전체를 취소합니다.
+            # 재고/미수금 원장에 주문 ID를 남기기 위해 먼저 flush합니다.
+            db.session.flush()
+            if not apply_stock_changes({product_id: -q for product_id, q in quantities.items()},
+                                       reason='order', reference_id=new_order.id):
+                raise ValueError("Not enough stock for one or more products")
+
+            # 외상 판매는 미수금을 원자적으로 증가시키고 원장에 기록합니다.
+            if payment_method == 'credit':
+                if apply_receivable_change(customer_id, current_user.id, new_order.total_amount,
+                                           'sale', reference_id=new_order.id) is None:
+                    raise ValueError("Invalid customer for credit transaction.")
+
+            # 주문 항목은 executemany 한 번으로 일괄 삽입합니다.
+            if order_items:
+                db.session.execute(insert(OrderItem), [dict(item, order_id=new_order.id) for item in order_items])
             db.session.commit()
             return jsonify({'message': 'Order created successfully', 'order_id': new_order.id}), 201
-
         except ValueError as e:
             db.session.rollback()
             return jsonify({'error': str(e)}), 400
@@ -69,63 +102,66 @@ def orders_handler():
             return jsonify({'error': f'Failed to create order: {str(e)}'}), 500
 
     if request.method == 'GET':
-        query = Order.query.filter_by(user_id=current_user.id)
+        query = order_query_with_details().filter_by(user_id=current_user.id)
         start_date_str = request.args.get('start_date')
         end_date_str = request.args.get('end_date')
 
         try:
-            if start_date_str:
-                start_date = datetime.datetime.strptime(start_date_str, '%Y-%m-%d').date()
-                query = query.filter(func.date(Order.order_date) >= start_date)
-            if end_date_str:
-                end_date = datetime.datetime.strptime(end_date_str, '%Y-%m-%d').date()
-                query = query.filter(func.date(Order.order_date) <= end_date)
+            start_date = datetime.datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
+            end_date = datetime.datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
         except ValueError:
             return jsonify({'error': 'Invalid date format. Please use YYYY-MM-DD.'}), 400
+        query = query.filter(in_range(Order.order_date, *days_range(start_date, end_date)))
+
+        # (order_date, id) 내림차순으로 정렬해야 커서 기반(keyset) 페이지네이션이 안정적으로 동작합니다.
+        query = query.order_by(Order.order_date.desc(), Order.id.desc())
+
+        # format=ndjson: 전체 내역을 메모리에 모으지 않고 서버측 커서로 한 줄씩 내보냅니다.
+        # 본문을 만드는 SQL은 응답 측정(after_request)이 끝난 뒤 실행되므로 /api/_metrics와 Server-Timing에 잡히지 않습니다.
+        if request.args.get('format') == 'ndjson':
+            def generate():
+                for o in query.yield_per(ORDER_STREAM_BATCH_SIZE):
+                    yield json.dumps(o.to_dict(), ensure_ascii=False) + '\n'
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
-        orders = query.order_by(Order.order_date.desc()).all()
-        result = []
-        for o in orders:
-            order_data = {
-                'id': o.id,
-                'order_date': o.order_date.isoformat(),
-                'total_amount': o.total_amount,
-                'customer_id': o.customer_id,
-                'customer_name': o.customer.name if o.customer else None,
-                'status': o.status,
-                'payment_method': o.payment_method,
-                'items': [{
-                    'product_id': i.product_id,
-                    'product_name': i.product.name,
-                    'quantity': i.quantity,
-                    'price_per_unit': i.price_per_unit
-                } for i in o.items]
-            }
-            result.append(order_data)
-        return jsonify(result)
+        try:
+            return jsonify(paginate(query, Order.order_date, Order.id, request.args,
+                                    lambda o: o.to_dict(), 'orders'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
 @order_bp.route('/order/<int:order_id>', methods=['GET', 'DELETE'])
 @login_required
 def order_detail(order_id):
-    order = Order.query.filter_by(id=order_id, user_id=current_user.id).first_or_404()
-
     if request.method == 'GET':
-        # 이 로직은 orders_handler의 GET 로직과 중복되므로, 별도 함수로 추출하여 재사용할 수 있습니다.
-        # 여기서는 설명을 위해 그대로 둡니다.
-        return jsonify({ 'id': order.id, 'order_date': order.order_date.isoformat(), 'total_amount': order.total_amount, 'customer_id': order.customer_id, 'customer_name': order.customer.name if order.customer else None, 'status': order.status, 'payment_method': order.payment_method, 'items': [{ 'product_id': item.product_id, 'product_name': item.product.name, 'quantity': item.quantity, 'price_per_unit': item.price_per_unit } for item in order.items] })
+        order = order_query_with_details().filter_by(id=order_id, user_id=current_user.id).first_or_404()
+        return jsonify(order.to_dict())
 
     if request.method == 'DELETE':
-        if order.status == 'cancelled':
-            return jsonify({'error': 'Order is already cancelled'}), 400
-        
-        if order.payment_method == 'credit' and order.customer:
-            order.customer.receivable_balance -= order.total_amount
-        
-        for item in order.items:
-            product = Product.query.get(item.product_id)
-            if product:
-                product.stock_quantity += item.quantity
-        
-        order.status = 'cancelled'
-        db.session.commit()
-        return jsonify({'id': order.id, 'status': order.status, 'message': 'Order cancelled successfully'})
\ No newline at end of file
+        def cancel_order():
+            # 같은 주문을 두 계산대에서 동시에 취소하면 한쪽은 주문 버전 충돌로 재시도되고,
+            # 다시 읽은 주문이 이미 취소 상태이므로 재고/미수금이 두 번 되돌려지지 않습니다.
+            order = order_query_with_details().filter_by(id=order_id, user_id=current_user.id).first_or_404()
+            if order.status == 'cancelled':
+                return jsonify({'error': 'Order is already cancelled'}), 400
+
+            # 주문 생성과 같은 순서(상품 재고 -> 거래처 미수금)로 행을 갱신해야
+            # 동시에 진행되는 외상 판매와 취소가 서로 반대 순서로 잠금을 잡아 교착 상태에 빠지지 않습니다.
+            restock = {}
+            for item in order.items:
+                restock[item.product_id] = restock.get(item.product_id, 0) + item.quantity
+            # 그 사이 삭제된 상품은 되돌릴 재고가 없으므로 건너뛰고, 나머지 상품만 재입고하여 원장에 기록합니다.
+            apply_stock_changes(restock, reason='order_cancel', reference_id=order.id)
+
+            if order.payment_method == 'credit' and order.customer_id:
+                apply_receivable_change(order.customer_id, order.user_id, -order.total_amount,
+                                        'sale_cancel', reference_id=order.id)
+
+            order.status = 'cancelled'
+            db.session.commit()
+            return jsonify({'id': order.id, 'status': order.status, 'message': 'Order cancelled successfully'})
+
+        try:
+            return run_with_retry(cancel_order)
+        except DatabaseBusy as e:
+            return busy_response(e)
\ No newline at end of file
@@ -1,9 +1,19 @@
+import datetime
+
 from flask import Blueprint, jsonify, request
 from flask_login import login_required
+from sqlalchemy.orm.exc import StaleDataError
 
 # app.py에서 정의된 db 객체와 Product 모델을 임포트합니다.
 from extensions import db
 from models import User, Product # ★★★ 이 부분을 수정합니다. ★★★
+from inventory import apply_stock_changes, set_stock_levels, load_products
+from product_cache import product_cache, cached_product_list, cached_product
+from table_versions import conditional_json
+from search import search_products
+from stock_ledger import stock_as_of_query
+from concurrency import check_version, conflict_response, run_with_retry, busy_response, VersionConflict, DatabaseBusy
+from product_import import iter_rows, import_products, detect_format, DEFAULT_CHUNK_SIZE
 
 # 'product_api'라는 이름의 Blueprint를 생성하고, 모든 라우트에 '/api' 접두사를 붙입니다.
 product_bp = Blueprint('product_api', __name__, url_prefix='/api')
@@ -14,11 +24,17 @@ product_bp = Blueprint('product_api', __name__, url_prefix='/api')
 def products_handler():
     if request.method == 'GET':
         search_term = request.args.get('search', '')
-        query = Product.query
-        if search_term:
-            query = query.filter(Product.name.like(f'%{search_term}%'))
-        all_products = query.order_by(Product.name).all()
-        return jsonify([{'id': p.id, 'name': p.name, 'unit': p.unit, 'price': p.price, 'stock_quantity': p.stock_quantity} for p in all_products])
+
+        def load():
+            if search_term:
+                query = search_products(Product.query, search_term)
+            else:
+                query = Product.query.order_by(Product.name)
+            return [p.to_dict() for p in query.all()]
+
+        # 상품이 변경되면 product_cache 모듈이 커밋 시점에 캐시를 비우고, 목록 캐시 키에는 테이블 버전이 포함됩니다.
+        # 변경이 없으면 If-None-Match에 304로 응답하여 목록을 다시 보내지 않습니다.
+        return conditional_json('product', lambda: cached_product_list(search_term, load))
     
     if request.method == 'POST':
         data = request.get_json()
@@ -38,21 +54,51 @@ def products_handler():
         db.session.commit()
         return jsonify({'id': new_product.id, 'name': new_product.name}), 201
 
+@product_bp.route('/products/import', methods=['POST'])
+@login_required
+def import_products_handler():
+    """CSV/JSONL 파일의 상품을 일괄 등록/수정합니다. 잘못된 행은 건너뛰고 줄 번호별 오류를 반환합니다.
+
+    multipart 업로드('file' 필드) 또는 요청 본문 자체(text/csv, application/x-ndjson)를 받습니다.
+    """
+    upload = request.files.get('file')
+    if upload:
+        stream, filename, content_type = upload.stream, upload.filename, upload.content_type
+    else:
+        stream, filename, content_type = request.stream, None, request.content_type
+    fmt = request.args.get('format') or detect_format(filename, content_type)
+    try:
+        chunk_size = int(request.args.get('chunk_size', DEFAULT_CHUNK_SIZE))
+    except ValueError:
+        return jsonify({'error': 'chunk_size must be an integer'}), 400
+    if fmt not in ('csv', 'jsonl'):
+        return jsonify({'error': f"Unsupported import format '{fmt}'. Use 'csv' or 'jsonl'."}), 400
+    if chunk_size < 1:
+        return jsonify({'error': 'chunk_size must be positive'}), 400
+
+    summary = import_products(iter_rows(stream, fmt), chunk_size=chunk_size)
+    return jsonify(summary), 200
+
 @product_bp.route('/product/<product_id>', methods=['GET', 'PUT', 'DELETE'])
 @login_required
 def product_detail(product_id):
     product = Product.query.get_or_404(product_id)
     if request.method == 'GET':
-        return jsonify({'id': product.id, 'name': product.name, 'unit': product.unit, 'price': product.price, 'stock_quantity': product.stock_quantity})
+        return jsonify(product.to_dict())
     
     if request.method == 'PUT':
         data = request.get_json()
-        product.name = data.get('name', product.name)
-        product.unit = data.get('unit', product.unit)
-        product.price = data.get('price', product.price)
-        product.stock_quantity = data.get('stock_quantity', product.stock_quantity)
-        db.session.commit()
-        return jsonify({'id': product.id, 'name': product.name})
+        # 화면에서 읽은 version을 함께 보내면, 그 사이 다른 계산대에서 바뀐 상품을 덮어쓰지 않고 409로 알립니다.
+        try:
+            check_version(product, data)
+            product.name = data.get('name', product.name)
+            product.unit = data.get('unit', product.unit)
+            product.price = data.get('price', product.price)
+            product.stock_quantity = data.get('stock_quantity', product.stock_quantity)
+            db.session.commit()
+        except (VersionConflict, StaleDataError):
+            return conflict_response(product)
+        return jsonify({'id': product.id, 'name': product.name, 'version': product.version_id})
 
     if request.method == 'DELETE':
         db.session.delete(product)
@@ -62,29 +108,126 @@ def product_detail(product_id):
 @product_bp.route('/product/<product_id>/stock', methods=['PUT'])
 @login_required
 def adjust_product_stock(product_id):
-    product = Product.query.get(product_id)
-    if not product:
-        return jsonify({'error': 'Product not found'}), 404
-    
     data = request.get_json()
-    if 'adjustment' not in data:
-        return jsonify({'error': 'Missing "adjustment" field'}), 400
+
+    def adjust():
+        # 버전 충돌 시 run_with_retry가 처음부터 다시 실행하므로 상품을 매번 새로 읽습니다.
+        product = Product.query.get(product_id)
+        if not product:
+            return jsonify({'error': 'Product not found'}), 404
+        if 'adjustment' not in data:
+            return jsonify({'error': 'Missing "adjustment" field'}), 400
+        try:
+            adjustment = int(data['adjustment'])
+        except ValueError:
+            return jsonify({'error': 'Adjustment must be an integer'}), 400
+        if product.stock_quantity + adjustment < 0:
+            return jsonify({'error': 'Stock cannot go below zero'}), 400
+
+        product.stock_quantity += adjustment
+        db.session.commit()
+        return jsonify({'id': product.id, 'name': product.name, 'stock_quantity': product.stock_quantity})
+
     try:
-        adjustment = int(data['adjustment'])
+        return run_with_retry(adjust)
+    except DatabaseBusy as e:
+        return busy_response(e)
+
+@product_bp.route('/products/stock', methods=['POST'])
+@login_required
+def adjust_stock_batch():
+    """재고 실사용 일괄 재고 조정 API.
+
+    items: [{product_id, adjustment} 또는 {product_id, counted_quantity}] 목록을 받아
+    상품 조회 1회로 모두 검증한 뒤, 하나의 트랜잭션에서 집합 단위 UPDATE로 반영합니다.
+    한 항목이라도 잘못되면 아무것도 반영하지 않고 항목별 결과와 함께 400을 반환합니다.
+    """
+    data = request.get_json()
+    if not data or not isinstance(data.get('items'), list) or not data['items']:
+        return jsonify({'error': 'Missing "items" list'}), 400
+
+    products = load_products(item.get('product_id') for item in data['items'] if isinstance(item, dict))
+    results, adjustments, counted, seen = [], {}, {}, set()
+    for item in data['items']:
+        item = item if isinstance(item, dict) else {}
+        product_id = item.get('product_id')
+        result = {'product_id': product_id}
+        results.append(result)
+        try:
+            product = products.get(product_id)
+            if not product:
+                raise ValueError('Product not found')
+            if product_id in seen:
+                raise ValueError('Duplicate product in batch')
+            seen.add(product_id)
+            if ('adjustment' in item) == ('counted_quantity' in item):
+                raise ValueError('Provide exactly one of "adjustment" or "counted_quantity"')
+            try:
+                if 'adjustment' in item:
+                    adjustments[product_id] = int(item['adjustment'])
+                    new_quantity = product.stock_quantity + adjustments[product_id]
+                else:
+                    counted[product_id] = new_quantity = int(item['counted_quantity'])
+            except (TypeError, ValueError):
+                raise ValueError('Quantity must be an integer')
+            if new_quantity < 0:
+                raise ValueError('Stock cannot go below zero')
+            result.update(status='ok', stock_quantity=new_quantity)
+        except ValueError as e:
+            result.update(status='error', error=str(e))
+
+    if any(r['status'] == 'error' for r in results):
+        return jsonify({'error': 'Stock adjustment failed for some items', 'results': results}), 400
+
+    try:
+        # 조정량은 조건부 UPDATE로 반영하므로, 검증 이후 다른 요청이 재고를 줄였다면 전체를 취소합니다.
+        if not apply_stock_changes(adjustments, reason='adjustment'):
+            raise ValueError('Stock changed concurrently; please retry')
+        set_stock_levels(counted, reason='stocktake')
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 409
+    return jsonify({'results': results})
+
+@product_bp.route('/products/stock', methods=['GET'])
+@login_required
+def stock_as_of_handler():
+    """as_of 날짜(YYYY-MM-DD) 마감 시점의 상품별 재고와 현재 단가 기준 평가액을 반환합니다. (재고 평가 보고서용)"""
+    as_of_str = request.args.get('as_of')
+    if not as_of_str:
+        return jsonify({'error': 'Missing "as_of" parameter'}), 400
+    try:
+        as_of = datetime.datetime.strptime(as_of_str, '%Y-%m-%d').date()
     except ValueError:
-        return jsonify({'error': 'Adjustment must be an integer'}), 400
-    if product.stock_quantity + adjustment < 0:
-        return jsonify({'error': 'Stock cannot go below zero'}), 400
-    
-    product.stock_quantity += adjustment
-    db.session.commit()
-    return jsonify({'id': product.id, 'name': product.name, 'stock_quantity': product.stock_quantity})
+        return jsonify({'error': 'Invalid date format. Please use YYYY-MM-DD.'}), 400
+
+    # 상품 테이블은 id/이름/단가만 읽고, 수량은 스냅샷과 재고 원장에서 계산합니다.
+    rows = db.session.execute(stock_as_of_query(datetime.datetime.combine(as_of, datetime.time.max))
+                              .add_columns(Product.name, Product.price))
+    return jsonify([{
+        'product_id': row.product_id,
+        'name': row.name,
+        'stock_quantity': row.stock_quantity,
+        'stock_value': row.stock_quantity * row.price
+    } for row in rows])
 
 @product_bp.route('/price')
 @login_required
 def get_price():
     product_id = request.args.get('productId')
-    product = Product.query.get(product_id)
+
+    def load():
+        product = Product.query.get(product_id)
+        return product.to_dict() if product else None
+
+    product = cached_product(product_id, load)
     if product:
-        return jsonify({'price': product.price})
-    return jsonify({'error': 'Price not found'}), 404
\ No newline at end of file
+        return jsonify({'price': product['price']})
+    return jsonify({'error': 'Price not found'}), 404
+
+@product_bp.route('/products/cache-stats')
+@login_required
+def product_cache_stats():
+    """상품 캐시의 적중/실패 횟수 등 통계를 반환합니다."""
+    return jsonify(product_cache.stats())
\ No newline at end of file
@@ -5,7 +5,8 @@ from sqlalchemy import func
 
 # app.py에서 정의된 db 객체와 모델들을 임포트합니다.\
 from extensions import db
-from models import Order
+from models import DailySalesRollup
+from date_ranges import month_range
 
 sales_bp = Blueprint('sales_bp', __name__, url_prefix='/api/sales')
 
@@ -21,10 +22,10 @@ def get_daily_sales():
     else:
         target_date = datetime.datetime.utcnow().date()
 
-    total_daily_sales = db.session.query(func.sum(Order.total_amount)).filter(
-        Order.user_id == current_user.id,
-        func.date(Order.order_date) == target_date,
-        Order.status == 'completed'
+    # 원본 주문 대신 미리 집계된 DailySalesRollup(결제수단별 행)만 합산합니다.
+    total_daily_sales = db.session.query(func.sum(DailySalesRollup.total_sales)).filter(
+        DailySalesRollup.user_id == current_user.id,
+        DailySalesRollup.date == target_date
     ).scalar() or 0
     return jsonify({'date': target_date.isoformat(), 'total_sales': total_daily_sales})
 
@@ -43,10 +44,10 @@ def get_monthly_sales():
     if not (1900 <= year <= 2100 and 1 <= month <= 12):
         return jsonify({'error': 'Invalid year or month value.'}), 400
     
-    total_monthly_sales = db.session.query(func.sum(Order.total_amount)).filter(
-        Order.user_id == current_user.id,
-        db.extract('year', Order.order_date) == year,
-        db.extract('month', Order.order_date) == month,
-        Order.status == 'completed'
+    start, end = month_range(year, month)
+    total_monthly_sales = db.session.query(func.sum(DailySalesRollup.total_sales)).filter(
+        DailySalesRollup.user_id == current_user.id,
+        DailySalesRollup.date >= start.date(),
+        DailySalesRollup.date < end.date()
     ).scalar() or 0
     return jsonify({'year': year, 'month': month, 'total_sales': total_monthly_sales})
\ No newline at end of file
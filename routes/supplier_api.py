@@ -1,10 +1,17 @@
+import datetime
+
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from sqlalchemy.orm import joinedload
+from sqlalchemy import exists
+from sqlalchemy.orm import joinedload, selectinload
 
 # app.py에서 정의된 db 객체와 모델들을 임포트합니다.
 from extensions import db
-from models import Supplier, PurchaseOrder, PurchaseOrderItem, Product
+from models import Supplier, PurchaseOrder, PurchaseOrderItem
+from date_ranges import days_range, in_range
+from pagination import paginate
+from table_versions import conditional_json
+from purchases import record_purchases, purchases_from_csv, PurchaseValidationError
 
 supplier_bp = Blueprint('supplier_bp', __name__, url_prefix='/api')
 
@@ -13,8 +20,11 @@ supplier_bp = Blueprint('supplier_bp', __name__, url_prefix='/api')
 def suppliers_handler():
     """공급처 목록을 조회(GET)하거나 새 공급처를 추가(POST)합니다."""
     if request.method == 'GET':
-        suppliers = Supplier.query.filter_by(user_id=current_user.id).order_by(Supplier.name).all()
-        return jsonify([{'id': s.id, 'name': s.name, 'contact_person': s.contact_person, 'phone_number': s.phone_number} for s in suppliers])
+        def load():
+            suppliers = Supplier.query.filter_by(user_id=current_user.id).order_by(Supplier.name).all()
+            return [{'id': s.id, 'name': s.name, 'contact_person': s.contact_person, 'phone_number': s.phone_number} for s in suppliers]
+
+        return conditional_json('supplier', load, scope=current_user.id)
 
     if request.method == 'POST':
         data = request.get_json()
@@ -46,7 +56,8 @@ def supplier_detail_handler(supplier_id):
         return jsonify({'message': 'Supplier updated successfully'})
 
     if request.method == 'DELETE':
-        if supplier.purchase_orders:
+        # 매입 내역 전체를 불러오지 않고 EXISTS 한 번으로 확인합니다. (supplier_id 인덱스 사용)
+        if db.session.query(exists().where(PurchaseOrder.supplier_id == supplier.id)).scalar():
             return jsonify({'error': 'Cannot delete supplier with existing purchase orders.'}), 400
         db.session.delete(supplier)
         db.session.commit()
@@ -57,10 +68,37 @@ def supplier_detail_handler(supplier_id):
 def purchases_handler():
     """매입 내역을 조회(GET)하거나 새 매입을 기록(POST)합니다."""
     if request.method == 'GET':
-        purchases = PurchaseOrder.query.options(
-            joinedload(PurchaseOrder.supplier)
-        ).filter_by(user_id=current_user.id).order_by(PurchaseOrder.purchase_date.desc()).all()
-        return jsonify([{'id': p.id, 'purchase_date': p.purchase_date.isoformat(), 'supplier_name': p.supplier.name if p.supplier else 'N/A', 'total_cost': p.total_cost} for p in purchases])
+        query = PurchaseOrder.query.options(joinedload(PurchaseOrder.supplier)).filter_by(user_id=current_user.id)
+
+        # include_items=1: 매입 항목과 상품을 selectinload로 함께 불러와 매입별 상세 조회 없이 화면을 그립니다.
+        include_items = request.args.get('include_items') in ('1', 'true')
+        if include_items:
+            query = query.options(selectinload(PurchaseOrder.items).selectinload(PurchaseOrderItem.product))
+
+        start_date_str = request.args.get('start_date')
+        end_date_str = request.args.get('end_date')
+        try:
+            start_date = datetime.datetime.strptime(start_date_str, '%Y-%m-%d').date() if start_date_str else None
+            end_date = datetime.datetime.strptime(end_date_str, '%Y-%m-%d').date() if end_date_str else None
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Please use YYYY-MM-DD.'}), 400
+        query = query.filter(in_range(PurchaseOrder.purchase_date, *days_range(start_date, end_date)))
+
+        supplier_id_str = request.args.get('supplier_id')
+        if supplier_id_str:
+            try:
+                query = query.filter(PurchaseOrder.supplier_id == int(supplier_id_str))
+            except ValueError:
+                return jsonify({'error': 'supplier_id must be an integer'}), 400
+
+        # (purchase_date, id) 내림차순으로 정렬해야 커서 기반 페이지네이션이 안정적으로 동작합니다.
+        query = query.order_by(PurchaseOrder.purchase_date.desc(), PurchaseOrder.id.desc())
+
+        try:
+            return jsonify(paginate(query, PurchaseOrder.purchase_date, PurchaseOrder.id, request.args,
+                                    lambda p: p.to_dict(include_items), 'purchases'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
     if request.method == 'POST':
         data = request.get_json()
@@ -68,34 +106,42 @@ def purchases_handler():
             return jsonify({'error': 'Purchase items are required'}), 400
         
         try:
-            total_cost = sum(item['quantity'] * item['cost_per_unit'] for item in data['items'])
-            new_purchase = PurchaseOrder(
-                supplier_id=data.get('supplier_id'),
-                total_cost=total_cost,
-                user_id=current_user.id
-            )
-            db.session.add(new_purchase)
-
-            for item_data in data['items']:
-                product = Product.query.get(item_data['product_id'])
-                if not product:
-                    raise ValueError(f"Product with ID {item_data['product_id']} not found.")
-                
-                product.stock_quantity += item_data['quantity']
-                
-                purchase_item = PurchaseOrderItem(
-                    purchase_order=new_purchase,
-                    product_id=item_data['product_id'],
-                    quantity=item_data['quantity'],
-                    cost_per_unit=item_data['cost_per_unit']
-                )
-                db.session.add(purchase_item)
-            
+            purchase_id, = record_purchases([data], current_user.id)
             db.session.commit()
-            return jsonify({'message': 'Purchase recorded successfully', 'purchase_id': new_purchase.id}), 201
-        except (ValueError, KeyError) as e:
+            return jsonify({'message': 'Purchase recorded successfully', 'purchase_id': purchase_id}), 201
+        except PurchaseValidationError as e:
             db.session.rollback()
             return jsonify({'error': str(e)}), 400
         except Exception as e:
             db.session.rollback()
-            return jsonify({'error': f'Failed to record purchase: {str(e)}'}), 500
\ No newline at end of file
+            return jsonify({'error': f'Failed to record purchase: {str(e)}'}), 500
+
+@supplier_bp.route('/purchases/batch', methods=['POST'])
+@login_required
+def purchases_batch_handler():
+    """여러 매입을 한 트랜잭션으로 기록합니다. (공급처 거래명세서/EDI 일괄 입고)
+
+    JSON 본문 {'purchases': [...]} 또는 CSV 파일(multipart 'file' 필드나 text/csv 본문)을 받습니다.
+    CSV는 purchase_ref가 같은 줄을 하나의 매입으로 묶습니다. 하나라도 잘못되면 전체를 반영하지 않습니다.
+    """
+    upload = request.files.get('file')
+    if upload or 'csv' in (request.content_type or ''):
+        try:
+            purchases = purchases_from_csv(upload.stream if upload else request.stream)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    else:
+        data = request.get_json(silent=True)
+        purchases = data.get('purchases') if isinstance(data, dict) else None
+        if not isinstance(purchases, list):
+            return jsonify({'error': 'Missing "purchases" list'}), 400
+    if not purchases:
+        return jsonify({'error': 'No purchases to record'}), 400
+
+    try:
+        purchase_ids = record_purchases(purchases, current_user.id)
+        db.session.commit()
+    except PurchaseValidationError as e:
+        db.session.rollback()
+        return jsonify({'error': 'Batch rejected; no purchases were recorded', 'errors': e.errors}), 400
+    return jsonify({'message': f'{len(purchase_ids)} purchases recorded successfully', 'purchase_ids': purchase_ids}), 201
\ No newline at end of file
@@ -0,0 +1,103 @@
+from sqlalchemy import func, select
+
+from cache import TTLCache
+from extensions import db
+from models import Order, OrderItem, Product, Customer, DailySalesRollup
+from date_ranges import days_range, in_range
+from table_versions import current_table_version
+
+# 매출 분석(상품별 판매 순위, 결제수단별/거래처별 매출)입니다. 모두 GROUP BY 쿼리 한 번으로 계산합니다.
+#  - 완료(completed) 주문만 집계하며, 기간은 start_day ~ end_day(양 끝 포함, 생략하면 제한 없음)입니다.
+#  - 상품별 집계는 (user_id, status, order_date) 인덱스로 주문을 고르고,
+#    (order_id, product_id, quantity, price_per_unit) 커버링 인덱스로 항목을 테이블 조회 없이 읽습니다.
+#  - 결제수단별 매출은 일 단위 집계 테이블(DailySalesRollup)을 합산합니다.
+# 결과는 (사용자, 보고서, 조건, 주문 테이블 버전)별로 캐시합니다. 주문이 생성/취소되면 테이블 버전이 바뀌므로
+# 다른 워커 프로세스에서 생긴 주문도 다음 조회부터 반영됩니다. 상품/거래처 이름은 계산 시점의 값입니다.
+TOP_PRODUCT_METRICS = ('quantity', 'revenue')
+DEFAULT_TOP_LIMIT = 10
+MAX_TOP_LIMIT = 100
+
+analytics_cache = TTLCache(ttl=300)
+
+
+def init_analytics_cache(app):
+    analytics_cache.configure(
+        ttl=app.config.get('ANALYTICS_CACHE_TTL', 300),
+        max_entries=app.config.get('ANALYTICS_CACHE_MAX_ENTRIES', 256)
+    )
+
+
+def _completed_orders(user_id, start_day, end_day):
+    return (Order.user_id == user_id, Order.status == 'completed',
+            in_range(Order.order_date, *days_range(start_day, end_day)))
+
+
+def top_products_query(user_id, start_day=None, end_day=None, by='quantity', limit=DEFAULT_TOP_LIMIT):
+    """기간 내 판매 수량(by='quantity') 또는 매출액(by='revenue') 상위 limit개 상품을 조회하는 쿼리입니다."""
+    quantity = func.sum(OrderItem.quantity).label('quantity')
+    revenue = func.sum(OrderItem.quantity * OrderItem.price_per_unit).label('revenue')
+    metric = quantity if by == 'quantity' else revenue
+    return (
+        select(OrderItem.product_id, Product.name.label('product_name'), quantity, revenue,
+               func.count(func.distinct(OrderItem.order_id)).label('order_count'))
+        .join(Order, Order.id == OrderItem.order_id)
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(*_completed_orders(user_id, start_day, end_day))
+        .group_by(OrderItem.product_id, Product.name)
+        .order_by(metric.desc(), OrderItem.product_id)
+        .limit(limit)
+    )
+
+
+def sales_by_customer_query(user_id, start_day=None, end_day=None):
+    """기간 내 거래처별 주문 수와 매출액을 조회하는 쿼리입니다. 거래처 없는 주문은 customer_id가 None인 한 행입니다."""
+    total = func.sum(Order.total_amount).label('total_sales')
+    return (
+        select(Order.customer_id, Customer.name.label('customer_name'),
+               func.count(Order.id).label('order_count'), total)
+        .outerjoin(Customer, Customer.id == Order.customer_id)
+        .where(*_completed_orders(user_id, start_day, end_day))
+        .group_by(Order.customer_id, Customer.name)
+        .order_by(total.desc(), Order.customer_id)
+    )
+
+
+def sales_by_payment_method_query(user_id, start_day=None, end_day=None):
+    """기간 내 결제수단별 주문 수와 매출액을 일별 집계 테이블에서 합산하는 쿼리입니다."""
+    r = DailySalesRollup
+    total = func.sum(r.total_sales).label('total_sales')
+    conditions = [r.user_id == user_id]
+    if start_day is not None:
+        conditions.append(r.date >= start_day)
+    if end_day is not None:
+        conditions.append(r.date <= end_day)
+    return (
+        select(r.payment_method, func.sum(r.order_count).label('order_count'), total)
+        .where(*conditions)
+        .group_by(r.payment_method)
+        .having(func.sum(r.order_count) > 0)
+        .order_by(total.desc(), r.payment_method)
+    )
+
+
+def _rows(query):
+    return [dict(row._mapping) for row in db.session.execute(query)]
+
+
+def _cached(user_id, key, loader):
+    return analytics_cache.get_or_load((user_id, current_table_version('order'), *key), loader)
+
+
+def top_products(user_id, start_day=None, end_day=None, by='quantity', limit=DEFAULT_TOP_LIMIT):
+    return _cached(user_id, ('top_products', start_day, end_day, by, limit),
+                   lambda: _rows(top_products_query(user_id, start_day, end_day, by, limit)))
+
+
+def sales_by_customer(user_id, start_day=None, end_day=None):
+    return _cached(user_id, ('by_customer', start_day, end_day),
+                   lambda: _rows(sales_by_customer_query(user_id, start_day, end_day)))
+
+
+def sales_by_payment_method(user_id, start_day=None, end_day=None):
+    return _cached(user_id, ('by_payment_method', start_day, end_day),
+                   lambda: _rows(sales_by_payment_method_query(user_id, start_day, end_day)))
@@ -0,0 +1,119 @@
+import datetime
+
+from sqlalchemy import event, func, inspect
+
+from extensions import db
+from models import Order, DailySalesRollup
+from upsert import dialect_insert
+
+# 주문이 flush될 때마다 DailySalesRollup을 같은 트랜잭션 안에서 갱신합니다.
+# API(주문 생성/취소)뿐 아니라 세션을 통한 모든 Order 변경이 집계에 반영됩니다.
+
+def _upsert_statement(dialect_name):
+    """집계 행을 원자적으로 더하는 INSERT ... ON CONFLICT DO UPDATE 문을 만듭니다."""
+    stmt = dialect_insert(dialect_name, DailySalesRollup.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=['user_id', 'date', 'payment_method'],
+        set_={
+            'total_sales': DailySalesRollup.__table__.c.total_sales + stmt.excluded.total_sales,
+            'order_count': DailySalesRollup.__table__.c.order_count + stmt.excluded.order_count,
+        }
+    )
+
+def _old_value(order, attr):
+    """flush 이전의 속성 값을 반환합니다. 변경되지 않았다면 현재 값입니다."""
+    history = inspect(order).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(order, attr)
+
+def _contribution(user_id, order_date, payment_method, status, total_amount):
+    """주문 하나가 집계에 기여하는 (키, 금액, 건수)를 반환합니다. 완료 상태가 아니면 None."""
+    if status != 'completed':
+        return None
+    return (user_id, order_date.date(), payment_method), total_amount, 1
+
+def _collect_deltas(session):
+    deltas = {}
+
+    def add(contribution, sign):
+        if contribution is None:
+            return
+        key, amount, count = contribution
+        total, orders = deltas.get(key, (0, 0))
+        deltas[key] = (total + sign * amount, orders + sign * count)
+
+    def current(order):
+        return _contribution(order.user_id, order.order_date, order.payment_method, order.status, order.total_amount)
+
+    def previous(order):
+        return _contribution(*(_old_value(order, attr) for attr in
+                               ('user_id', 'order_date', 'payment_method', 'status', 'total_amount')))
+
+    for obj in session.new:
+        if isinstance(obj, Order):
+            add(current(obj), 1)
+    for obj in session.dirty:
+        if isinstance(obj, Order) and session.is_modified(obj, include_collections=False):
+            add(previous(obj), -1)
+            add(current(obj), 1)
+    for obj in session.deleted:
+        if isinstance(obj, Order):
+            add(previous(obj), -1)
+    return {key: delta for key, delta in deltas.items() if delta != (0, 0)}
+
+@event.listens_for(db.session, 'after_flush')
+def _update_rollup_after_flush(session, flush_context):
+    deltas = _collect_deltas(session)
+    if not deltas:
+        return
+    connection = session.connection()
+    connection.execute(_upsert_statement(connection.dialect.name), [
+        {'user_id': user_id, 'date': date, 'payment_method': payment_method,
+         'total_sales': total, 'order_count': count}
+        for (user_id, date, payment_method), (total, count) in deltas.items()
+    ])
+
+def _raw_sales_query():
+    """원본 주문 테이블에서 (사용자, 날짜, 결제수단)별 매출을 집계하는 쿼리입니다."""
+    sale_date = func.date(Order.order_date)
+    return db.session.query(
+        Order.user_id, sale_date, Order.payment_method,
+        func.sum(Order.total_amount), func.count(Order.id)
+    ).filter(Order.status == 'completed').group_by(Order.user_id, sale_date, Order.payment_method)
+
+def rebuild_sales_rollup():
+    """집계 테이블을 비우고 주문 내역 전체로부터 다시 만듭니다. 생성한 집계 행 수를 반환합니다."""
+    DailySalesRollup.query.delete()
+    rows = [
+        {'user_id': user_id, 'date': _as_date(sale_date), 'payment_method': payment_method,
+         'total_sales': total, 'order_count': count}
+        for user_id, sale_date, payment_method, total, count in _raw_sales_query()
+    ]
+    if rows:
+        db.session.execute(DailySalesRollup.__table__.insert(), rows)
+    db.session.commit()
+    return len(rows)
+
+def find_rollup_mismatches():
+    """집계 테이블과 원본 주문 집계가 다른 (키, 집계값, 원본값) 목록을 반환합니다. 비어 있으면 일치합니다."""
+    raw = {
+        (user_id, _as_date(sale_date), payment_method): (total, count)
+        for user_id, sale_date, payment_method, total, count in _raw_sales_query()
+    }
+    rollup = {
+        (r.user_id, r.date, r.payment_method): (r.total_sales, r.order_count)
+        for r in DailySalesRollup.query.all()
+        if (r.total_sales, r.order_count) != (0, 0)
+    }
+    return [
+        {'key': key, 'rollup': rollup.get(key, (0, 0)), 'raw': raw.get(key, (0, 0))}
+        for key in sorted(set(raw) | set(rollup), key=str)
+        if rollup.get(key, (0, 0)) != raw.get(key, (0, 0))
+    ]
+
+def _as_date(value):
+    # SQLite의 date() 함수는 'YYYY-MM-DD' 문자열을 반환합니다.
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value)
+    return value
@@ -0,0 +1,93 @@
+from sqlalchemy import DDL, case, event, literal_column, or_, table, column
+
+from extensions import db
+from models import Product, Customer
+
+# 상품/거래처 검색용 SQLite FTS5 인덱스입니다.
+# trigram 토크나이저는 띄어쓰기 단위가 아닌 3글자 단위로 색인하므로 한글 상품명의 부분 문자열도 찾을 수 있습니다.
+#  - 검색어가 3글자 이상: FTS5 MATCH (부분 문자열 일치, 접두어 일치를 먼저, 그 다음 bm25 순위)
+#  - 검색어가 1~2글자: trigram으로는 찾을 수 없으므로 기존과 같은 LIKE '%검색어%' 부분 문자열 검색
+#    (한 글자 한글 검색이 많으므로 접두어 검색으로 좁히지 않습니다.)
+# 인덱스는 원본 테이블의 트리거로 같은 트랜잭션에서 갱신됩니다. (external content 테이블)
+# product는 INTEGER PRIMARY KEY가 없어 VACUUM 후 rowid가 바뀔 수 있으므로, VACUUM 뒤에는
+# flask rebuild-search-index 명령으로 인덱스를 다시 만들어야 합니다.
+TRIGRAM_MIN_LENGTH = 3
+
+product_fts = table('product_fts', column('rowid'), column('rank'))
+customer_fts = table('customer_fts', column('rowid'), column('rank'))
+
+_SEARCH_INDEXES = {
+    # FTS 테이블 이름: (원본 테이블, rowid 컬럼, 색인할 컬럼들)
+    'product_fts': ('product', 'rowid', ('id', 'name')),
+    'customer_fts': ('customer', 'id', ('name', 'phone_number')),
+}
+
+
+def _create_ddl(fts_name, source, rowid, columns):
+    cols = ', '.join(columns)
+    new_values = ', '.join(f'new.{c}' for c in columns)
+    old_values = ', '.join(f'old.{c}' for c in columns)
+    changed = ' OR '.join(f'old.{c} IS NOT new.{c}' for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_name} USING fts5("
+        f"{cols}, content='{source}', content_rowid='{rowid}', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_name}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {fts_name}(rowid, {cols}) VALUES (new.{rowid}, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_name}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {fts_name}({fts_name}, rowid, {cols}) VALUES ('delete', old.{rowid}, {old_values}); END",
+        # 재고/잔액처럼 검색과 무관한 컬럼만 바뀐 경우에는 인덱스를 건드리지 않습니다.
+        f"CREATE TRIGGER IF NOT EXISTS {fts_name}_au AFTER UPDATE ON {source} WHEN {changed} BEGIN "
+        f"INSERT INTO {fts_name}({fts_name}, rowid, {cols}) VALUES ('delete', old.{rowid}, {old_values}); "
+        f"INSERT INTO {fts_name}(rowid, {cols}) VALUES (new.{rowid}, {new_values}); END",
+    ]
+
+
+def _register_ddl(model, fts_name):
+    source, rowid, columns = _SEARCH_INDEXES[fts_name]
+    for statement in _create_ddl(fts_name, source, rowid, columns):
+        event.listen(model.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+    event.listen(model.__table__, 'before_drop',
+                 DDL(f'DROP TABLE IF EXISTS {fts_name}').execute_if(dialect='sqlite'))
+
+
+_register_ddl(Product, 'product_fts')
+_register_ddl(Customer, 'customer_fts')
+
+
+def is_search_index_table(name):
+    """FTS 가상 테이블과 그 섀도 테이블(product_fts_data 등)이면 True. 모델에 없으므로 alembic 비교에서 제외합니다."""
+    return any(name == fts_name or name.startswith(fts_name + '_') for fts_name in _SEARCH_INDEXES)
+
+
+def rebuild_search_indexes():
+    """FTS 인덱스를 원본 테이블 내용으로 다시 만듭니다. (VACUUM 이후 등)"""
+    for fts_name in _SEARCH_INDEXES:
+        db.session.execute(db.text(f"INSERT INTO {fts_name}({fts_name}) VALUES ('rebuild')"))
+    db.session.commit()
+
+
+def _use_fts():
+    return db.session.get_bind().dialect.name == 'sqlite'
+
+
+def _match_phrase(term):
+    # 검색어 전체를 하나의 구(phrase)로 취급하여 FTS5 문법 문자가 해석되지 않도록 합니다.
+    return '"' + term.replace('"', '""') + '"'
+
+
+def search_products(query, term):
+    """상품 쿼리에 검색 조건과 관련도 정렬을 적용합니다."""
+    if not _use_fts() or len(term) < TRIGRAM_MIN_LENGTH:
+        return query.filter(or_(Product.name.like(f'%{term}%'), Product.id.like(f'%{term}%'))).order_by(Product.name)
+    return (query.join(product_fts, product_fts.c.rowid == literal_column('product.rowid'))
+            .filter(literal_column('product_fts').op('MATCH')(_match_phrase(term)))
+            .order_by(case((Product.name.like(f'{term}%'), 0), else_=1), product_fts.c.rank, Product.name))
+
+
+def search_customers(query, term):
+    """거래처 쿼리에 검색 조건과 관련도 정렬을 적용합니다."""
+    if not _use_fts() or len(term) < TRIGRAM_MIN_LENGTH:
+        return query.filter(or_(Customer.name.like(f'%{term}%'), Customer.phone_number.like(f'%{term}%'))).order_by(Customer.name)
+    return (query.join(customer_fts, customer_fts.c.rowid == Customer.id)
+            .filter(literal_column('customer_fts').op('MATCH')(_match_phrase(term)))
+            .order_by(case((Customer.name.like(f'{term}%'), 0), else_=1), customer_fts.c.rank, Customer.name))
@@ -0,0 +1,143 @@
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import time
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+# 느린 쿼리 로그입니다. SLOW_QUERY_THRESHOLD_MS 이상 걸린 SQL 문장마다 JSONL 한 줄을 남깁니다.
+#  - SQL 문장, 바인딩 파라미터, 실행 시간, 요청 중이면 엔드포인트(블루프린트.함수)와 메서드
+#  - 같은 연결에서 바로 실행한 실행 계획 (SQLite는 EXPLAIN QUERY PLAN, 그 밖의 DB는 EXPLAIN)
+# 파일은 SLOW_QUERY_LOG_MAX_BYTES마다 회전하며 SLOW_QUERY_LOG_BACKUP_COUNT개까지 보관합니다.
+# 로그에서 plan에 'SCAN'이 있는 항목을 찾으면 인덱스를 타지 못한 쿼리를 확인할 수 있습니다.
+# 이름에 password/secret/token이 들어간 파라미터(예: 비밀번호 재해시 UPDATE의 password_hash)는 값을 가려서 기록합니다.
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+_SAVEPOINT = 'slow_query_explain'
+_SENSITIVE_NAMES = ('password', 'secret', 'token')
+_REDACTED = '[REDACTED]'
+
+
+def _slow_query_logger(path, max_bytes, backup_count):
+    # 같은 파일에는 핸들러를 하나만 붙입니다. (create_app이 여러 번 호출되는 경우)
+    logger = logging.getLogger(f'pos.slow_query.{os.path.abspath(path)}')
+    if not logger.handlers:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def _is_sensitive(name):
+    return any(word in name.lower() for word in _SENSITIVE_NAMES)
+
+
+def _redact_parameters(statement, parameters, names=None, executemany=False):
+    """로그에 남길 바인딩 파라미터에서 민감한 값을 가립니다.
+
+    딕셔너리 파라미터는 키로, 위치 파라미터는 names(컴파일된 문장의 파라미터 이름 순서)로 판단합니다.
+    이름을 알 수 없는 위치 파라미터는 문장에 민감한 이름이 있으면 전체를 가립니다.
+    """
+    def redact(params):
+        if isinstance(params, dict):
+            return {key: _REDACTED if _is_sensitive(key) else value for key, value in params.items()}
+        if names is not None and len(names) == len(params):
+            return [_REDACTED if _is_sensitive(name) else value for name, value in zip(names, params)]
+        return _REDACTED if _is_sensitive(statement) else params
+
+    if not parameters:
+        return parameters
+    if executemany:
+        return [redact(params) for params in parameters]
+    return redact(parameters)
+
+
+def _positional_names(context):
+    compiled = getattr(context, 'compiled', None)
+    return getattr(compiled, 'positiontup', None) if compiled is not None else None
+
+
+def explain(dbapi_connection, dialect_name, statement, parameters):
+    """같은 DBAPI 연결에서 statement의 실행 계획을 조회하여 문자열 목록으로 반환합니다.
+
+    요청의 트랜잭션이 열려 있는 연결이므로, PostgreSQL 등에서는 SAVEPOINT 안에서 실행합니다.
+    EXPLAIN이 실패해도 savepoint까지만 되돌리므로 트랜잭션이 중단(aborted) 상태가 되지 않습니다.
+    (SQLite는 문장 오류가 트랜잭션을 중단시키지 않으므로 바로 실행합니다.)
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        if dialect_name == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+            return [str(row[-1]) for row in cursor.fetchall()]  # (id, parent, notused, detail)
+        cursor.execute(f'SAVEPOINT {_SAVEPOINT}')
+        try:
+            cursor.execute('EXPLAIN ' + statement, parameters)
+            return [str(row[0]) for row in cursor.fetchall()]
+        except Exception:
+            cursor.execute(f'ROLLBACK TO SAVEPOINT {_SAVEPOINT}')
+            raise
+        finally:
+            cursor.execute(f'RELEASE SAVEPOINT {_SAVEPOINT}')
+    finally:
+        cursor.close()
+
+
+def init_slow_query_log(app, engine):
+    """SLOW_QUERY_LOG_ENABLED이면 engine에서 실행 시간이 임계값 이상인 SQL을 JSONL 파일에 기록하도록 등록합니다."""
+    if not app.config.get('SLOW_QUERY_LOG_ENABLED', True):
+        return
+    threshold = app.config.get('SLOW_QUERY_THRESHOLD_MS', 200) / 1000
+    logger = _slow_query_logger(
+        app.config.get('SLOW_QUERY_LOG_PATH') or os.path.join(app.instance_path, 'slow_queries.jsonl'),
+        app.config.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024),
+        app.config.get('SLOW_QUERY_LOG_BACKUP_COUNT', 5),
+    )
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'handle_error')
+    def _discard_timer(exception_context):
+        # 실패한 문장은 after_cursor_execute가 호출되지 않으므로, 쌓아 둔 시작 시각을 여기서 꺼냅니다.
+        conn = exception_context.connection
+        starts = conn.info.get('slow_query_start') if conn is not None else None
+        if starts:
+            starts.pop()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _log_if_slow(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('slow_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if elapsed < threshold:
+            return
+
+        entry = {
+            'timestamp': datetime.datetime.utcnow().isoformat(),
+            'duration_ms': round(elapsed * 1000, 3),
+            'endpoint': request.endpoint if has_request_context() else None,
+            'method': request.method if has_request_context() else None,
+            'statement': statement,
+            'parameters': _redact_parameters(statement, parameters, _positional_names(context), executemany),
+            'executemany': executemany,
+            'plan': None,
+        }
+        words = statement.lstrip().split(None, 1)
+        if words and words[0].upper() in _EXPLAINABLE:
+            # executemany는 첫 번째 파라미터 묶음으로 실행 계획을 구합니다.
+            plan_parameters = parameters[0] if executemany and parameters else parameters
+            try:
+                entry['plan'] = explain(conn.connection.dbapi_connection, engine.dialect.name,
+                                        statement, plan_parameters)
+            except Exception as e:
+                # 실행 계획을 얻지 못하면 오류만 기록합니다. (explain()이 savepoint로 트랜잭션을 보호합니다.)
+                entry['plan_error'] = str(e)
+        logger.info(json.dumps(entry, ensure_ascii=False, default=str))
@@ -0,0 +1,42 @@
+from sqlalchemy import event
+
+# SQLite 연결마다 적용할 PRAGMA 프로필입니다.
+# 'production'은 여러 계산대가 동시에 쓰는 환경을 위한 설정입니다.
+#  - WAL: 읽기와 쓰기가 서로를 막지 않고, 커밋이 롤백 저널보다 가볍습니다.
+#  - synchronous=NORMAL: WAL 모드에서는 전원 장애 시에도 DB가 손상되지 않으며 fsync 횟수가 줄어듭니다.
+#  - busy_timeout: 잠금이 풀릴 때까지 기다렸다가 재시도하므로 'database is locked' 오류가 줄어듭니다.
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,        # ms
+        'cache_size': -20000,        # 음수는 KiB 단위 (약 20MB)
+        'mmap_size': 268435456,      # 256MB
+        'temp_store': 'MEMORY',
+    },
+}
+
+def sqlite_pragmas(config):
+    """앱 설정의 SQLITE_PROFILE과 SQLITE_PRAGMAS(개별 덮어쓰기)를 합쳐 적용할 PRAGMA 딕셔너리를 만듭니다."""
+    profile = config.get('SQLITE_PROFILE', 'default')
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE '{profile}'. Choose one of: {', '.join(SQLITE_PROFILES)}")
+    return {**SQLITE_PROFILES[profile], **config.get('SQLITE_PRAGMAS', {})}
+
+def init_sqlite_tuning(app, engine):
+    """engine이 SQLite이면 새 연결이 만들어질 때마다 설정된 PRAGMA를 실행하도록 등록합니다."""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(app.config)
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
@@ -25,7 +25,8 @@ document.addEventListener('DOMContentLoaded', () => {
     
     // --- 초기화 함수 ---
     async function initialize() {
-        const response = await fetch('/api/customers');
+        // 서버가 ETag로 재검증하므로 변경이 없으면 304(본문 없음)로 브라우저 캐시를 재사용합니다.
+        const response = await fetch('/api/customers', { cache: 'no-cache' });
         const customers = await response.json();
         displayCustomers(customers);
     }
@@ -44,7 +45,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     async function displayProducts() {
         gridContainer.innerHTML = '';
-        const response = await fetch('/api/products');
+        const response = await fetch('/api/products', { cache: 'no-cache' });
         const products = await response.json();
         products.forEach(product => {
             const button = document.createElement('button');
@@ -0,0 +1,128 @@
+import datetime
+
+from sqlalchemy import and_, event, func, inspect, insert, literal, or_, select, case
+
+from extensions import db
+from models import Product, StockMovement, StockSnapshot
+
+# 재고 변경 원장(StockMovement)과 주기적 스냅샷(StockSnapshot)입니다.
+#  - inventory 모듈의 Core UPDATE(주문/주문 취소/매입/일괄 조정)는 같은 트랜잭션에서 원장을 직접 기록합니다.
+#  - ORM으로 Product.stock_quantity를 바꾸는 경우(상품 등록/수정, 단건 재고 조정)는 after_flush 이벤트가 기록합니다.
+# 특정 시점의 재고는 원장 전체를 다시 더하지 않고, 그 시점 이전의 가장 최근 스냅샷에
+# 스냅샷 이후의 변경분만 더해서 계산합니다. 스냅샷은 flask snapshot-stock 명령으로 주기적으로 기록합니다.
+
+
+def record_stock_movements(changes, reason, reference_id=None):
+    """{product_id: 증감량}을 원장에 executemany 한 번으로 기록합니다."""
+    record_stock_movements_by_reference({reference_id: changes}, reason)
+
+
+def record_stock_movements_by_reference(changes_by_reference, reason):
+    """{reference_id: {product_id: 증감량}}을 참조(매입 등)별 원장 행으로 executemany 한 번에 기록합니다."""
+    now = datetime.datetime.utcnow()
+    rows = [{'product_id': product_id, 'quantity_change': delta, 'reason': reason,
+             'reference_id': reference_id, 'created_at': now}
+            for reference_id, changes in changes_by_reference.items()
+            for product_id, delta in changes.items() if delta]
+    if rows:
+        db.session.execute(insert(StockMovement), rows)
+
+
+def record_stock_level_changes(levels, reason, reference_id=None):
+    """{product_id: 새 재고 수량}으로 바꾸기 전에, 현재 재고와의 차이를 INSERT ... SELECT 한 번으로 원장에 기록합니다.
+
+    재고를 실제로 바꾸는 UPDATE보다 먼저, 같은 트랜잭션에서 호출해야 합니다.
+    """
+    if not levels:
+        return
+    change = case(levels, value=Product.id) - Product.stock_quantity
+    db.session.execute(
+        insert(StockMovement).from_select(
+            ['product_id', 'quantity_change', 'reason', 'reference_id', 'created_at'],
+            select(Product.id, change, literal(reason), literal(reference_id, db.Integer),
+                   literal(datetime.datetime.utcnow()))
+            .where(Product.id.in_(list(levels)), change != 0)
+        )
+    )
+
+
+def _orm_stock_changes(session):
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Product) and obj.stock_quantity:
+            changes.append((obj.id, obj.stock_quantity, 'initial'))
+    for obj in session.dirty:
+        if not isinstance(obj, Product):
+            continue
+        history = inspect(obj).attrs.stock_quantity.history
+        # 이전 값이 로드되지 않은 채로 덮어쓴 경우에는 증감량을 알 수 없으므로 기록하지 않습니다.
+        if history.added and history.deleted and history.added[0] != history.deleted[0]:
+            changes.append((obj.id, history.added[0] - history.deleted[0], 'adjustment'))
+    return changes
+
+
+@event.listens_for(db.session, 'after_flush')
+def _record_orm_stock_changes(session, flush_context):
+    changes = _orm_stock_changes(session)
+    if not changes:
+        return
+    now = datetime.datetime.utcnow()
+    session.connection().execute(StockMovement.__table__.insert(), [
+        {'product_id': product_id, 'quantity_change': delta, 'reason': reason,
+         'reference_id': None, 'created_at': now}
+        for product_id, delta, reason in changes
+    ])
+
+
+def take_stock_snapshot(taken_at=None):
+    """현재 모든 상품의 재고를 INSERT ... SELECT 한 번으로 스냅샷에 기록하고 기록한 상품 수를 반환합니다.
+
+    taken_at은 문장 실행 전에 정해지므로, 그 사이에 커밋된 원장은 시각만으로는 스냅샷 포함 여부를 알 수 없습니다.
+    그래서 재고를 읽는 같은 문장에서 원장의 마지막 id를 함께 기록하고, 이후 계산은 그 id를 기준으로 합니다.
+    """
+    taken_at = taken_at or datetime.datetime.utcnow()
+    last_movement_id = select(func.coalesce(func.max(StockMovement.id), 0)).scalar_subquery()
+    result = db.session.execute(
+        insert(StockSnapshot).from_select(
+            ['product_id', 'taken_at', 'stock_quantity', 'last_movement_id'],
+            select(Product.id, literal(taken_at), Product.stock_quantity, last_movement_id)
+        )
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def stock_as_of_query(at):
+    """at 시점의 상품별 재고 (product_id, stock_quantity)를 조회하는 쿼리를 만듭니다.
+
+    상품마다 at 이전의 가장 최근 스냅샷 수량에, 스냅샷 이후 at까지의 원장 변경분을 더합니다.
+    스냅샷이 없는 상품은 원장 전체를 더합니다. 원장 합계는 (product_id, created_at) 인덱스 범위 조회입니다.
+    스냅샷 이후 여부는 스냅샷에 기록된 원장 id로 판단하고, id가 없는 예전 스냅샷만 시각으로 판단합니다.
+    """
+    latest = (
+        select(StockSnapshot.product_id, func.max(StockSnapshot.taken_at).label('taken_at'))
+        .where(StockSnapshot.taken_at <= at)
+        .group_by(StockSnapshot.product_id)
+        .subquery()
+    )
+    since_snapshot = (
+        select(func.coalesce(func.sum(StockMovement.quantity_change), 0))
+        .where(StockMovement.product_id == Product.id, StockMovement.created_at <= at,
+               or_(latest.c.taken_at.is_(None),
+                   StockMovement.id > StockSnapshot.last_movement_id,
+                   and_(StockSnapshot.last_movement_id.is_(None), StockMovement.created_at > latest.c.taken_at)))
+        .scalar_subquery()
+    )
+    return (
+        select(Product.id.label('product_id'),
+               (func.coalesce(StockSnapshot.stock_quantity, 0) + since_snapshot).label('stock_quantity'))
+        .outerjoin(latest, latest.c.product_id == Product.id)
+        .outerjoin(StockSnapshot, and_(StockSnapshot.product_id == latest.c.product_id,
+                                       StockSnapshot.taken_at == latest.c.taken_at))
+        .order_by(Product.id)
+    )
+
+
+def stock_as_of(at):
+    """at 시점의 재고를 {product_id: 수량} 딕셔너리로 반환합니다."""
+    return {row.product_id: row.stock_quantity for row in db.session.execute(stock_as_of_query(at))}
@@ -0,0 +1,95 @@
+import hashlib
+
+from flask import current_app, request, jsonify
+from sqlalchemy import event
+
+from extensions import db
+from models import Product, Customer, Supplier, Order, TableVersion
+from upsert import dialect_insert
+
+# 테이블이 변경될 때마다 TableVersion의 버전 번호를 같은 트랜잭션 안에서 1 증가시키고,
+# 목록 API는 이 번호로 강한(strong) ETag를 만들어 If-None-Match 요청에 304로 응답합니다.
+# 버전은 DB에 저장되므로 여러 워커 프로세스가 같은 ETag를 사용합니다.
+# 변경된 테이블 이름은 flush/Core UPDATE 시점에는 세션에 모아 두기만 하고, 커밋 직전(before_commit)에
+# 테이블 이름 순서로 한 번에 올립니다. 버전 행의 잠금을 트랜잭션 끝에서 잠깐만 잡고 항상 같은 순서로 잡으므로,
+# 동시에 진행되는 주문 생성/취소가 버전 행에서 오래 기다리거나 교착 상태에 빠지지 않습니다.
+TRACKED_TABLES = {
+    Product: 'product',
+    Customer: 'customer',
+    Supplier: 'supplier',
+    # 매출 분석 결과의 캐시 키와 ETag에 사용합니다. (sales_analytics.py 참고)
+    Order: 'order',
+}
+
+
+def _bump_statement(dialect_name):
+    stmt = dialect_insert(dialect_name, TableVersion.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=['table_name'],
+        set_={'version': TableVersion.__table__.c.version + 1}
+    )
+
+
+_PENDING_KEY = 'pending_table_versions'
+
+
+def _bump(connection, table_names):
+    connection.execute(_bump_statement(connection.dialect.name),
+                       [{'table_name': name, 'version': 1} for name in sorted(table_names)])
+
+
+def _mark(session, table_names):
+    if table_names:
+        session.info.setdefault(_PENDING_KEY, set()).update(table_names)
+
+
+def bump_table_version(*table_names):
+    """ORM flush를 거치지 않는 변경(Core UPDATE 등) 후에 호출하여, 커밋할 때 테이블 버전을 올리도록 표시합니다."""
+    _mark(db.session, table_names)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _mark_versions_after_flush(session, flush_context):
+    _mark(session, {
+        TRACKED_TABLES[type(obj)]
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if type(obj) in TRACKED_TABLES
+    })
+
+
+@event.listens_for(db.session, 'before_commit')
+def _bump_versions_before_commit(session):
+    # 커밋 과정의 flush는 이 이벤트 뒤에 실행되므로, 남은 변경을 먼저 flush해서 변경된 테이블을 모두 모읍니다.
+    session.flush()
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        _bump(session.connection(), pending)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_versions_after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def current_table_version(table_name):
+    return db.session.query(TableVersion.version).filter_by(table_name=table_name).scalar() or 0
+
+
+def conditional_json(table_name, loader, scope=''):
+    """테이블 버전 기반 ETag로 조건부 GET을 처리합니다.
+
+    클라이언트의 If-None-Match가 현재 ETag와 같으면 loader를 호출하지 않고 304를 반환합니다.
+    scope에는 응답 내용을 구분하는 값(사용자 ID 등)을 넘기며, 쿼리 문자열도 ETag에 포함됩니다.
+    """
+    version = current_table_version(table_name)
+    variant = hashlib.sha1(f'{scope}?{request.query_string.decode()}'.encode()).hexdigest()[:12]
+    etag = f'{table_name}-{version}-{variant}'
+
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(loader())
+    response.set_etag(etag)
+    # 브라우저가 캐시한 응답을 쓰기 전에 항상 서버에 재검증하도록 합니다.
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
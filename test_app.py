@@ -1,13 +1,40 @@
 import pytest
 import datetime
-from app import app, db, User, Product, Order, OrderItem, Customer, PaymentTransaction, Supplier, PurchaseOrder, PurchaseOrderItem
- 
+import contextlib
+import csv
+import io
+import json
+import sqlite3
+import threading
+from flask import g
+from sqlalchemy import delete, event, text, update
+from sqlalchemy.dialects import postgresql, sqlite as sqlite_dialect
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.security import generate_password_hash
+import cache as cache_module
+import passwords
+import product_import
+from app import create_app
+from cache import TTLCache
+from concurrency import run_with_retry, DEFAULT_RETRY_ATTEMPTS
+from extensions import db
+from models import (User, Product, Order, OrderItem, Customer, PaymentTransaction, Supplier, PurchaseOrder,
+                    PurchaseOrderItem, DailySalesRollup, StockMovement, StockSnapshot, ReceivableEntry, TableVersion)
+from passwords import needs_rehash
+from sales_analytics import analytics_cache
+from slow_query_log import explain
+from stock_ledger import stock_as_of, take_stock_snapshot
+from table_versions import bump_table_version
+from upsert import dialect_insert
+from user_cache import user_cache
+
+# 테스트 전체에서 사용하는 앱입니다. testing 설정은 메모리 SQLite DB를 사용합니다.
+app = create_app('testing')
+
 @pytest.fixture(scope='function')
 def client():
     """테스트를 위한 가상 클라이언트 및 테스트 DB를 생성합니다."""
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:' 
-    
     with app.app_context():
         db.drop_all() # Ensure a clean slate before creating tables
         db.create_all()
@@ -36,6 +63,28 @@ def logged_in_client(client):
     yield client
     # 테스트 종료 후에는 client fixture에서 db.drop_all()로 정리됩니다.
 
+@contextlib.contextmanager
+def count_queries():
+    """블록 안에서 실행된 SQL 문장을 (statement, parameters) 목록으로 수집합니다. (N+1 쿼리 회귀 테스트용)"""
+    statements = []
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', _record)
+
+def explain_query_plan(statement, parameters=()):
+    """SQLite의 EXPLAIN QUERY PLAN 결과(detail 컬럼)를 하나의 문자열로 반환합니다."""
+    rows = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+    return ' / '.join(row[-1] for row in rows)
+
+def find_statement(statements, *fragments):
+    """수집된 SQL 중 모든 fragment를 포함하는 첫 문장을 찾습니다."""
+    return next((stmt, params) for stmt, params in statements if all(f in stmt for f in fragments))
+
 # --- Phase 1: 상품 CRUD 테스트 ---
 # (이전 단계에서 작성한 상품 관련 테스트들은 그대로 둡니다)
 def test_product_api_unauthorized(client):
@@ -345,7 +394,6 @@ def test_create_order_success(logged_in_client):
     assert 'order_id' in response.json
 
     # 추가 검증: DB에 주문 및 주문 항목이 생성되었는지 확인
-    from app import Order, OrderItem # Order, OrderItem 모델 임포트
     with app.app_context():
         order = Order.query.get(response.json['order_id'])
         assert order is not None
@@ -695,7 +743,6 @@ def test_get_monthly_sales_invalid_params(logged_in_client):
 def test_get_orders_by_date_range(logged_in_client):
     """특정 기간의 주문 내역을 성공적으로 조회하는지 테스트합니다."""
     # GIVEN: 다른 날짜에 여러 주문을 생성
-    from app import Order, User
     with app.app_context(): # 이 테스트도 OrderItem 생성 없이 Order만 생성하므로 재고 감소는 일어나지 않음.
         user = User.query.filter_by(username='testuser').first()
 
@@ -1002,4 +1049,1549 @@ def test_delete_supplier_with_purchase_orders_fails(logged_in_client):
 
     # THEN: 400 Bad Request 에러가 발생해야 함
     assert delete_res.status_code == 400
-    assert 'Cannot delete supplier' in delete_res.json['error']
\ No newline at end of file
+    assert 'Cannot delete supplier' in delete_res.json['error']
+
+# --- [신규 추가] Phase 9: 주문 조회 성능(N+1 쿼리) 테스트 ---
+def _create_orders_with_items(count):
+    """거래처가 있는 주문을 count개 생성합니다. (API를 거치지 않고 직접 생성)"""
+    user = User.query.filter_by(username='testuser').first()
+    customer = Customer(name='대량주문거래처', user_id=user.id)
+    db.session.add(customer)
+    for _ in range(count):
+        order = Order(total_amount=13000, user_id=user.id, customer=customer)
+        order.items.append(OrderItem(product_id='P01', quantity=1, price_per_unit=5000))
+        order.items.append(OrderItem(product_id='P02', quantity=1, price_per_unit=8000))
+        db.session.add(order)
+    db.session.commit()
+
+def test_get_orders_query_count_is_constant(logged_in_client):
+    """주문 수가 늘어나도 주문 목록 조회의 SQL 실행 횟수가 일정한지 테스트합니다."""
+    # GIVEN: 주문 2개
+    _create_orders_with_items(2)
+    with count_queries() as few_statements:
+        response = logged_in_client.get('/api/orders')
+    assert response.status_code == 200
+    assert len(response.json) == 2
+
+    # WHEN: 주문을 20개 더 추가한 뒤 다시 조회
+    _create_orders_with_items(20)
+    with count_queries() as many_statements:
+        response = logged_in_client.get('/api/orders')
+
+    # THEN: 결과는 22개이고, 실행된 SQL 수는 동일해야 한다.
+    assert response.status_code == 200
+    assert len(response.json) == 22
+    assert len(many_statements) == len(few_statements)
+    assert response.json[0]['customer_name'] == '대량주문거래처'
+    assert {i['product_name'] for i in response.json[0]['items']} == {'근위', '닭'}
+
+def test_get_order_detail_uses_shared_serializer(logged_in_client):
+    """주문 상세 조회가 목록 조회와 동일한 형식으로 직렬화되는지 테스트합니다."""
+    _create_orders_with_items(1)
+    listed = logged_in_client.get('/api/orders').json[0]
+
+    response = logged_in_client.get(f"/api/order/{listed['id']}")
+    assert response.status_code == 200
+    assert response.json == listed
+
+def test_get_orders_keyset_pagination(logged_in_client):
+    """limit/after 파라미터로 주문 내역을 커서 기반으로 나누어 조회하는지 테스트합니다."""
+    # GIVEN: 주문 5개
+    _create_orders_with_items(5)
+    all_ids = [o['id'] for o in logged_in_client.get('/api/orders').json]
+
+    # WHEN: 2개씩 끝까지 페이지를 넘길 때
+    seen_ids = []
+    cursor = None
+    pages = 0
+    while True:
+        url = '/api/orders?limit=2' + (f'&after={cursor}' if cursor else '')
+        response = logged_in_client.get(url)
+        assert response.status_code == 200
+        seen_ids.extend(o['id'] for o in response.json['orders'])
+        cursor = response.json['next_cursor']
+        pages += 1
+        if cursor is None:
+            break
+
+    # THEN: 전체 목록과 같은 순서로 중복/누락 없이 3페이지에 걸쳐 반환되어야 한다.
+    assert pages == 3
+    assert seen_ids == all_ids
+
+def test_get_orders_pagination_invalid_params(logged_in_client):
+    """잘못된 limit/after 값에 대해 400 에러를 반환하는지 테스트합니다."""
+    assert logged_in_client.get('/api/orders?limit=abc').status_code == 400
+    assert logged_in_client.get('/api/orders?limit=0').status_code == 400
+    response = logged_in_client.get('/api/orders?after=not-a-cursor')
+    assert response.status_code == 400
+    assert 'Invalid cursor' in response.json['error']
+
+def test_get_orders_ndjson_stream(logged_in_client):
+    """format=ndjson 요청 시 주문을 한 줄에 하나씩 스트리밍하는지 테스트합니다."""
+    _create_orders_with_items(3)
+    response = logged_in_client.get('/api/orders?format=ndjson')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(lines) == 3
+    assert [o['id'] for o in lines] == [o['id'] for o in logged_in_client.get('/api/orders').json]
+    assert lines[0]['customer_name'] == '대량주문거래처'
+
+# --- [신규 추가] Phase 10: 날짜 범위 조회 인덱스 사용 테스트 ---
+def test_order_date_range_filter_uses_index(logged_in_client):
+    """기간별 주문 조회가 order_date를 함수로 감싸지 않고 (user_id, order_date) 인덱스를 사용하는지 테스트합니다."""
+    with count_queries() as statements:
+        response = logged_in_client.get('/api/orders?start_date=2025-01-01&end_date=2025-01-31')
+    assert response.status_code == 200
+
+    statement, params = find_statement(statements, 'FROM "order"', 'order_date >=')
+    assert 'date(' not in statement.lower()
+    plan = explain_query_plan(statement, params)
+    assert 'USING INDEX ix_order_user_id' in plan
+    assert 'SCAN "order"' not in plan and 'SCAN order' not in plan
+
+def test_daily_and_monthly_sales_use_index(logged_in_client):
+    """일별/월별 매출 집계가 주문 테이블을 스캔하지 않고 집계 테이블의 기본키 인덱스를 사용하는지 테스트합니다."""
+    for url in ['/api/sales/daily?date=2025-01-15', '/api/sales/monthly?year=2025&month=12']:
+        with count_queries() as statements:
+            response = logged_in_client.get(url)
+        assert response.status_code == 200
+        assert not any('FROM "order"' in stmt for stmt, _ in statements)
+
+        statement, params = find_statement(statements, 'sum(', 'FROM daily_sales_rollup')
+        plan = explain_query_plan(statement, params)
+        assert 'INDEX sqlite_autoindex_daily_sales_rollup_1' in plan
+
+def test_monthly_sales_december_boundary(logged_in_client):
+    """12월 매출 집계가 다음 해 1월 주문을 포함하지 않는지 테스트합니다."""
+    user = User.query.filter_by(username='testuser').first()
+    db.session.add_all([
+        Order(total_amount=1000, user_id=user.id, order_date=datetime.datetime(2024, 12, 31, 23, 59, 59)),
+        Order(total_amount=7000, user_id=user.id, order_date=datetime.datetime(2025, 1, 1, 0, 0, 0)),
+    ])
+    db.session.commit()
+
+    response = logged_in_client.get('/api/sales/monthly?year=2024&month=12')
+    assert response.json['total_sales'] == 1000
+    response = logged_in_client.get('/api/sales/monthly?year=2025&month=1')
+    assert response.json['total_sales'] == 7000
+
+# --- [신규 추가] Phase 11: 일별 매출 집계(DailySalesRollup) 테스트 ---
+def test_sales_rollup_follows_order_create_and_cancel(logged_in_client):
+    """주문 생성/취소 시 일별 매출 집계 테이블이 같은 트랜잭션에서 갱신되는지 테스트합니다."""
+    today = datetime.datetime.utcnow().date()
+    create_res = logged_in_client.post('/api/orders', json={
+        'items': [{'id': 'P01', 'quantity': 1, 'price': 5000}], 'total_amount': 5000
+    })
+    logged_in_client.post('/api/orders', json={
+        'items': [{'id': 'P02', 'quantity': 1, 'price': 8000}], 'total_amount': 8000
+    })
+
+    row = DailySalesRollup.query.filter_by(date=today, payment_method='cash').one()
+    assert (row.total_sales, row.order_count) == (13000, 2)
+    assert logged_in_client.get('/api/sales/daily').json['total_sales'] == 13000
+
+    # WHEN: 첫 번째 주문을 취소
+    logged_in_client.delete(f"/api/order/{create_res.json['order_id']}")
+
+    # THEN: 취소된 주문만큼 집계가 줄어야 한다.
+    db.session.expire_all()
+    row = DailySalesRollup.query.filter_by(date=today, payment_method='cash').one()
+    assert (row.total_sales, row.order_count) == (8000, 1)
+    assert logged_in_client.get('/api/sales/daily').json['total_sales'] == 8000
+
+def test_sales_rollup_rebuild_and_check_commands(logged_in_client):
+    """rebuild-sales-rollup / check-sales-rollup CLI 명령어를 테스트합니다."""
+    user = User.query.filter_by(username='testuser').first()
+    db.session.add_all([
+        Order(total_amount=1000, user_id=user.id, order_date=datetime.datetime(2025, 3, 1, 9, 0)),
+        Order(total_amount=2000, user_id=user.id, payment_method='credit', order_date=datetime.datetime(2025, 3, 1, 18, 0)),
+        Order(total_amount=4000, user_id=user.id, status='cancelled', order_date=datetime.datetime(2025, 3, 2, 9, 0)),
+    ])
+    db.session.commit()
+    runner = app.test_cli_runner()
+
+    # GIVEN: 집계 테이블이 원본과 어긋난 상태
+    DailySalesRollup.query.delete()
+    db.session.commit()
+    result = runner.invoke(args=['check-sales-rollup'])
+    assert result.exit_code != 0
+    assert 'Mismatch' in result.output
+
+    # WHEN: 집계를 재생성하면
+    result = runner.invoke(args=['rebuild-sales-rollup'])
+    assert result.exit_code == 0
+    assert 'Rebuilt 2 daily sales rollup rows.' in result.output
+
+    # THEN: 원본과 일치하고, 취소 주문은 제외되어야 한다.
+    result = runner.invoke(args=['check-sales-rollup'])
+    assert result.exit_code == 0
+    assert 'consistent' in result.output
+    assert logged_in_client.get('/api/sales/daily?date=2025-03-01').json['total_sales'] == 3000
+    assert logged_in_client.get('/api/sales/monthly?year=2025&month=3').json['total_sales'] == 3000
+
+def test_dialect_insert_builds_upsert_for_supported_dialects():
+    """집계/버전/상품 가져오기가 함께 쓰는 upsert 도우미가 DB별 ON CONFLICT 문을 만드는지 테스트합니다."""
+    for dialect in (postgresql.dialect(), sqlite_dialect.dialect()):
+        stmt = dialect_insert(dialect.name, TableVersion.__table__)
+        stmt = stmt.on_conflict_do_update(index_elements=['table_name'], set_={'version': stmt.excluded.version})
+        assert 'ON CONFLICT (table_name) DO UPDATE' in str(stmt.compile(dialect=dialect))
+    with pytest.raises(NotImplementedError):
+        dialect_insert('mysql', TableVersion.__table__)
+
+# --- [신규 추가] Phase 12: 주문 생성 시 일괄 상품 조회/조건부 재고 차감 테스트 ---
+def _add_bulk_products(count):
+    db.session.add_all([
+        Product(id=f'B{i:03d}', name=f'대량상품{i}', unit='개', price=100, stock_quantity=10)
+        for i in range(count)
+    ])
+    db.session.commit()
+
+def test_create_order_query_count_is_constant(logged_in_client):
+    """장바구니 상품 수와 관계없이 주문 생성의 SQL 실행 횟수가 일정한지 테스트합니다."""
+    _add_bulk_products(30)
+
+    def post_basket(size):
+        items = [{'id': f'B{i:03d}', 'quantity': 1, 'price': 100} for i in range(size)]
+        with count_queries() as statements:
+            response = logged_in_client.post('/api/orders', json={'items': items, 'total_amount': 100 * size})
+        assert response.status_code == 201
+        return statements
+
+    small = post_basket(2)
+    large = post_basket(30)
+    assert len(large) == len(small)
+    assert Product.query.get('B000').stock_quantity == 8
+    assert Product.query.get('B029').stock_quantity == 9
+
+def test_create_order_duplicate_lines_check_combined_stock(logged_in_client):
+    """같은 상품이 여러 줄로 담긴 경우 합계 수량으로 재고를 확인하는지 테스트합니다."""
+    response = logged_in_client.post('/api/orders', json={
+        'items': [{'id': 'P01', 'quantity': 60, 'price': 5000}, {'id': 'P01', 'quantity': 60, 'price': 5000}],
+        'total_amount': 600000
+    })
+    assert response.status_code == 400
+    assert 'Not enough stock' in response.json['error']
+    assert Product.query.get('P01').stock_quantity == 100
+
+def test_create_order_does_not_oversell_with_stale_stock(logged_in_client):
+    """조회 시점 이후 다른 계산대가 재고를 소진한 경우 주문이 거절되고 재고가 음수가 되지 않는지 테스트합니다."""
+    # GIVEN: 세션에는 재고 100으로 로드되어 있지만, DB에서는 다른 주문으로 재고가 1로 줄어든 상태
+    product = Product.query.get('P01')
+    assert product.stock_quantity == 100
+    db.session.execute(
+        Product.__table__.update().where(Product.__table__.c.id == 'P01').values(stock_quantity=1)
+    )
+
+    # WHEN: 2개를 주문하면
+    response = logged_in_client.post('/api/orders', json={
+        'items': [{'id': 'P01', 'quantity': 2, 'price': 5000}], 'total_amount': 10000
+    })
+
+    # THEN: 조건부 UPDATE가 실패하여 주문이 거절된다.
+    assert response.status_code == 400
+    assert 'Not enough stock' in response.json['error']
+    assert Order.query.count() == 0
+
+# --- [신규 추가] Phase 13: SQLite PRAGMA 프로필 테스트 ---
+def _read_pragmas(test_app, *names):
+    with test_app.app_context():
+        with db.engine.connect() as conn:
+            return {name: conn.exec_driver_sql(f'PRAGMA {name}').scalar() for name in names}
+
+def test_sqlite_production_profile_applies_pragmas(tmp_path):
+    """production 프로필이 모든 연결에 WAL/synchronous/busy_timeout 등을 적용하는지 테스트합니다."""
+    test_app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'tuned.db'}",
+        'SQLITE_PROFILE': 'production',
+        'SQLITE_PRAGMAS': {'busy_timeout': 1234},
+    })
+    pragmas = _read_pragmas(test_app, 'journal_mode', 'synchronous', 'busy_timeout', 'temp_store', 'cache_size')
+    assert pragmas['journal_mode'] == 'wal'
+    assert pragmas['synchronous'] == 1  # NORMAL
+    assert pragmas['busy_timeout'] == 1234  # SQLITE_PRAGMAS로 개별 덮어쓰기
+    assert pragmas['temp_store'] == 2  # MEMORY
+    assert pragmas['cache_size'] == -20000
+
+def test_sqlite_default_profile_keeps_sqlite_defaults(tmp_path):
+    """default 프로필은 PRAGMA를 변경하지 않고, 알 수 없는 프로필은 오류가 나는지 테스트합니다."""
+    test_app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'plain.db'}",
+        'SQLITE_PROFILE': 'default',
+    })
+    assert _read_pragmas(test_app, 'journal_mode')['journal_mode'] == 'delete'
+
+    with pytest.raises(ValueError, match='Unknown SQLITE_PROFILE'):
+        create_app('testing', {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'bad.db'}", 'SQLITE_PROFILE': 'turbo'})
+
+# --- [신규 추가] Phase 14: 환경별 설정(config.py) 테스트 ---
+def test_production_config_wires_pool_options_from_env(monkeypatch, tmp_path):
+    """production 설정이 환경 변수의 DB 주소/연결 풀 옵션을 extensions.db 엔진에 적용하는지 테스트합니다."""
+    monkeypatch.setenv('SECRET_KEY', 'prod-secret')
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'prod.db'}")
+    monkeypatch.setenv('DB_POOL_SIZE', '7')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '3')
+    monkeypatch.setenv('DB_POOL_RECYCLE', '600')
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'false')
+
+    prod_app = create_app('production')
+    assert prod_app.config['SECRET_KEY'] == 'prod-secret'
+    assert prod_app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_size'] == 7
+    with prod_app.app_context():
+        engine = db.engine
+        assert str(engine.url) == f"sqlite:///{tmp_path / 'prod.db'}"
+        assert engine.pool.size() == 7
+        assert engine.pool._max_overflow == 3
+        assert engine.pool._recycle == 600
+        assert engine.pool._pre_ping is False
+
+def test_production_config_requires_secret_key(monkeypatch):
+    """production 설정에서 SECRET_KEY 환경 변수가 없으면 앱 생성이 실패하는지 테스트합니다."""
+    monkeypatch.delenv('SECRET_KEY', raising=False)
+    with pytest.raises(RuntimeError, match='SECRET_KEY'):
+        create_app('production')
+
+def test_testing_config_uses_in_memory_database(monkeypatch):
+    """testing 설정과 POS_CONFIG 환경 변수로 설정을 선택하는지 테스트합니다."""
+    monkeypatch.setenv('POS_CONFIG', 'testing')
+    test_app = create_app()
+    assert test_app.config['TESTING'] is True
+    assert test_app.config['SQLALCHEMY_DATABASE_URI'] == 'sqlite:///:memory:'
+
+    with pytest.raises(ValueError, match='Unknown config'):
+        create_app('staging')
+
+# --- [신규 추가] Phase 15: 상품 캐시 테스트 ---
+def test_product_list_is_cached_and_invalidated_on_write(logged_in_client):
+    """상품 목록이 캐시되고, 상품 수정/주문에 의한 재고 변경 시 무효화되는지 테스트합니다."""
+    logged_in_client.get('/api/products')
+    with count_queries() as statements:
+        response = logged_in_client.get('/api/products')
+    assert response.status_code == 200
+    assert not any('FROM product' in stmt for stmt, _ in statements)
+
+    # WHEN: 상품 정보 수정 (PUT)
+    logged_in_client.put('/api/product/P01', json={'name': '근위(특)'})
+    names = {p['name'] for p in logged_in_client.get('/api/products').json}
+    assert '근위(특)' in names
+
+    # WHEN: 주문으로 재고가 줄어듦 (Core UPDATE)
+    logged_in_client.post('/api/orders', json={
+        'items': [{'id': 'P02', 'quantity': 3, 'price': 8000}], 'total_amount': 24000
+    })
+    stock = {p['id']: p['stock_quantity'] for p in logged_in_client.get('/api/products').json}
+    assert stock['P02'] == 97
+
+    # WHEN: 상품 추가/삭제
+    logged_in_client.post('/api/products', json={'id': 'P03', 'name': '새우깡', 'unit': '봉', 'price': 1500})
+    assert len(logged_in_client.get('/api/products').json) == 3
+    logged_in_client.delete('/api/product/P03')
+    assert len(logged_in_client.get('/api/products').json) == 2
+
+def test_price_lookup_is_cached_with_stats(logged_in_client):
+    """단가 조회가 캐시되고 적중/실패 통계가 집계되는지 테스트합니다."""
+    before = logged_in_client.get('/api/products/cache-stats').json
+    assert logged_in_client.get('/api/price?productId=P01').json['price'] == 5000
+    with count_queries() as statements:
+        assert logged_in_client.get('/api/price?productId=P01').json['price'] == 5000
+    assert not any('FROM product' in stmt for stmt, _ in statements)
+    after = logged_in_client.get('/api/products/cache-stats').json
+    assert after['misses'] - before['misses'] == 1
+    assert after['hits'] - before['hits'] == 1
+
+    logged_in_client.put('/api/product/P01', json={'price': 5500})
+    assert logged_in_client.get('/api/price?productId=P01').json['price'] == 5500
+    assert logged_in_client.get('/api/price?productId=P99').status_code == 404
+
+def test_ttl_cache_expiry_and_lru_eviction(monkeypatch):
+    """TTLCache가 만료된 항목과 가장 오래 사용하지 않은 항목을 제거하는지 테스트합니다."""
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+
+    c = TTLCache(ttl=10, max_entries=2)
+    c.set('a', 1)
+    c.set('b', 2)
+    assert c.get('a') == 1  # 'a'가 최근 사용 항목이 됨
+    c.set('c', 3)           # 가장 오래된 'b'가 제거됨
+    assert c.get('b') is None
+    assert c.evictions == 1
+
+    now[0] += 11
+    assert c.get('a') is None
+    assert c.stats()['hits'] == 1
+
+def test_product_list_cache_follows_table_version_from_other_workers(logged_in_client):
+    """다른 워커 프로세스가 상품을 바꿔 테이블 버전만 올라간 경우에도 이전 목록을 새 ETag로 보내지 않는지 테스트합니다."""
+    first = logged_in_client.get('/api/products')
+
+    # GIVEN: 이 프로세스의 캐시는 비우지 않고 DB의 상품과 테이블 버전만 바뀜 (다른 워커의 커밋)
+    db.session.execute(update(Product).where(Product.id == 'P01').values(price=5900))
+    bump_table_version('product')
+    db.session.commit()
+
+    # WHEN: 이전 ETag로 재검증 / THEN: 새 목록과 새 ETag를 받음
+    response = logged_in_client.get('/api/products', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != first.headers['ETag']
+    assert {p['id']: p['price'] for p in response.json}['P01'] == 5900
+
+# --- [신규 추가] Phase 16: ETag 조건부 GET 테스트 ---
+@pytest.mark.parametrize('url', ['/api/products', '/api/customers', '/api/suppliers'])
+def test_list_endpoints_answer_if_none_match_with_304(logged_in_client, url):
+    """목록 API가 ETag를 내려주고, 변경이 없으면 If-None-Match 요청에 304로 응답하는지 테스트합니다."""
+    first = logged_in_client.get(url)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert etag and not etag.startswith('W/')
+    assert 'no-cache' in first.headers['Cache-Control']
+
+    revalidated = logged_in_client.get(url, headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+    assert revalidated.headers['ETag'] == etag
+
+def test_etag_changes_after_writes(logged_in_client):
+    """상품/거래처/공급처가 변경되면 ETag가 바뀌어 새 목록을 내려받는지 테스트합니다."""
+    def etag(url):
+        return logged_in_client.get(url).headers['ETag']
+
+    product_etag, customer_etag, supplier_etag = etag('/api/products'), etag('/api/customers'), etag('/api/suppliers')
+
+    customer_id = logged_in_client.post('/api/customers', json={'name': '이태그거래처'}).json['id']
+    logged_in_client.post('/api/suppliers', json={'name': '이태그공급처'})
+    assert etag('/api/customers') != customer_etag
+    assert etag('/api/suppliers') != supplier_etag
+
+    # 주문에 의한 재고 변경(Core UPDATE)과 외상 잔액 변경도 ETag에 반영되어야 한다.
+    customer_etag = etag('/api/customers')
+    logged_in_client.post('/api/orders', json={
+        'items': [{'id': 'P01', 'quantity': 1, 'price': 5000}], 'total_amount': 5000,
+        'payment_method': 'credit', 'customer_id': customer_id
+    })
+    assert etag('/api/products') != product_etag
+    assert etag('/api/customers') != customer_etag
+
+    response = logged_in_client.get('/api/products', headers={'If-None-Match': product_etag})
+    assert response.status_code == 200
+    assert {p['id']: p['stock_quantity'] for p in response.json}['P01'] == 99
+
+def test_etag_differs_by_search_and_user(client):
+    """검색어와 사용자에 따라 ETag가 달라지는지 테스트합니다."""
+    client.post('/api/auth/register', json={'username': 'user_a', 'password': 'pw'})
+    client.post('/api/auth/login', json={'username': 'user_a', 'password': 'pw'})
+    etag_a = client.get('/api/customers').headers['ETag']
+    assert client.get('/api/customers?search=x').headers['ETag'] != etag_a
+    client.post('/api/auth/logout')
+
+    client.post('/api/auth/register', json={'username': 'user_b', 'password': 'pw'})
+    client.post('/api/auth/login', json={'username': 'user_b', 'password': 'pw'})
+    assert client.get('/api/customers', headers={'If-None-Match': etag_a}).status_code == 200
+
+# --- [신규 추가] Phase 17: FTS5 상품/거래처 검색 테스트 ---
+def _search_names(client, url):
+    return [row['name'] for row in client.get(url).json]
+
+def test_product_search_uses_fts_with_prefix_first_ranking(logged_in_client):
+    """3글자 이상 검색어는 FTS5로 부분 문자열을 찾고, 접두어 일치 상품을 먼저 보여주는지 테스트합니다."""
+    db.session.add_all([
+        Product(id='S01', name='닭가슴살', unit='KG', price=9000),
+        Product(id='S02', name='가슴살 슬라이스', unit='팩', price=4000),
+        Product(id='S03', name='돼지목살', unit='KG', price=12000),
+    ])
+    db.session.commit()
+
+    assert _search_names(logged_in_client, '/api/products?search=가슴살') == ['가슴살 슬라이스', '닭가슴살']
+    assert _search_names(logged_in_client, '/api/products?search=S03') == ['돼지목살']
+
+    with count_queries() as statements:
+        logged_in_client.get('/api/products?search=목살a')
+    statement, params = find_statement(statements, 'product_fts MATCH')
+    assert 'VIRTUAL TABLE INDEX' in explain_query_plan(statement, params)
+
+def test_product_search_short_term_matches_substring(logged_in_client):
+    """1~2글자 검색어도 이름/ID의 중간 부분까지 찾는지(LIKE '%검색어%') 테스트합니다."""
+    db.session.add_all([
+        Product(id='S04', name='닭발', unit='KG', price=7000),
+        Product(id='S06', name='통닭', unit='마리', price=15000),
+        Product(id='S07', name='돼지목살', unit='KG', price=12000),
+    ])
+    db.session.commit()
+    logged_in_client.post('/api/customers', json={'name': '행복치킨', 'phone_number': '010-1234-5678'})
+
+    assert _search_names(logged_in_client, '/api/products?search=닭') == ['닭', '닭발', '통닭']
+    assert _search_names(logged_in_client, '/api/products?search=목살') == ['돼지목살']
+    assert _search_names(logged_in_client, '/api/products?search=P0') == ['근위', '닭']
+    assert _search_names(logged_in_client, '/api/customers?search=치킨') == ['행복치킨']
+    assert _search_names(logged_in_client, '/api/customers?search=56') == ['행복치킨']
+
+def test_search_index_follows_product_changes(logged_in_client):
+    """상품 이름 변경/삭제가 트리거로 검색 인덱스에 반영되는지 테스트합니다."""
+    logged_in_client.post('/api/products', json={'id': 'S05', 'name': '오리훈제', 'unit': '팩', 'price': 6000})
+    assert _search_names(logged_in_client, '/api/products?search=오리훈') == ['오리훈제']
+
+    logged_in_client.put('/api/product/S05', json={'name': '훈제오리'})
+    assert _search_names(logged_in_client, '/api/products?search=오리훈') == []
+    assert _search_names(logged_in_client, '/api/products?search=훈제오') == ['훈제오리']
+
+    logged_in_client.delete('/api/product/S05')
+    assert _search_names(logged_in_client, '/api/products?search=훈제오') == []
+
+def test_customer_search_by_name_and_phone(logged_in_client):
+    """거래처를 이름 부분 문자열과 전화번호로 검색하고, 다른 사용자의 거래처는 제외하는지 테스트합니다."""
+    logged_in_client.post('/api/customers', json={'name': '행복치킨 본점', 'phone_number': '010-1234-5678'})
+    logged_in_client.post('/api/customers', json={'name': '행복마트', 'phone_number': '02-555-0000'})
+    other_user = User(username='other')
+    other_user.set_password('pw')
+    db.session.add(other_user)
+    db.session.flush()
+    db.session.add(Customer(name='행복치킨 분점', user_id=other_user.id))
+    db.session.commit()
+
+    assert _search_names(logged_in_client, '/api/customers?search=치킨 본') == ['행복치킨 본점']
+    assert _search_names(logged_in_client, '/api/customers?search=1234-56') == ['행복치킨 본점']
+    assert _search_names(logged_in_client, '/api/customers?search=행복') == ['행복마트', '행복치킨 본점']
+
+# --- [신규 추가] Phase 18: 상품 대량 가져오기(upsert) 테스트 ---
+def test_import_products_csv_upserts_in_chunks_with_row_errors(logged_in_client):
+    """CSV 업로드로 상품을 일괄 등록/수정하고, 잘못된 행은 건너뛰며 줄 번호별 오류를 반환하는지 테스트합니다."""
+    csv_body = (
+        'id,name,unit,price,stock_quantity\n'
+        'P01,근위(대용량),KG,5500,\n'       # 기존 상품 수정 (재고는 유지)
+        'N01,닭날개,KG,7000,30\n'
+        'N02,,KG,7000,30\n'                 # 이름 누락
+        'N03,닭다리,KG,abc,10\n'            # 가격 오류
+        'N04,닭목,KG,3000,5\n'
+    ).encode('utf-8')
+    response = logged_in_client.post('/api/products/import?chunk_size=2', data={
+        'file': (io.BytesIO(csv_body), 'products.csv')
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    assert response.json['processed'] == 5
+    assert response.json['upserted'] == 3
+    assert response.json['error_count'] == 2
+    assert [e['line'] for e in response.json['errors']] == [4, 5]
+
+    db.session.expire_all()
+    p01 = Product.query.get('P01')
+    assert (p01.name, p01.price, p01.stock_quantity) == ('근위(대용량)', 5500, 100)
+    assert Product.query.get('N01').stock_quantity == 30
+    assert Product.query.get('N02') is None
+    # 캐시/검색 인덱스에도 반영되어야 한다.
+    assert '닭목' in {p['name'] for p in logged_in_client.get('/api/products').json}
+    assert _search_names(logged_in_client, '/api/products?search=근위(대') == ['근위(대용량)']
+
+def test_import_products_jsonl_body_and_query_count(logged_in_client):
+    """JSONL 본문을 chunk마다 고정된 수의 SQL로 반영하는지 테스트합니다."""
+    lines = '\n'.join(json.dumps({'id': f'J{i:03d}', 'name': f'상품{i}', 'unit': 'EA', 'price': 100})
+                      for i in range(250)) + '\nnot json\n'
+    with count_queries() as statements:
+        response = logged_in_client.post('/api/products/import?chunk_size=100', data=lines.encode(),
+                                         content_type='application/x-ndjson')
+    assert response.json['upserted'] == 250
+    assert response.json['errors'] == [{'line': 251, 'error': 'Invalid row format'}]
+    assert len([s for s, _ in statements if s.startswith('INSERT INTO product ')]) == 3
+    assert Product.query.count() == 252
+
+def test_import_products_chunk_size_is_capped(logged_in_client, monkeypatch):
+    """chunk_size를 아주 크게 보내도 MAX_CHUNK_SIZE 단위로 나누어 반영하는지 테스트합니다."""
+    monkeypatch.setattr(product_import, 'MAX_CHUNK_SIZE', 100)
+    lines = '\n'.join(json.dumps({'id': f'J{i:03d}', 'name': f'상품{i}', 'unit': 'EA', 'price': 100})
+                      for i in range(250))
+    with count_queries() as statements:
+        response = logged_in_client.post('/api/products/import?chunk_size=100000000', data=lines.encode(),
+                                         content_type='application/x-ndjson')
+    assert response.json['upserted'] == 250
+    assert len([s for s, _ in statements if s.startswith('INSERT INTO product ')]) == 3
+
+def test_import_products_cli(logged_in_client, tmp_path):
+    """import-products CLI 명령어로 파일을 가져오는지 테스트합니다."""
+    path = tmp_path / 'products.jsonl'
+    path.write_text('{"id": "C01", "name": "닭봉", "unit": "KG", "price": 6500, "stock_quantity": 12}\n'
+                    '{"id": "C02", "name": "닭똥집", "unit": "KG"}\n', encoding='utf-8')
+    result = app.test_cli_runner().invoke(args=['import-products', str(path)])
+    assert result.exit_code == 0
+    assert 'line 2: Missing required fields: price' in result.output
+    assert 'Processed 2 rows: 1 upserted, 1 errors.' in result.output
+    assert Product.query.get('C01').stock_quantity == 12
+
+# --- [신규 추가] Phase 19: 재고 실사 일괄 조정 API 테스트 ---
+def test_batch_stock_adjustment_applies_in_one_transaction(logged_in_client):
+    """조정량/실사 수량이 섞인 일괄 재고 조정이 고정된 수의 SQL로 반영되는지 테스트합니다."""
+    _add_bulk_products(20)
+    items = [{'product_id': f'B{i:03d}', 'adjustment': -3} for i in range(10)]
+    items += [{'product_id': f'B{i:03d}', 'counted_quantity': 42} for i in range(10, 20)]
+    items.append({'product_id': 'P01', 'counted_quantity': 0})
+
+    with count_queries() as statements:
+        response = logged_in_client.post('/api/products/stock', json={'items': items})
+
+    assert response.status_code == 200
+    assert all(r['status'] == 'ok' for r in response.json['results'])
+    assert response.json['results'][0]['stock_quantity'] == 7
+    assert len([s for s, _ in statements if s.startswith('UPDATE product')]) == 2
+    db.session.expire_all()
+    assert Product.query.get('B000').stock_quantity == 7
+    assert Product.query.get('B015').stock_quantity == 42
+    assert Product.query.get('P01').stock_quantity == 0
+
+def test_batch_stock_adjustment_rejects_whole_batch_on_invalid_item(logged_in_client):
+    """한 항목이라도 잘못되면 아무것도 반영하지 않고 항목별 결과를 반환하는지 테스트합니다."""
+    _add_bulk_products(1)
+    response = logged_in_client.post('/api/products/stock', json={'items': [
+        {'product_id': 'P01', 'adjustment': 5},
+        {'product_id': 'P02', 'adjustment': -101},
+        {'product_id': 'P99', 'counted_quantity': 1},
+        {'product_id': 'P01', 'counted_quantity': 3},
+        {'product_id': 'B000'},
+    ]})
+    assert response.status_code == 400
+    errors = [r.get('error') for r in response.json['results']]
+    assert errors == [None, 'Stock cannot go below zero', 'Product not found', 'Duplicate product in batch',
+                      'Provide exactly one of "adjustment" or "counted_quantity"']
+    db.session.expire_all()
+    assert Product.query.get('P01').stock_quantity == 100
+    assert logged_in_client.post('/api/products/stock', json={'items': []}).status_code == 400
+
+# --- [신규 추가] Phase 20: 재고 원장(StockMovement)과 스냅샷 테스트 ---
+def _movements(product_id):
+    return [(m.reason, m.quantity_change, m.reference_id) for m in
+            StockMovement.query.filter_by(product_id=product_id).order_by(StockMovement.id)]
+
+def test_every_stock_change_is_recorded_in_ledger(logged_in_client):
+    """주문/취소/매입/수동 조정/실사 등 모든 재고 변경이 원장에 기록되는지 테스트합니다."""
+    # GIVEN: fixture의 P01 상품 (초기 재고 100)
+    order_id = logged_in_client.post('/api/orders', json={
+        'items': [{'id': 'P01', 'quantity': 3, 'price': 5000}], 'total_amount': 15000}).json['order_id']
+    logged_in_client.delete(f'/api/order/{order_id}')
+    purchase_id = logged_in_client.post('/api/purchases', json={
+        'items': [{'product_id': 'P01', 'quantity': 10, 'cost_per_unit': 4000}]}).json['purchase_id']
+    logged_in_client.put('/api/product/P01/stock', json={'adjustment': -5})
+    logged_in_client.post('/api/products/stock', json={'items': [{'product_id': 'P01', 'counted_quantity': 90}]})
+
+    # THEN: 변경 사유와 참조 ID가 순서대로 남고, 원장 합계가 현재 재고와 같아야 함
+    db.session.expire_all()
+    assert _movements('P01') == [
+        ('initial', 100, None), ('order', -3, order_id), ('order_cancel', 3, order_id),
+        ('purchase', 10, purchase_id), ('adjustment', -5, None), ('stocktake', -15, None),
+    ]
+    assert Product.query.get('P01').stock_quantity == sum(q for _, q, _ in _movements('P01')) == 90
+
+def test_failed_stock_change_leaves_no_ledger_rows(logged_in_client):
+    """재고 부족으로 주문이 취소되면 원장 기록도 함께 롤백되는지 테스트합니다."""
+    response = logged_in_client.post('/api/orders', json={
+        'items': [{'id': 'P01', 'quantity': 101, 'price': 5000}], 'total_amount': 505000})
+    assert response.status_code == 400
+    assert _movements('P01') == [('initial', 100, None)]
+
+def test_cancel_with_deleted_product_records_ledger_for_restocked_items(logged_in_client):
+    """주문 상품 일부가 삭제된 뒤 취소해도, 재입고된 상품의 원장이 빠짐없이 기록되는지 테스트합니다."""
+    order_id = logged_in_client.post('/api/orders', json={
+        'items': [{'id': 'P01', 'quantity': 3, 'price': 5000}, {'id': 'P02', 'quantity': 5, 'price': 8000}],
+        'total_amount': 55000}).json['order_id']
+    # GIVEN: 주문에 포함된 P01이 삭제됨
+    db.session.execute(delete(Product).where(Product.id == 'P01'))
+    db.session.commit()
+
+    # WHEN: 주문 취소
+    assert logged_in_client.delete(f'/api/order/{order_id}').status_code == 200
+
+    # THEN: P02의 재입고가 원장에 남고, 원장으로 계산한 재고가 실제 재고와 같음
+    db.session.expire_all()
+    assert _movements('P02') == [('initial', 100, None), ('order', -5, order_id), ('order_cancel', 5, order_id)]
+    assert Product.query.get('P02').stock_quantity == 100
+    assert stock_as_of(datetime.datetime.utcnow())['P02'] == 100
+
+def test_stock_as_of_uses_snapshot_plus_later_movements(logged_in_client):
+    """특정 시점 재고가 직전 스냅샷 + 이후 원장 변경분으로 계산되는지 테스트합니다."""
+    # GIVEN: 10/1 스냅샷(재고 40) 이후 10/2, 10/5에 변경된 P02 (스냅샷 이전 원장은 무시되어야 함)
+    day = lambda d: datetime.datetime(2026, 10, d, 12)
+    StockMovement.query.delete()
+    db.session.add_all([
+        StockMovement(product_id='P02', quantity_change=999, reason='adjustment', created_at=day(1) - datetime.timedelta(hours=1)),
+        StockSnapshot(product_id='P02', taken_at=day(1), stock_quantity=40),
+        StockMovement(product_id='P02', quantity_change=-5, reason='order', created_at=day(2)),
+        StockMovement(product_id='P02', quantity_change=20, reason='purchase', created_at=day(5)),
+        StockMovement(product_id='P01', quantity_change=7, reason='initial', created_at=day(3)),
+    ])
+    db.session.commit()
+
+    # THEN
+    assert stock_as_of(day(1)) == {'P01': 0, 'P02': 40}
+    assert stock_as_of(day(3)) == {'P01': 7, 'P02': 35}
+    assert stock_as_of(day(6)) == {'P01': 7, 'P02': 55}
+
+    # WHEN: 10/6에 새 스냅샷을 기록한 뒤에는 그 이후의 원장만 더해야 함
+    take_stock_snapshot(taken_at=day(6))
+    db.session.add(StockMovement(product_id='P02', quantity_change=-1, reason='order', created_at=day(7)))
+    db.session.commit()
+    assert stock_as_of(day(8)) == {'P01': 100, 'P02': 99}
+
+    # THEN: 원장 합계는 (product_id, created_at) 인덱스 범위 조회여야 함
+    with count_queries() as statements:
+        stock_as_of(day(8))
+    stmt, params = statements[0]
+    assert len(statements) == 1
+    assert 'ix_stock_movement_product_id_created_at' in explain_query_plan(stmt, params)
+
+def test_stock_snapshot_counts_movements_by_ledger_id_not_time(logged_in_client):
+    """스냅샷 시각과 원장 커밋 순서가 어긋나도 원장이 빠지거나 두 번 더해지지 않는지 테스트합니다."""
+    # GIVEN: 스냅샷 시각(taken_at)을 정한 뒤 문장이 실행되기 전에 P01 판매가 커밋됨 (이미 스냅샷 재고에 반영됨)
+    taken_at = datetime.datetime.utcnow() - datetime.timedelta(minutes=1)
+    logged_in_client.put('/api/product/P01/stock', json={'adjustment': -10})
+    take_stock_snapshot(taken_at=taken_at)
+
+    # WHEN: 스냅샷 시각보다 이른 시각으로 기록된 P02 원장이 스냅샷 뒤에 커밋됨
+    logged_in_client.put('/api/product/P02/stock', json={'adjustment': -5})
+    db.session.execute(update(StockMovement).where(StockMovement.product_id == 'P02', StockMovement.reason == 'adjustment')
+                       .values(created_at=taken_at - datetime.timedelta(seconds=1)))
+    db.session.commit()
+
+    # THEN: P01은 한 번만, P02는 빠짐없이 반영되어 실제 재고와 같아야 함
+    now = datetime.datetime.utcnow()
+    assert stock_as_of(now) == {'P01': 90, 'P02': 95}
+
+def test_stock_as_of_api(logged_in_client):
+    """재고 평가 API가 날짜 마감 기준 재고와 평가액을 반환하는지 테스트합니다."""
+    logged_in_client.put('/api/product/P01/stock', json={'adjustment': -10})
+    today = datetime.datetime.utcnow().date().isoformat()
+
+    response = logged_in_client.get(f'/api/products/stock?as_of={today}')
+    assert response.status_code == 200
+    assert response.json[0] == {'product_id': 'P01', 'name': '근위', 'stock_quantity': 90, 'stock_value': 450000}
+    assert logged_in_client.get('/api/products/stock?as_of=2000-01-01').json[0]['stock_quantity'] == 0
+    assert logged_in_client.get('/api/products/stock').status_code == 400
+    assert logged_in_client.get('/api/products/stock?as_of=10/18').status_code == 400
+
+# --- [신규 추가] Phase 21: 낙관적 동시성 제어(version_id) 테스트 ---
+def test_update_product_with_stale_version_returns_409(logged_in_client):
+    """다른 요청이 먼저 바꾼 상품을 옛 version으로 수정하면 409와 현재 상태를 반환하는지 테스트합니다."""
+    # GIVEN: 화면에서 P01을 읽은 뒤(version 1), 다른 계산대에서 판매하여 재고가 줄어듦
+    version = logged_in_client.get('/api/product/P01').json['version']
+    logged_in_client.post('/api/orders', json={'items': [{'id': 'P01', 'quantity': 3, 'price': 5000}], 'total_amount': 15000})
+
+    # WHEN: 처음 읽은 재고(100)로 덮어쓰려고 함
+    response = logged_in_client.put('/api/product/P01', json={'name': '근위(국내산)', 'stock_quantity': 100, 'version': version})
+
+    # THEN: 판매로 줄어든 재고가 덮어써지지 않고 현재 상태가 반환되어야 함
+    assert response.status_code == 409
+    assert response.json['current']['stock_quantity'] == 97
+    assert response.json['current']['version'] == version + 1
+
+    # WHEN: 최신 version으로 다시 수정하면 성공하고 version이 증가해야 함
+    response = logged_in_client.put('/api/product/P01', json={'name': '근위(국내산)', 'version': version + 1})
+    assert response.status_code == 200
+    assert response.json['version'] == version + 2
+    db.session.expire_all()
+    assert Product.query.get('P01').stock_quantity == 97
+
+def test_update_customer_with_stale_version_returns_409(logged_in_client):
+    """거래처 수정도 version이 맞지 않으면 409로 거부되는지 테스트합니다."""
+    customer = logged_in_client.post('/api/customers', json={'name': '동시성거래처'}).json
+    logged_in_client.post('/api/orders', json={'items': [{'id': 'P01', 'quantity': 1, 'price': 5000}],
+                                               'total_amount': 5000, 'payment_method': 'credit', 'customer_id': customer['id']})
+
+    response = logged_in_client.put(f"/api/customer/{customer['id']}", json={'name': '새이름', 'version': customer['version']})
+    assert response.status_code == 409
+    assert response.json['current']['receivable_balance'] == 5000
+    # version을 보내지 않는 기존 클라이언트는 그대로 동작해야 함
+    assert logged_in_client.put(f"/api/customer/{customer['id']}", json={'name': '새이름'}).status_code == 200
+
+def test_concurrent_write_raises_stale_data_error(logged_in_client):
+    """읽은 뒤 다른 요청이 행을 바꿨다면 ORM UPDATE가 덮어쓰지 않고 StaleDataError를 내는지 테스트합니다."""
+    product = Product.query.get('P01')
+    db.session.execute(update(Product).where(Product.id == 'P01')
+                       .values(stock_quantity=50, version_id=Product.version_id + 1)
+                       .execution_options(synchronize_session=False))
+    product.stock_quantity = product.stock_quantity + 10
+    with pytest.raises(StaleDataError):
+        db.session.commit()
+    db.session.rollback()
+
+def test_run_with_retry_rereads_after_conflict(logged_in_client):
+    """버전 충돌이 나면 run_with_retry가 롤백 후 다시 읽어서 재시도하는지 테스트합니다."""
+    user = User.query.filter_by(username='testuser').first()
+    customer = Customer(name='재시도거래처', user_id=user.id)
+    db.session.add(customer)
+    db.session.commit()
+    customer_id = customer.id
+    attempts = []
+
+    def add_receivable():
+        target = db.session.get(Customer, customer_id)
+        attempts.append(target.version_id)
+        if len(attempts) == 1:
+            # 첫 시도에서는 읽은 직후 다른 계산대가 같은 거래처를 먼저 갱신한 상황을 만듭니다.
+            db.session.execute(update(Customer).where(Customer.id == customer_id)
+                               .values(version_id=Customer.version_id + 1)
+                               .execution_options(synchronize_session=False))
+        target.receivable_balance += 1000
+        db.session.commit()
+        return target.receivable_balance
+
+    assert run_with_retry(add_receivable) == 1000
+    assert len(attempts) == 2
+
+    def always_conflicts():
+        target = db.session.get(Customer, customer_id)
+        db.session.execute(update(Customer).where(Customer.id == customer_id)
+                           .values(version_id=Customer.version_id + 1)
+                           .execution_options(synchronize_session=False))
+        target.receivable_balance += 1
+        db.session.commit()
+
+    with pytest.raises(StaleDataError):
+        run_with_retry(always_conflicts, attempts=2)
+    db.session.expire_all()
+    assert db.session.get(Customer, customer_id).receivable_balance == 1000
+
+def test_run_with_retry_retries_database_locked(logged_in_client):
+    """SQLite 잠금 대기 시간 초과는 재시도하고, 계속되면 500 대신 503으로 응답하는지 테스트합니다."""
+    locked = OperationalError('COMMIT', {}, sqlite3.OperationalError('database is locked'))
+    failures = []
+
+    def fail_commit(session):
+        if failures:
+            failures.pop()
+            raise locked
+
+    # GIVEN: 첫 커밋이 다른 쓰기 트랜잭션의 잠금 때문에 실패함
+    failures.append(1)
+    event.listen(db.session, 'before_commit', fail_commit)
+    try:
+        # WHEN/THEN: 재시도로 조정이 한 번만 반영되어야 함
+        response = logged_in_client.put('/api/product/P01/stock', json={'adjustment': -10})
+        assert response.status_code == 200
+        assert response.json['stock_quantity'] == 90
+
+        # WHEN/THEN: 모든 시도가 잠금으로 실패하면 Retry-After와 함께 503을 응답해야 함
+        failures.extend([1] * DEFAULT_RETRY_ATTEMPTS)
+        response = logged_in_client.put('/api/product/P01/stock', json={'adjustment': -10})
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+    finally:
+        event.remove(db.session, 'before_commit', fail_commit)
+    db.session.expire_all()
+    assert db.session.get(Product, 'P01').stock_quantity == 90
+
+    # THEN: 잠금/직렬화 오류가 아닌 DB 오류는 재시도하지 않아야 함
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise OperationalError('SELECT', {}, sqlite3.OperationalError('no such table: missing'))
+
+    with pytest.raises(OperationalError):
+        run_with_retry(broken)
+    assert len(attempts) == 1
+
+# --- [신규 추가] Phase 22: 미수금 원장(ReceivableEntry)과 연령 보고서 테스트 ---
+def _receivable_entries(customer_id):
+    return [(e.entry_type, e.amount) for e in
+            ReceivableEntry.query.filter_by(customer_id=customer_id).order_by(ReceivableEntry.id)]
+
+def test_receivable_changes_are_atomic_and_recorded(logged_in_client):
+    """외상 판매/수금/취소가 원자적 UPDATE로 반영되고 미수금 원장에 기록되는지 테스트합니다."""
+    customer_id = logged_in_client.post('/api/customers', json={'name': '원장거래처'}).json['id']
+    with count_queries() as statements:
+        order_id = logged_in_client.post('/api/orders', json={
+            'items': [{'id': 'P01', 'quantity': 10, 'price': 5000}], 'total_amount': 50000,
+            'customer_id': customer_id, 'payment_method': 'credit'}).json['order_id']
+    # 읽고-수정-쓰기가 아니라 SQL 안에서 더해야 함
+    stmt, _ = find_statement(statements, 'UPDATE customer')
+    assert 'receivable_balance=(customer.receivable_balance +' in stmt.replace(' = ', '=')
+
+    logged_in_client.post(f'/api/customer/{customer_id}/payments', json={'amount': 30000})
+    logged_in_client.delete(f'/api/order/{order_id}')
+
+    db.session.expire_all()
+    assert _receivable_entries(customer_id) == [('sale', 50000), ('payment', -30000), ('sale_cancel', -50000)]
+    assert db.session.get(Customer, customer_id).receivable_balance == -30000
+
+def test_credit_order_and_cancel_lock_rows_in_same_order(logged_in_client):
+    """외상 주문 생성과 취소가 모두 상품 재고 -> 거래처 미수금 순서로 행을 갱신하는지(교착 방지) 테스트합니다."""
+    customer_id = logged_in_client.post('/api/customers', json={'name': '잠금순서거래처'}).json['id']
+
+    def update_order(statements):
+        updates = [stmt.split()[1] for stmt, _ in statements if stmt.startswith('UPDATE')]
+        return [table for table in updates if table in ('product', 'customer')]
+
+    with count_queries() as created:
+        order_id = logged_in_client.post('/api/orders', json={
+            'items': [{'id': 'P01', 'quantity': 1, 'price': 5000}], 'total_amount': 5000,
+            'customer_id': customer_id, 'payment_method': 'credit'}).json['order_id']
+    with count_queries() as cancelled:
+        assert logged_in_client.delete(f'/api/order/{order_id}').status_code == 200
+    assert update_order(created) == update_order(cancelled) == ['product', 'customer']
+
+def test_table_versions_are_bumped_once_at_commit_in_sorted_order(logged_in_client):
+    """주문/취소 중 변경된 테이블 버전이 트랜잭션 끝에서 한 번에, 테이블 이름 순서로 올라가는지 테스트합니다."""
+    customer_id = logged_in_client.post('/api/customers', json={'name': '버전거래처'}).json['id']
+
+    def version_bumps(statements):
+        writes = [(stmt, params) for stmt, params in statements
+                  if stmt.startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        bumps = [i for i, (stmt, _) in enumerate(writes) if 'table_version' in stmt]
+        # THEN: 버전 갱신은 한 번뿐이고 트랜잭션의 마지막 쓰기임
+        assert bumps == [len(writes) - 1]
+        return [row[0] for row in writes[-1][1]]
+
+    with count_queries() as created:
+        order_id = logged_in_client.post('/api/orders', json={
+            'items': [{'id': 'P01', 'quantity': 1, 'price': 5000}], 'total_amount': 5000,
+            'customer_id': customer_id, 'payment_method': 'credit'}).json['order_id']
+    with count_queries() as cancelled:
+        logged_in_client.delete(f'/api/order/{order_id}')
+    assert version_bumps(created) == version_bumps(cancelled) == ['customer', 'order', 'product']
+
+def test_credit_order_for_unknown_customer_is_rolled_back(logged_in_client):
+    """존재하지 않는 거래처로 외상 주문하면 주문/재고/원장 모두 반영되지 않는지 테스트합니다."""
+    response = logged_in_client.post('/api/orders', json={
+        'items': [{'id': 'P01', 'quantity': 1, 'price': 5000}], 'total_amount': 5000,
+        'customer_id': 9999, 'payment_method': 'credit'})
+    assert response.status_code == 400
+    assert 'Invalid customer' in response.json['error']
+    assert Order.query.count() == 0
+    assert ReceivableEntry.query.count() == 0
+    assert Product.query.get('P01').stock_quantity == 100
+
+def test_receivables_aging_report(logged_in_client):
+    """수금을 오래된 외상부터 배분하여 30/60/90일 구간별 미수금을 한 번의 쿼리로 계산하는지 테스트합니다."""
+    # GIVEN: 100/70/45/10일 전 외상과 20일 전 수금 25000원이 있는 거래처, 잔액이 0인 거래처
+    as_of = datetime.datetime(2026, 10, 18, 12)
+    days_ago = lambda d: as_of - datetime.timedelta(days=d)
+    user = User.query.filter_by(username='testuser').first()
+    late = Customer(name='연체거래처', user_id=user.id)
+    paid = Customer(name='완납거래처', user_id=user.id)
+    db.session.add_all([late, paid])
+    db.session.flush()
+    entry = lambda customer, amount, d: ReceivableEntry(customer_id=customer.id, user_id=user.id, amount=amount,
+                                                        entry_type='sale' if amount > 0 else 'payment', entry_date=days_ago(d))
+    db.session.add_all([
+        entry(late, 10000, 100), entry(late, 20000, 70), entry(late, 30000, 45), entry(late, 40000, 10),
+        entry(late, -25000, 20), entry(paid, 5000, 50), entry(paid, -5000, 40),
+    ])
+    db.session.commit()
+
+    # WHEN
+    response = logged_in_client.get('/api/customers/receivables/aging?as_of=2026-10-18')
+
+    # THEN: 잔액 75000원은 최근 외상부터 40000(0~30일) + 30000(31~60일) + 5000(61~90일)으로 배분
+    assert response.status_code == 200
+    assert response.json == [{'customer_id': late.id, 'name': '연체거래처', 'balance': 75000,
+                              'current': 40000, 'days_31_60': 30000, 'days_61_90': 5000, 'over_90': 0}]
+
+    # THEN: 과거 시점 기준으로는 그 이후의 수금을 제외하고 경과 일수도 그 시점 기준으로 계산
+    past = logged_in_client.get('/api/customers/receivables/aging?as_of=2026-09-18').json
+    assert [(r['current'], r['days_31_60'], r['days_61_90'], r['over_90']) for r in past] == [(30000, 20000, 10000, 0)]
+
+    with count_queries() as statements:
+        logged_in_client.get('/api/customers/receivables/aging?as_of=2026-10-18')
+    assert len([s for s, _ in statements if 'receivable_entry' in s]) == 1
+    assert logged_in_client.get('/api/customers/receivables/aging?as_of=18-10-2026').status_code == 400
+
+# --- [신규 추가] Phase 23: 거래처 수금 내역 페이지네이션/누적 잔액 테스트 ---
+def _customer_with_payments(client, payments):
+    """외상 100000원 후 payments 금액들을 차례로 수금한 거래처의 ID를 반환합니다."""
+    customer_id = client.post('/api/customers', json={'name': '수금내역거래처'}).json['id']
+    client.post('/api/orders', json={'items': [{'id': 'P01', 'quantity': 20, 'price': 5000}], 'total_amount': 100000,
+                                     'customer_id': customer_id, 'payment_method': 'credit'})
+    for amount in payments:
+        client.post(f'/api/customer/{customer_id}/payments', json={'amount': amount})
+    return customer_id
+
+def test_payment_history_keyset_pagination(logged_in_client):
+    """limit/after로 수금 내역을 최신순 커서 페이지로 나누어 조회하는지 테스트합니다."""
+    customer_id = _customer_with_payments(logged_in_client, [1000, 2000, 3000, 4000, 5000])
+    all_ids = [p['id'] for p in logged_in_client.get(f'/api/customer/{customer_id}/payments').json]
+
+    seen_ids, cursor, pages = [], None, 0
+    while True:
+        url = f'/api/customer/{customer_id}/payments?limit=2' + (f'&after={cursor}' if cursor else '')
+        response = logged_in_client.get(url)
+        assert response.status_code == 200
+        seen_ids.extend(p['id'] for p in response.json['payments'])
+        cursor = response.json['next_cursor']
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert seen_ids == all_ids
+    assert logged_in_client.get(f'/api/customer/{customer_id}/payments?limit=0').status_code == 400
+    assert logged_in_client.get(f'/api/customer/{customer_id}/payments?after=bad').status_code == 400
+
+def test_payment_history_uses_customer_date_index(logged_in_client):
+    """수금 내역 페이지 조회가 (customer_id, transaction_date) 인덱스를 사용하는지 테스트합니다."""
+    customer_id = _customer_with_payments(logged_in_client, [1000, 2000])
+    with count_queries() as statements:
+        logged_in_client.get(f'/api/customer/{customer_id}/payments?limit=1')
+    stmt, params = find_statement(statements, 'FROM payment_transaction')
+    plan = explain_query_plan(stmt, params)
+    assert 'ix_payment_transaction_customer_id_transaction_date' in plan
+    assert 'TEMP B-TREE' not in plan
+
+def test_payment_history_running_balance(logged_in_client):
+    """running_balance=1이면 각 수금 직후의 미수금 잔액을 함께 반환하는지 테스트합니다."""
+    customer_id = _customer_with_payments(logged_in_client, [10000, 20000, 30000])
+
+    response = logged_in_client.get(f'/api/customer/{customer_id}/payments?running_balance=1&limit=2')
+
+    # 최신순: 30000 수금 후 40000, 20000 수금 후 70000 (다음 페이지는 10000 수금 후 90000)
+    assert [(p['amount'], p['running_balance']) for p in response.json['payments']] == [(30000, 40000), (20000, 70000)]
+    next_page = logged_in_client.get(f"/api/customer/{customer_id}/payments?running_balance=1&after={response.json['next_cursor']}")
+    assert [(p['amount'], p['running_balance']) for p in next_page.json['payments']] == [(10000, 90000)]
+    assert 'running_balance' not in logged_in_client.get(f'/api/customer/{customer_id}/payments').json[0]
+
+# --- [신규 추가] Phase 24: 거래처/공급처 삭제 가능 여부 EXISTS 확인 테스트 ---
+def test_customer_delete_guard_uses_exists(logged_in_client):
+    """주문이 있는 거래처 삭제 시 주문 목록을 불러오지 않고 인덱스를 사용하는 EXISTS로 확인하는지 테스트합니다."""
+    # GIVEN: 주문 30개가 있는 거래처
+    _create_orders_with_items(30)
+    customer = Customer.query.filter_by(name='대량주문거래처').first()
+
+    # WHEN
+    with count_queries() as statements:
+        response = logged_in_client.delete(f'/api/customer/{customer.id}')
+
+    # THEN: 거부되고, 주문 행을 읽는 SELECT 없이 EXISTS 한 번으로 판단해야 함
+    assert response.status_code == 400
+    stmt, params = find_statement(statements, 'EXISTS', 'FROM "order"')
+    plan = explain_query_plan(stmt, params)
+    assert 'ix_order_customer_id' in plan
+    assert 'ix_payment_transaction_customer_id_transaction_date' in plan
+    assert not any(s.startswith('SELECT "order".id') for s, _ in statements)
+
+    # 내역이 없는 거래처는 삭제되어야 함
+    empty_id = logged_in_client.post('/api/customers', json={'name': '빈거래처'}).json['id']
+    assert logged_in_client.delete(f'/api/customer/{empty_id}').status_code == 204
+
+def test_supplier_delete_guard_uses_exists(logged_in_client):
+    """매입이 있는 공급처 삭제 시 supplier_id 인덱스를 사용하는 EXISTS로 확인하는지 테스트합니다."""
+    supplier_id = logged_in_client.post('/api/suppliers', json={'name': '삭제테스트공급처'}).json['id']
+    logged_in_client.post('/api/purchases', json={'supplier_id': supplier_id,
+                                                  'items': [{'product_id': 'P01', 'quantity': 1, 'cost_per_unit': 100}]})
+    with count_queries() as statements:
+        response = logged_in_client.delete(f'/api/supplier/{supplier_id}')
+
+    assert response.status_code == 400
+    stmt, params = find_statement(statements, 'EXISTS', 'FROM purchase_order')
+    assert 'ix_purchase_order_supplier_id' in explain_query_plan(stmt, params)
+    assert not any(s.startswith('SELECT purchase_order.id') for s, _ in statements)
+
+# --- [신규 추가] Phase 25: 매입 일괄 입고 테스트 ---
+def test_create_purchase_query_count_is_constant(logged_in_client):
+    """매입 항목 수와 관계없이 매입 기록의 SQL 실행 횟수가 일정한지 테스트합니다."""
+    _add_bulk_products(30)
+
+    def post_purchase(size):
+        items = [{'product_id': f'B{i:03d}', 'quantity': 5, 'cost_per_unit': 80} for i in range(size)]
+        with count_queries() as statements:
+            response = logged_in_client.post('/api/purchases', json={'items': items})
+        assert response.status_code == 201
+        return statements
+
+    small = post_purchase(2)
+    large = post_purchase(30)
+    assert len(large) == len(small)
+    assert len([s for s, _ in large if s.startswith('UPDATE product')]) == 1
+    db.session.expire_all()
+    assert Product.query.get('B000').stock_quantity == 20
+    assert Product.query.get('B029').stock_quantity == 15
+
+def test_purchase_batch_records_all_in_one_transaction(logged_in_client):
+    """여러 매입을 한 번에 기록하고, 재고는 상품별 합산 UPDATE 한 번으로, 원장은 매입별로 남기는지 테스트합니다."""
+    supplier_id = logged_in_client.post('/api/suppliers', json={'name': '일괄공급처'}).json['id']
+    purchases = [
+        {'supplier_id': supplier_id, 'purchase_date': '2026-10-01', 'items': [
+            {'product_id': 'P01', 'quantity': 10, 'cost_per_unit': 4000},
+            {'product_id': 'P02', 'quantity': 5, 'cost_per_unit': 7000}]},
+        {'supplier_id': supplier_id, 'items': [{'product_id': 'P01', 'quantity': 7, 'cost_per_unit': 4100}]},
+    ]
+    with count_queries() as statements:
+        response = logged_in_client.post('/api/purchases/batch', json={'purchases': purchases})
+
+    assert response.status_code == 201
+    first_id, second_id = response.json['purchase_ids']
+    assert len([s for s, _ in statements if s.startswith('UPDATE product')]) == 1
+    db.session.expire_all()
+    assert Product.query.get('P01').stock_quantity == 117
+    assert Product.query.get('P02').stock_quantity == 105
+    first = db.session.get(PurchaseOrder, first_id)
+    assert (first.total_cost, first.purchase_date.date()) == (75000, datetime.date(2026, 10, 1))
+    assert _movements('P01')[1:] == [('purchase', 10, first_id), ('purchase', 7, second_id)]
+
+def test_purchase_batch_rejects_everything_on_error(logged_in_client):
+    """잘못된 매입이 하나라도 있으면 전체를 기록하지 않고 매입별 오류를 반환하는지 테스트합니다."""
+    response = logged_in_client.post('/api/purchases/batch', json={'purchases': [
+        {'items': [{'product_id': 'P01', 'quantity': 1, 'cost_per_unit': 100}]},
+        {'items': [{'product_id': 'NOPE', 'quantity': 1, 'cost_per_unit': 100}]},
+        {'supplier_id': 999, 'items': []},
+        {'items': [{'product_id': 'P02', 'quantity': 0, 'cost_per_unit': 100}]},
+    ]})
+    assert response.status_code == 400
+    assert [e['index'] for e in response.json['errors']] == [1, 2, 3]
+    assert 'Product with ID NOPE not found.' == response.json['errors'][0]['error']
+    assert PurchaseOrder.query.count() == 0
+    assert Product.query.get('P01').stock_quantity == 100
+
+def test_purchase_batch_from_csv(logged_in_client):
+    """거래명세서 CSV를 purchase_ref별 매입으로 묶어 기록하는지 테스트합니다."""
+    csv_body = ('purchase_ref,supplier_id,purchase_date,product_id,quantity,cost_per_unit\n'
+                'INV-1,,2026-10-02,P01,3,4000\n'
+                'INV-1,,2026-10-02,P02,4,7000\n'
+                'INV-2,,,P01,2,4000\n')
+    response = logged_in_client.post('/api/purchases/batch', data=csv_body.encode(), content_type='text/csv')
+
+    assert response.status_code == 201
+    assert len(response.json['purchase_ids']) == 2
+    assert PurchaseOrderItem.query.count() == 3
+    db.session.expire_all()
+    assert Product.query.get('P01').stock_quantity == 105
+
+def test_purchase_batch_rejects_unreadable_csv(logged_in_client):
+    """UTF-8이 아닌 CSV(엑셀 CP949 저장)나 깨진 CSV는 500 대신 400으로 거부하는지 테스트합니다."""
+    csv_body = ('purchase_ref,supplier_id,purchase_date,product_id,quantity,cost_per_unit\n'
+                '명세서-1,,2026-10-02,P01,3,4000\n')
+    # WHEN: CP949로 저장한 파일을 업로드
+    response = logged_in_client.post('/api/purchases/batch', content_type='multipart/form-data',
+                                     data={'file': (io.BytesIO(csv_body.encode('cp949')), 'purchases.csv')})
+    # THEN
+    assert response.status_code == 400
+    assert 'UTF-8' in response.json['error']
+
+    # WHEN: 필드 크기 한도(csv.field_size_limit)를 넘는 줄이 섞인 CSV 본문
+    broken_row = 'INV-2,,,P01,1,"' + 'x' * (csv.field_size_limit() + 1) + '"\n'
+    response = logged_in_client.post('/api/purchases/batch', data=(csv_body + broken_row).encode(),
+                                     content_type='text/csv')
+    # THEN: 아무 매입도 기록되지 않아야 함
+    assert response.status_code == 400
+    assert 'after line 2' in response.json['error']
+    assert PurchaseOrder.query.count() == 0
+
+# --- [신규 추가] Phase 26: 매입 내역 조회(기간/공급처 필터, 페이지네이션, 항목 포함) 테스트 ---
+def _seed_purchase_history(client):
+    """공급처 두 곳의 10/1~10/5 매입 5건을 만들고 (공급처A ID, 공급처B ID)를 반환합니다."""
+    supplier_a = client.post('/api/suppliers', json={'name': '공급처A'}).json['id']
+    supplier_b = client.post('/api/suppliers', json={'name': '공급처B'}).json['id']
+    client.post('/api/purchases/batch', json={'purchases': [
+        {'supplier_id': supplier_a if day % 2 else supplier_b, 'purchase_date': f'2026-10-0{day}',
+         'items': [{'product_id': 'P01', 'quantity': day, 'cost_per_unit': 100},
+                   {'product_id': 'P02', 'quantity': 1, 'cost_per_unit': 200}]}
+        for day in range(1, 6)
+    ]})
+    return supplier_a, supplier_b
+
+def test_purchase_history_filters_and_pagination(logged_in_client):
+    """기간/공급처 필터와 커서 페이지네이션으로 매입 내역을 조회하는지 테스트합니다."""
+    supplier_a, _ = _seed_purchase_history(logged_in_client)
+
+    # 기간 필터 (양 끝 포함)
+    dates = [p['purchase_date'][:10] for p in
+             logged_in_client.get('/api/purchases?start_date=2026-10-02&end_date=2026-10-04').json]
+    assert dates == ['2026-10-04', '2026-10-03', '2026-10-02']
+
+    # 공급처 필터 + 페이지네이션
+    first = logged_in_client.get(f'/api/purchases?supplier_id={supplier_a}&limit=2').json
+    assert [p['purchase_date'][:10] for p in first['purchases']] == ['2026-10-05', '2026-10-03']
+    second = logged_in_client.get(f"/api/purchases?supplier_id={supplier_a}&limit=2&after={first['next_cursor']}").json
+    assert [p['purchase_date'][:10] for p in second['purchases']] == ['2026-10-01']
+    assert second['next_cursor'] is None
+
+    assert logged_in_client.get('/api/purchases?start_date=10/01').status_code == 400
+    assert logged_in_client.get('/api/purchases?supplier_id=abc').status_code == 400
+    assert logged_in_client.get('/api/purchases?after=bad').status_code == 400
+
+def test_purchase_history_uses_user_date_index(logged_in_client):
+    """기간 조건 매입 조회가 (user_id, purchase_date) 인덱스로 정렬 없이 처리되는지 테스트합니다."""
+    _seed_purchase_history(logged_in_client)
+    with count_queries() as statements:
+        logged_in_client.get('/api/purchases?start_date=2026-10-02&limit=2')
+    stmt, params = find_statement(statements, 'FROM purchase_order')
+    plan = explain_query_plan(stmt, params)
+    assert 'ix_purchase_order_user_id_purchase_date' in plan
+    assert 'TEMP B-TREE' not in plan
+
+def test_purchase_history_include_items_query_count_is_constant(logged_in_client):
+    """include_items=1이면 매입 수와 관계없이 고정된 개수의 SELECT로 항목과 상품명을 함께 반환하는지 테스트합니다."""
+    _seed_purchase_history(logged_in_client)
+    def purchase_queries(url):
+        # 로그인 사용자 조회는 세션 상태에 따라 달라지므로 제외합니다.
+        with count_queries() as statements:
+            response = logged_in_client.get(url)
+        return response, [s for s, _ in statements if 'FROM user' not in s]
+
+    _, few = purchase_queries('/api/purchases?include_items=1&limit=1')
+    response, many = purchase_queries('/api/purchases?include_items=1')
+    assert len(many) == len(few) == 3
+
+    latest = response.json[0]
+    assert latest['supplier_name'] == '공급처A'
+    assert latest['items'] == [
+        {'product_id': 'P01', 'product_name': '근위', 'quantity': 5, 'cost_per_unit': 100},
+        {'product_id': 'P02', 'product_name': '닭', 'quantity': 1, 'cost_per_unit': 200},
+    ]
+    assert 'items' not in logged_in_client.get('/api/purchases').json[0]
+
+# --- [신규 추가] Phase 27: 로그인 사용자 정보 캐시 테스트 ---
+def _fresh_request_state():
+    """테스트 클라이언트는 fixture의 앱 컨텍스트를 공유하므로, 실제 새 요청처럼 세션과 current_user를 비웁니다."""
+    db.session.remove()
+    g.pop('_login_user', None)
+
+def test_authenticated_get_skips_user_query_when_cached(logged_in_client):
+    """로그인 사용자 정보가 캐시되어 있으면 인증된 GET 요청의 쿼리 수가 하나 줄어드는지 테스트합니다."""
+    logged_in_client.get('/api/price?productId=P01')  # 상품 캐시 준비
+
+    def statements_for(url):
+        _fresh_request_state()
+        with count_queries() as statements:
+            assert logged_in_client.get(url).status_code == 200
+        return [stmt for stmt, _ in statements]
+
+    for url in ('/api/price?productId=P01', '/api/auth/status', '/api/customers'):
+        # GIVEN: 사용자 캐시가 비어 있으면 user_loader가 사용자를 조회함
+        user_cache.clear()
+        cold = statements_for(url)
+        # WHEN: 같은 요청을 다시 보내면 캐시된 사용자 정보를 사용함
+        warm = statements_for(url)
+        # THEN: 사용자 조회 한 건만 빠짐
+        assert len(cold) - len(warm) == 1
+        assert any('FROM user' in stmt for stmt in cold)
+        assert not any('FROM user' in stmt for stmt in warm)
+
+def test_user_cache_is_primed_on_login_and_invalidated_on_change(client):
+    """로그인 시 사용자 정보가 캐시되고, 사용자 정보가 바뀌면 커밋 시 해당 항목이 제거되는지 테스트합니다."""
+    client.post('/api/auth/register', json={'username': 'cashier', 'password': 'password'})
+    client.post('/api/auth/login', json={'username': 'cashier', 'password': 'password'})
+
+    # THEN: 로그인 직후 첫 요청부터 사용자 조회가 없음
+    _fresh_request_state()
+    with count_queries() as statements:
+        assert client.get('/api/auth/status').json['username'] == 'cashier'
+    assert not any('FROM user' in stmt for stmt, _ in statements)
+
+    # WHEN: 사용자 이름이 바뀌고 커밋됨
+    user = User.query.filter_by(username='cashier').first()
+    user_id = user.id
+    user.username = 'cashier2'
+    db.session.commit()
+    _fresh_request_state()
+    # THEN: 다음 요청에서 바뀐 정보를 다시 읽음
+    assert client.get('/api/auth/status').json['username'] == 'cashier2'
+
+    # WHEN: 사용자가 삭제됨 / THEN: 세션이 있어도 더 이상 인증되지 않음
+    db.session.delete(db.session.get(User, user_id))
+    db.session.commit()
+    assert user_cache.get(user_id) is None
+    _fresh_request_state()
+    assert client.get('/api/auth/status').status_code == 401
+
+# --- [신규 추가] Phase 28: 비밀번호 해시 설정과 로그인 동시 실행 제한 테스트 ---
+def test_password_hash_uses_configured_method(client):
+    """회원가입 시 환경 설정(PASSWORD_HASH_METHOD)의 해시 방식/비용을 사용하는지 테스트합니다."""
+    client.post('/api/auth/register', json={'username': 'cashier', 'password': 'password'})
+    user = User.query.filter_by(username='cashier').first()
+    assert user.password_hash.startswith(app.config['PASSWORD_HASH_METHOD'] + '$')
+    assert not user.password_needs_rehash()
+
+def test_login_rehashes_password_when_method_changes(client):
+    """저장된 해시의 방식/비용이 설정과 다르면 로그인 성공 시 새 설정으로 다시 해시하는지 테스트합니다."""
+    # GIVEN: 이전 설정(비용 2000)으로 해시된 사용자
+    user = User(username='cashier')
+    user.set_password('password', method='pbkdf2:sha256:2000')
+    db.session.add(user)
+    db.session.commit()
+    old_hash = user.password_hash
+
+    # WHEN: 틀린 비밀번호로 로그인 / THEN: 다시 해시하지 않음
+    assert client.post('/api/auth/login', json={'username': 'cashier', 'password': 'wrong'}).status_code == 401
+    assert User.query.filter_by(username='cashier').first().password_hash == old_hash
+
+    # WHEN: 올바른 비밀번호로 로그인 / THEN: 현재 설정으로 다시 해시되고 이후에도 로그인 가능
+    assert client.post('/api/auth/login', json={'username': 'cashier', 'password': 'password'}).status_code == 200
+    new_hash = User.query.filter_by(username='cashier').first().password_hash
+    assert new_hash != old_hash
+    assert new_hash.startswith(app.config['PASSWORD_HASH_METHOD'] + '$')
+    assert client.post('/api/auth/login', json={'username': 'cashier', 'password': 'password'}).status_code == 200
+
+    # 비용을 생략한 설정은 werkzeug가 붙이는 기본 비용과 같은 것으로 봅니다.
+    assert not needs_rehash(generate_password_hash('x', method='scrypt'), 'scrypt:32768:8:1')
+    assert needs_rehash(generate_password_hash('x', method='scrypt:16384:8:1'), 'scrypt')
+
+def test_login_returns_503_when_hash_slots_are_busy(client, monkeypatch):
+    """동시 해시 계산 수가 한도에 도달하면 로그인이 대기 후 503(Retry-After)을 반환하는지 테스트합니다."""
+    client.post('/api/auth/register', json={'username': 'cashier', 'password': 'password'})
+
+    # GIVEN: 슬롯 하나가 이미 사용 중이고 대기 시간이 0인 상태
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(passwords, '_hash_slots', slots)
+    monkeypatch.setattr(passwords, '_wait_timeout', 0)
+    slots.acquire()
+
+    # WHEN: 로그인 시도 / THEN: 해시 계산 없이 503
+    response = client.post('/api/auth/login', json={'username': 'cashier', 'password': 'password'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+    # WHEN: 슬롯이 반환됨 / THEN: 정상 로그인되고 슬롯도 반환됨
+    slots.release()
+    assert client.post('/api/auth/login', json={'username': 'cashier', 'password': 'password'}).status_code == 200
+    assert slots.acquire(blocking=False)
+
+# --- [신규 추가] Phase 29: 요청 시간/SQL 측정(Server-Timing, /api/_metrics) 테스트 ---
+def _server_timing(response):
+    """Server-Timing 헤더를 {이름: (dur, desc)} 딕셔너리로 변환합니다."""
+    timings = {}
+    for metric in response.headers['Server-Timing'].split(','):
+        name, *params = [part.strip() for part in metric.split(';')]
+        values = dict(param.split('=', 1) for param in params)
+        timings[name] = (float(values['dur']), values.get('desc', '').strip('"'))
+    return timings
+
+def test_server_timing_header_reports_sql_statements(logged_in_client):
+    """응답의 Server-Timing 헤더에 요청 시간과 실제 실행된 SQL 문장 수가 담기는지 테스트합니다."""
+    with count_queries() as statements:
+        response = logged_in_client.get('/api/customers')
+    assert response.status_code == 200
+    timings = _server_timing(response)
+    assert timings['app'][0] >= timings['db'][0] >= 0
+    assert timings['db'][1] == f'{len(statements)} queries'
+
+def test_metrics_endpoint_aggregates_per_endpoint(logged_in_client, monkeypatch):
+    """/api/_metrics가 엔드포인트별 요청 수, 상태 코드, SQL 수와 누적 히스토그램을 집계하는지 테스트합니다."""
+    monkeypatch.setitem(app.config, 'METRICS_RESET_ENABLED', True)
+    logged_in_client.delete('/api/_metrics')
+    # WHEN: 단가 조회 3번(그중 1번은 없는 상품)
+    for product_id in ('P01', 'P01', 'P99'):
+        logged_in_client.get(f'/api/price?productId={product_id}')
+
+    metrics = logged_in_client.get('/api/_metrics').json
+    price = metrics['endpoints']['GET product_api.get_price']
+    assert price['count'] == 3
+    assert price['status'] == {'200': 2, '404': 1}
+    assert price['duration_ms']['buckets'][-1] == {'le': '+Inf', 'count': 3}
+    assert price['sql']['statement_buckets'][-1] == {'le': '+Inf', 'count': 3}
+    assert price['sql']['statements_total'] >= price['sql']['statements_max']
+    # 누적 히스토그램이므로 구간 값은 감소하지 않음
+    counts = [bucket['count'] for bucket in price['duration_ms']['buckets']]
+    assert counts == sorted(counts)
+    # 초기화 요청(DELETE) 자체도 집계됨
+    assert metrics['endpoints']['DELETE metrics_bp.reset_metrics']['count'] == 1
+
+def test_metrics_reset_is_disabled_by_default(logged_in_client):
+    """METRICS_RESET_ENABLED를 켜지 않으면 로그인한 사용자도 측정 값을 지울 수 없는지 테스트합니다."""
+    # GIVEN: 단가 조회가 집계됨
+    logged_in_client.get('/api/price?productId=P01')
+
+    # WHEN: 기본 설정에서 초기화 요청
+    response = logged_in_client.delete('/api/_metrics')
+
+    # THEN: 403이고 누적 값은 그대로 남아 있어야 함
+    assert response.status_code == 403
+    assert 'GET product_api.get_price' in logged_in_client.get('/api/_metrics').json['endpoints']
+
+def test_instrumentation_can_be_disabled():
+    """INSTRUMENTATION_ENABLED=False이면 Server-Timing 헤더를 붙이지 않는지 테스트합니다."""
+    test_app = create_app('testing', {'INSTRUMENTATION_ENABLED': False})
+    response = test_app.test_client().get('/api/auth/status')
+    assert response.status_code == 401
+    assert 'Server-Timing' not in response.headers
+
+# --- [신규 추가] Phase 30: 느린 쿼리 로그(JSONL, 실행 계획 포함) 테스트 ---
+def _slow_query_app(log_path, **config):
+    test_app = create_app('testing', {
+        'SLOW_QUERY_LOG_ENABLED': True, 'SLOW_QUERY_THRESHOLD_MS': 0, 'SLOW_QUERY_LOG_PATH': str(log_path), **config
+    })
+    with test_app.app_context():
+        db.create_all()
+    return test_app
+
+def _read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_slow_query_log_records_endpoint_parameters_and_plan(tmp_path):
+    """임계값 이상 걸린 쿼리가 SQL, 파라미터, 엔드포인트, 실행 계획과 함께 JSONL로 기록되는지 테스트합니다."""
+    log_path = tmp_path / 'slow.jsonl'
+    test_app = _slow_query_app(log_path)
+    with test_app.app_context():
+        client = test_app.test_client()
+        client.post('/api/auth/register', json={'username': 'cashier', 'password': 'password'})
+        client.post('/api/auth/login', json={'username': 'cashier', 'password': 'password'})
+        # WHEN: 요청 안에서 실행된 쿼리와 요청 밖에서 실행된 전체 스캔 쿼리
+        assert client.get('/api/orders').status_code == 200
+        db.session.execute(text('SELECT * FROM product WHERE price > :price'), {'price': 0}).all()
+
+    entries = _read_jsonl(log_path)
+    # THEN: 주문 목록 쿼리는 엔드포인트와 인덱스 검색 계획이 함께 기록됨
+    order_query = next(e for e in entries if e['endpoint'] == 'order_api.orders_handler' and 'FROM "order"' in e['statement'])
+    assert order_query['method'] == 'GET'
+    assert order_query['duration_ms'] >= 0
+    assert any('ix_order_user_id_order_date' in step for step in order_query['plan'])
+    # THEN: 요청 밖 쿼리는 엔드포인트 없이 파라미터와 테이블 스캔 계획이 기록됨
+    scan = next(e for e in entries if 'FROM product WHERE price' in e['statement'])
+    assert scan['endpoint'] is None
+    assert scan['parameters'] == [0]
+    assert any(step.startswith('SCAN product') for step in scan['plan'])
+
+def test_explain_failure_is_isolated_in_savepoint():
+    """SQLite 외의 DB 경로에서 EXPLAIN이 실패해도 savepoint까지만 되돌려 열린 트랜잭션을 계속 쓸 수 있는지 테스트합니다."""
+    conn = sqlite3.connect(':memory:', isolation_level=None)
+    conn.execute('CREATE TABLE t (x INTEGER)')
+    conn.execute('BEGIN')
+    conn.execute('INSERT INTO t VALUES (1)')
+
+    # WHEN: 실패하는 EXPLAIN (요청 트랜잭션 안) / THEN: 오류는 호출자에게 전달됨
+    with pytest.raises(sqlite3.OperationalError):
+        explain(conn, 'postgresql', 'SELECT * FROM missing_table', ())
+    # THEN: savepoint가 정리되고 기존 트랜잭션의 변경이 그대로 커밋됨
+    assert explain(conn, 'postgresql', 'SELECT * FROM t', ())
+    conn.execute('INSERT INTO t VALUES (2)')
+    conn.execute('COMMIT')
+    assert conn.execute('SELECT count(*) FROM t').fetchone()[0] == 2
+
+def test_slow_query_log_threshold_and_rotation(tmp_path):
+    """임계값보다 빠른 쿼리는 기록하지 않고, 로그 파일이 크기 제한에 따라 회전하는지 테스트합니다."""
+    fast_path = tmp_path / 'fast.jsonl'
+    test_app = _slow_query_app(fast_path, SLOW_QUERY_THRESHOLD_MS=60000)
+    with test_app.app_context():
+        db.session.execute(text('SELECT 1')).all()
+    assert not fast_path.exists() or fast_path.read_text() == ''
+
+    rotating_path = tmp_path / 'rotating.jsonl'
+    test_app = _slow_query_app(rotating_path, SLOW_QUERY_LOG_MAX_BYTES=512, SLOW_QUERY_LOG_BACKUP_COUNT=2)
+    with test_app.app_context():
+        for _ in range(20):
+            db.session.execute(text('SELECT * FROM product')).all()
+    assert (tmp_path / 'rotating.jsonl.1').exists()
+    assert not (tmp_path / 'rotating.jsonl.3').exists()
+
+def test_slow_query_log_redacts_password_hash(tmp_path):
+    """비밀번호 재해시 UPDATE의 password_hash 값은 가리고 나머지 파라미터는 그대로 기록하는지 테스트합니다."""
+    log_path = tmp_path / 'slow.jsonl'
+    test_app = _slow_query_app(log_path)
+    with test_app.app_context():
+        user = User(username='cashier', password_hash='old')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        # WHEN: ORM UPDATE(위치 파라미터)와 이름을 알 수 없는 텍스트 SQL로 해시를 바꿈
+        user.password_hash = 'scrypt:32768:8:1$secret-salt$secret-hash'
+        db.session.commit()
+        db.session.connection().exec_driver_sql('UPDATE user SET password_hash = ? WHERE id = ?',
+                                                ('secret-hash-2', user_id))
+        db.session.commit()
+
+    log_text = log_path.read_text(encoding='utf-8')
+    assert 'secret' not in log_text
+    updates = [e for e in _read_jsonl(log_path) if e['statement'].startswith('UPDATE user SET password_hash')]
+    assert updates[0]['parameters'] == ['[REDACTED]', user_id]
+    assert updates[1]['parameters'] == '[REDACTED]'
+
+def test_failed_statement_does_not_leak_timer_start(tmp_path):
+    """실패한 SQL 문장의 시작 시각이 연결에 남아 다음 문장의 시간이 어긋나지 않는지 테스트합니다."""
+    test_app = _slow_query_app(tmp_path / 'slow.jsonl')
+    with test_app.test_request_context('/api/products'):
+        test_app.preprocess_request()  # 요청 측정 시작 (before_request)
+        conn = db.session.connection()
+        # WHEN: 없는 테이블 조회가 실패함
+        with pytest.raises(OperationalError):
+            db.session.execute(text('SELECT * FROM missing_table'))
+        # THEN: 느린 쿼리 로그와 요청 측정의 시작 시각 스택이 비어 있어야 함
+        assert conn.info.get('slow_query_start') == []
+        assert conn.info.get('instrumentation_start') == []
+        db.session.rollback()
+
+# --- [신규 추가] Phase 31: 매출 분석(상품 순위, 결제수단별/거래처별 매출) 테스트 ---
+def _seed_sales(client):
+    """2025년 3월(취소 1건 포함)과 4월 주문을 만듭니다. 거래처 ID를 반환합니다."""
+    # 테스트마다 DB가 새로 만들어져 사용자 ID와 테이블 버전이 같아지므로, 이전 테스트의 캐시를 비웁니다.
+    analytics_cache.clear()
+    customer_id = client.post('/api/customers', json={'name': '단골식당'}).json['id']
+    user = User.query.filter_by(username='testuser').first()
+
+    def order(day, payment_method, items, customer=None, status='completed'):
+        return Order(user_id=user.id, order_date=datetime.datetime(2025, 3, 1, 12) + datetime.timedelta(days=day),
+                     payment_method=payment_method, customer_id=customer, status=status,
+                     total_amount=sum(q * p for _, q, p in items),
+                     items=[OrderItem(product_id=pid, quantity=q, price_per_unit=p) for pid, q, p in items])
+
+    db.session.add_all([
+        order(0, 'cash', [('P01', 3, 5000), ('P02', 1, 8000)]),
+        order(1, 'card', [('P02', 2, 8000)], customer_id),
+        order(2, 'credit', [('P01', 1, 5000)], customer_id),
+        order(2, 'cash', [('P02', 10, 8000)], status='cancelled'),
+        order(31, 'cash', [('P02', 5, 8000)]),
+    ])
+    db.session.commit()
+    return customer_id
+
+def test_analytics_reports_for_date_range(logged_in_client):
+    """기간 내 완료 주문으로 상품 순위, 결제수단별, 거래처별 매출을 집계하는지 테스트합니다."""
+    customer_id = _seed_sales(logged_in_client)
+    march = 'start_date=2025-03-01&end_date=2025-03-31'
+
+    # 수량 기준: 근위(P01) 4개 > 닭(P02) 3개 / 매출액 기준: 닭 24000 > 근위 20000
+    by_quantity = logged_in_client.get(f'/api/analytics/top-products?{march}').json
+    assert [(p['product_id'], p['quantity']) for p in by_quantity['products']] == [('P01', 4), ('P02', 3)]
+    by_revenue = logged_in_client.get(f'/api/analytics/top-products?{march}&by=revenue&limit=1').json
+    assert by_revenue['by'] == 'revenue'
+    assert by_revenue['products'] == [
+        {'product_id': 'P02', 'product_name': '닭', 'quantity': 3, 'revenue': 24000, 'order_count': 2}]
+
+    methods = logged_in_client.get(f'/api/analytics/sales-by-payment-method?{march}').json
+    assert methods['start_date'] == '2025-03-01'
+    assert [(m['payment_method'], m['order_count'], m['total_sales']) for m in methods['payment_methods']] == [
+        ('cash', 1, 23000), ('card', 1, 16000), ('credit', 1, 5000)]
+
+    customers = logged_in_client.get(f'/api/analytics/sales-by-customer?{march}').json['customers']
+    assert [(c['customer_id'], c['order_count'], c['total_sales']) for c in customers] == [
+        (None, 1, 23000), (customer_id, 2, 21000)]
+    assert customers[1]['customer_name'] == '단골식당'
+
+    # 기간을 생략하면 전체 기간 (4월 주문 포함)
+    everything = logged_in_client.get('/api/analytics/top-products').json['products']
+    assert everything[0] == {'product_id': 'P02', 'product_name': '닭', 'quantity': 8, 'revenue': 64000, 'order_count': 3}
+
+    # 잘못된 파라미터
+    assert logged_in_client.get('/api/analytics/top-products?by=profit').status_code == 400
+    assert logged_in_client.get('/api/analytics/top-products?limit=101').status_code == 400
+    assert logged_in_client.get('/api/analytics/sales-by-customer?start_date=2025-04-01&end_date=2025-03-01').status_code == 400
+    assert logged_in_client.get('/api/analytics/sales-by-payment-method?start_date=03/01').status_code == 400
+
+def test_analytics_results_are_cached_until_new_order(logged_in_client):
+    """분석 결과가 캐시되고(ETag 304 포함) 새 주문이나 주문 취소가 생기면 다시 계산되는지 테스트합니다."""
+    _seed_sales(logged_in_client)
+    first = logged_in_client.get('/api/analytics/top-products')
+    assert first.json['products'][0]['quantity'] == 8
+
+    # WHEN: 같은 조회를 다시 요청 / THEN: 집계 쿼리 없이 캐시에서 응답
+    with count_queries() as statements:
+        again = logged_in_client.get('/api/analytics/top-products')
+    assert again.json == first.json
+    assert not any('FROM order_item' in stmt for stmt, _ in statements)
+    assert logged_in_client.get('/api/analytics/top-products',
+                                headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    # WHEN: 새 주문 / THEN: ETag가 바뀌고 집계가 다시 계산됨
+    order_id = logged_in_client.post('/api/orders', json={
+        'items': [{'id': 'P02', 'quantity': 2, 'price': 8000}], 'total_amount': 16000}).json['order_id']
+    after_order = logged_in_client.get('/api/analytics/top-products', headers={'If-None-Match': first.headers['ETag']})
+    assert after_order.status_code == 200
+    assert after_order.json['products'][0]['quantity'] == 10
+
+    # WHEN: 주문 취소 / THEN: 취소된 주문은 집계에서 빠짐
+    logged_in_client.delete(f'/api/order/{order_id}')
+    assert logged_in_client.get('/api/analytics/top-products').json['products'][0]['quantity'] == 8
+
+def test_top_products_query_uses_covering_indexes(logged_in_client):
+    """상품 순위 쿼리가 주문 인덱스와 order_item 커버링 인덱스만으로 처리되는지 테스트합니다."""
+    _seed_sales(logged_in_client)
+    with count_queries() as statements:
+        logged_in_client.get('/api/analytics/top-products?start_date=2025-03-01&end_date=2025-03-31')
+    stmt, params = find_statement(statements, 'FROM order_item')
+    plan = explain_query_plan(stmt, params)
+    assert 'ix_order_user_id_status_order_date' in plan
+    assert 'COVERING INDEX ix_order_item_order_id_product_id_quantity_price' in plan
@@ -0,0 +1,18 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+# INSERT ... ON CONFLICT DO UPDATE(upsert)를 만드는 공용 도우미입니다.
+# ON CONFLICT 구문은 DB별 insert()에만 있으므로, 연결된 DB의 방언 이름으로 알맞은 insert를 고릅니다.
+# (운영은 PostgreSQL, 개발/테스트는 SQLite. 둘 다 같은 on_conflict_do_update/excluded API를 제공합니다.)
+_DIALECT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def dialect_insert(dialect_name, table):
+    """dialect_name('postgresql' 또는 'sqlite')에 맞는, on_conflict_do_update를 지원하는 INSERT 문을 만듭니다."""
+    try:
+        insert = _DIALECT_INSERTS[dialect_name]
+    except KeyError:
+        raise NotImplementedError(f"Upsert is not supported for the '{dialect_name}' dialect") from None
+    return insert(table)
@@ -0,0 +1,71 @@
+from flask_login import UserMixin
+from sqlalchemy import event, select
+
+from cache import TTLCache
+from extensions import db
+from models import User
+
+# Flask-Login의 user_loader가 요청마다 User를 SELECT하지 않도록, 로그인 사용자 정보를 프로세스 내부에 캐시합니다.
+# 캐시하는 값은 세션에 묶인 ORM 객체가 아니라 id/username만 가진 UserIdentity이므로
+# 요청(세션)이 달라도 안전하게 공유할 수 있으며, 각 블루프린트의 current_user.id 필터에 그대로 쓰입니다.
+# 사용자가 수정/삭제되면 해당 트랜잭션이 커밋될 때 그 사용자 항목만 제거합니다.
+# 다른 워커 프로세스의 변경은 최대 USER_CACHE_TTL만큼 늦게 반영됩니다.
+user_cache = TTLCache()
+
+_INVALIDATE_KEY = 'invalidate_user_cache'
+
+
+class UserIdentity(UserMixin):
+    """current_user로 사용되는 로그인 사용자 정보입니다. DB 세션과 무관한 읽기 전용 값입니다."""
+
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+
+    def __repr__(self):
+        return f'<UserIdentity {self.id} {self.username}>'
+
+
+def init_user_cache(app):
+    user_cache.configure(
+        ttl=app.config.get('USER_CACHE_TTL', 60),
+        max_entries=app.config.get('USER_CACHE_MAX_ENTRIES', 1024)
+    )
+
+
+def remember_user(user):
+    """로그인 직후 사용자 정보를 캐시에 넣어, 다음 요청부터 user_loader가 DB를 조회하지 않게 합니다."""
+    identity = UserIdentity(user.id, user.username)
+    user_cache.set(user.id, identity)
+    return identity
+
+
+def load_user_identity(user_id):
+    """user_id의 UserIdentity를 캐시에서 찾고, 없으면 id/username만 조회하여 캐시합니다. 없는 사용자는 None."""
+    identity = user_cache.get(user_id)
+    if identity is None:
+        row = db.session.execute(select(User.id, User.username).where(User.id == user_id)).first()
+        if row is None:
+            # 없는 사용자는 캐시하지 않습니다. (같은 id가 나중에 생겨도 바로 반영되도록)
+            return None
+        identity = UserIdentity(row.id, row.username)
+        user_cache.set(user_id, identity)
+    return identity
+
+
+@event.listens_for(db.session, 'after_flush')
+def _mark_user_changes(session, flush_context):
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            session.info.setdefault(_INVALIDATE_KEY, set()).add(obj.id)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _discard_after_commit(session):
+    for user_id in session.info.pop(_INVALIDATE_KEY, ()):
+        user_cache.discard(user_id)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_after_rollback(session):
+    session.info.pop(_INVALIDATE_KEY, None)